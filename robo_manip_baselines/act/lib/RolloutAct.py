@@ -90,6 +90,9 @@ class RolloutAct(RolloutBase):
 
         # Set variables
         self.joint_scales = [1.0] * (self.action_dim - 1) + [0.01]
+        self.reset_policy()
+
+    def reset_policy(self):
         self.pred_action_list = np.empty((0, self.action_dim))
         self.all_actions_history = []
 
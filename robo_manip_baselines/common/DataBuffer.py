@@ -0,0 +1,117 @@
+import numpy as np
+
+
+class DataBuffer(object):
+    """
+    Growable contiguous buffer of a data sequence whose elements have the same shape.
+
+    The buffer is preallocated and its capacity grows geometrically, so appending a single data only copies
+    it into the buffer, and the data sequence can be obtained as a view without per-element overhead.
+    Appending a data with a different shape raises ValueError, and appending a data with a dtype that cannot
+    be safely cast to the current dtype promotes the dtype of the buffer.
+
+    If batch_size is given, the buffer stores a batch of data sequences (e.g., one for each environment) as an
+    array of [batch_size, T, ...], and each appended data is a list of batch_size data. The data sequence of
+    each batch index is contiguous in memory.
+    """
+
+    growth_factor = 1.5
+
+    def __init__(self, shape, dtype, capacity=256, batch_size=None):
+        self.shape = tuple(shape)
+        self.batch_size = batch_size
+        self._batch_shape = () if batch_size is None else (batch_size,)
+        self._array = np.empty(
+            self._batch_shape + (max(capacity, 1),) + self.shape, dtype=dtype
+        )
+        self._len = 0
+
+    def append(self, data):
+        """Append a single data (or a list of batch_size data if batch_size is given)."""
+        if self.batch_size is not None:
+            self._append_batch(data)
+            return
+        if not isinstance(data, np.ndarray):
+            data = np.asarray(data)
+        if data.shape != self.shape:
+            raise ValueError(
+                f"[DataBuffer] Shape mismatch: expected {self.shape}, got {data.shape}"
+            )
+        if data.dtype != self._array.dtype:
+            self._promote_dtype(data.dtype)
+        if self._len == self.capacity:
+            self.reserve(int(self.growth_factor * self._len) + 1)
+        self._array[self._len] = data
+        self._len += 1
+
+    def _append_batch(self, data_list):
+        if len(data_list) != self.batch_size:
+            raise ValueError(
+                f"[DataBuffer] Batch size mismatch: expected {self.batch_size}, got {len(data_list)}"
+            )
+        data_list = [
+            data if isinstance(data, np.ndarray) else np.asarray(data)
+            for data in data_list
+        ]
+        for data in data_list:
+            if data.shape != self.shape:
+                raise ValueError(
+                    f"[DataBuffer] Shape mismatch: expected {self.shape}, got {data.shape}"
+                )
+            if data.dtype != self._array.dtype:
+                self._promote_dtype(data.dtype)
+        if self._len == self.capacity:
+            self.reserve(int(self.growth_factor * self._len) + 1)
+        # Copy each data directly to avoid stacking the batch into a temporary array
+        for batch_idx, data in enumerate(data_list):
+            self._array[batch_idx, self._len] = data
+        self._len += 1
+
+    def reserve(self, capacity):
+        """Grow the capacity of the buffer to at least the given number of elements."""
+        if capacity <= self.capacity:
+            return
+        new_array = np.empty(
+            self._batch_shape + (capacity,) + self.shape, dtype=self._array.dtype
+        )
+        if self.batch_size is None:
+            new_array[: self._len] = self.array
+        else:
+            new_array[:, : self._len] = self.array
+        self._array = new_array
+
+    def _promote_dtype(self, dtype):
+        if np.can_cast(dtype, self._array.dtype):
+            return
+        if np.dtype(dtype).hasobject:
+            raise ValueError("[DataBuffer] Object data cannot be stored.")
+        self._array = self._array.astype(np.promote_types(dtype, self._array.dtype))
+
+    @property
+    def array(self):
+        """View of the data sequence (or the batch of data sequences if batch_size is given)."""
+        if self.batch_size is None:
+            return self._array[: self._len]
+        return self._array[:, : self._len]
+
+    @property
+    def dtype(self):
+        return self._array.dtype
+
+    @property
+    def capacity(self):
+        return self._array.shape[len(self._batch_shape)]
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, idx):
+        return self.array[idx]
+
+    def __iter__(self):
+        return iter(self.array)
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.array
+        return self.array.astype(dtype)
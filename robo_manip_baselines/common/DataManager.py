@@ -1,12 +1,25 @@
 import os
+import copy
+import fnmatch
+import functools
 import warnings
 import numpy as np
 import cv2
 from enum import Enum
 from robo_manip_baselines import __version__
-
-# https://github.com/opencv/opencv/issues/21326
-os.environ["OPENCV_IO_ENABLE_OPENEXR"] = "1"
+from .ImageCodec import ImageCodec
+from .DataStreamWriter import DataStreamWriter
+from .LazyEpisodeData import LazyEpisodeData
+from .FrameCache import FrameCache
+from .DataBuffer import DataBuffer
+from .EpisodeCatalog import (
+    EpisodeCatalog,
+    read_key_schema,
+    SHARED_DATA_FILE_KEY,
+    SHARED_DATA_KEYS_KEY,
+    SHARED_DATA_LENGTHS_KEY,
+)
+from .EpisodeDir import EpisodeDirWriter, EpisodeDirReader, is_episode_dir
 
 
 class MotionStatus(Enum):
@@ -53,6 +66,21 @@ class DataKey(object):
         """Get the depth image key from the camera name."""
         return camera_name.lower() + "_depth_image"
 
+    @classmethod
+    def is_rgb_image_key(cls, key):
+        """Check whether the key is for rgb images."""
+        return key.endswith("rgb_image")
+
+    @classmethod
+    def is_depth_image_key(cls, key):
+        """Check whether the key is for depth images."""
+        return key.endswith("depth_image")
+
+    @classmethod
+    def is_image_key(cls, key):
+        """Check whether the key is for rgb or depth images."""
+        return cls.is_rgb_image_key(key) or cls.is_depth_image_key(key)
+
     @classmethod
     def replace_deprecated_key(cls, orig_key):
         """Replace a deprecated key with a new key for backward compatibility."""
@@ -84,6 +112,19 @@ class DataKey(object):
 class DataManager(object):
     """Data manager."""
 
+    # Keys of a data file that refers to the data shared with another data file (e.g., an augmented episode that
+    # refers to the nominal episode), which are defined in EpisodeCatalog so that the catalog reads the same keys
+    SHARED_DATA_FILE_KEY = SHARED_DATA_FILE_KEY
+    SHARED_DATA_KEYS_KEY = SHARED_DATA_KEYS_KEY
+    # Length of each shared data sequence (-1 for information such as general_info), which is used to check that
+    # the shared data file has not been modified
+    SHARED_DATA_LENGTHS_KEY = SHARED_DATA_LENGTHS_KEY
+    SHARED_DATA_REFERENCE_KEYS = (
+        SHARED_DATA_FILE_KEY,
+        SHARED_DATA_KEYS_KEY,
+        SHARED_DATA_LENGTHS_KEY,
+    )
+
     def __init__(self, env, demo_name=""):
         self.env = env
 
@@ -101,6 +142,23 @@ class DataManager(object):
 
         self.camera_info = {}
 
+        # Each element is a pair of a key pattern and a recording policy, where the last match wins
+        self.recording_policy_list = []
+        self.recording_info = {}
+
+        self.image_codec = ImageCodec()
+        self.stream_writer = None
+        self.frame_cache = None
+        self.catalog_dir = None
+
+        self.data_schema = {}
+        self._resolved_key_dict = {}
+        self._buffer_capacity_dict = {}
+        self._recording_policy_dict = {}
+        self._step_num_dict = {}
+
+        self._status_image_cache = {}
+
         self.reset()
 
     def reset(self):
@@ -108,97 +166,425 @@ class DataManager(object):
         self.status = MotionStatus(0)
 
         self.all_data_seq = {}
+        self._step_num_dict = {}
+
+        self.discard_stream()
+        self.clear_frame_cache()
+
+    def start_stream(self, stream_root_dir, compress_flag_dict=None):
+        """
+        Start streaming the data sequence to disk instead of keeping it in memory.
+
+        Data appended after this call is written to a temporary directory under stream_root_dir in chunks.
+        Because the streamed data cannot be compressed afterwards, the compress flag of each key must be given
+        here (e.g., {"front_rgb_image": "jpg"}).
+        """
+        self.discard_stream()
+        self.clear_frame_cache()
+        self.all_data_seq = {}
+        self._step_num_dict = {}
+        for key, compress_flag in (compress_flag_dict or {}).items():
+            self.update_codec_info(DataKey.replace_deprecated_key(key), compress_flag)
+        self.stream_writer = DataStreamWriter(
+            stream_root_dir,
+            compress_flag_dict={
+                DataKey.replace_deprecated_key(key): compress_flag
+                for key, compress_flag in (compress_flag_dict or {}).items()
+            },
+            compress_func=self.image_codec.encode,
+        )
+
+    def discard_stream(self):
+        """Discard the data sequence streamed to disk."""
+        if self.stream_writer is not None:
+            self.stream_writer.discard()
+            self.stream_writer = None
+
+    @property
+    def is_streaming(self):
+        """Whether the data sequence is streamed to disk."""
+        return self.stream_writer is not None
+
+    def resolve_key(self, key):
+        """Replace a deprecated key with a new key. Each key is resolved only once and then cached."""
+        resolved_key = self._resolved_key_dict.get(key)
+        if resolved_key is None:
+            resolved_key = DataKey.replace_deprecated_key(key)
+            self._resolved_key_dict[key] = resolved_key
+        return resolved_key
+
+    def set_recording_policies(self, recording_policy_list):
+        """
+        Set the recording policies (see RecordingPolicy).
+
+        recording_policy_list is a list of pairs of a key pattern and a policy, where the last policy whose
+        pattern matches the key is used. The record interval of each key is saved as "<key>_record_interval"
+        so that the time index of the data can be obtained when loading.
+        """
+        self.recording_policy_list = list(recording_policy_list)
+        self.recording_info = {}
+        self._recording_policy_dict = {}
+
+    def get_recording_policy(self, key):
+        """Get the recording policy of the key, or None if no policy is set. Each key is resolved only once."""
+        if key in self._recording_policy_dict:
+            return self._recording_policy_dict[key]
+        policy = None
+        for key_pattern, _policy in reversed(self.recording_policy_list):
+            if fnmatch.fnmatchcase(key, key_pattern):
+                policy = _policy
+                break
+        self._recording_policy_dict[key] = policy
+        if policy is not None and not policy.skip and policy.interval > 1:
+            self.recording_info[key + "_record_interval"] = policy.interval
+        return policy
+
+    def count_step(self, key, policy):
+        """Count the step of the key, and return whether the data of the key is recorded in this step."""
+        if policy.skip:
+            return False
+        step_num = self._step_num_dict.get(key, 0)
+        self._step_num_dict[key] = step_num + 1
+        return step_num % policy.interval == 0
+
+    def register_data_key(self, key, shape, dtype):
+        """
+        Register the shape and dtype of a single data of the key.
+
+        The data sequence of a registered key is recorded in a preallocated buffer. Keys that are not registered
+        are registered automatically with the shape and dtype of the first appended data.
+        """
+        key = self.resolve_key(key)
+        policy = self.get_recording_policy(key)
+        if policy is not None:
+            if policy.skip:
+                return
+            shape = policy.get_shape(key, shape)
+        self.data_schema[key] = (tuple(shape), np.dtype(dtype))
 
     def append_single_data(self, key, data):
         """Append a single data to the data sequence."""
-        key = DataKey.replace_deprecated_key(key)  # For backward compatibility
-        if key not in self.all_data_seq:
-            self.all_data_seq[key] = []
-        self.all_data_seq[key].append(data)
+        key = self.resolve_key(key)  # For backward compatibility
+        policy = self.get_recording_policy(key)
+        if policy is not None:
+            if not self.count_step(key, policy):
+                return
+            data = policy.apply(key, data)
+        if self.is_streaming:
+            self.stream_writer.append(key, data)
+            return
+        data_seq = self.all_data_seq.get(key)
+        if data_seq is None:
+            data_seq = self.make_data_seq(key, data)
+            self.all_data_seq[key] = data_seq
+        try:
+            data_seq.append(data)
+        except ValueError:
+            # If the shape of the data changes, fall back to a list
+            self.all_data_seq[key] = list(data_seq) + [data]
+
+    def make_data_seq(self, key, data):
+        """Make an empty data sequence to which the data of the key is appended."""
+        if key not in self.data_schema:
+            data = np.asanyarray(data)
+            if data.dtype == object:
+                return []
+            self.data_schema[key] = (data.shape, data.dtype)
+        shape, dtype = self.data_schema[key]
+        # The capacity is based on the length of the last saved data sequence
+        return DataBuffer(shape, dtype, self._buffer_capacity_dict.get(key, 256))
 
     def get_single_data(self, key, time_idx):
-        """Get a single data from the data sequence."""
-        key = DataKey.replace_deprecated_key(key)  # For backward compatibility
-        data = self.all_data_seq[key][time_idx]
-        if "rgb_image" in key:
-            if data.ndim == 1:
-                data = cv2.imdecode(data, flags=cv2.IMREAD_COLOR)
-        elif ("depth_image" in key) and ("fov" not in key):
-            if data.ndim == 1:
-                data = cv2.imdecode(data, flags=cv2.IMREAD_UNCHANGED)
+        """
+        Get a single data from the data sequence.
+
+        If the key is recorded at an interval, the latest data recorded at or before the time index is returned.
+        If the frame cache is enabled, decoded images are cached and the following images are prefetched.
+        """
+        key = self.resolve_key(key)  # For backward compatibility
+        time_idx //= self.get_record_interval(key, self.all_data_seq)
+        data_seq = self.all_data_seq[key]
+        data = data_seq[time_idx]
+        if DataKey.is_image_key(key) and data.ndim == 1:
+            decode_func = functools.partial(
+                self.image_codec.decode,
+                is_depth=DataKey.is_depth_image_key(key),
+                depth_scale=self.get_depth_scale(key, self.all_data_seq),
+            )
+            if self.frame_cache is None:
+                data = decode_func(data)
+            else:
+                data = self.frame_cache.get(key, time_idx, data_seq, decode_func)
         return data
 
     def get_data(self, key):
         """Get a data sequence."""
-        key = DataKey.replace_deprecated_key(key)  # For backward compatibility
+        key = self.resolve_key(key)  # For backward compatibility
         data_seq = self.all_data_seq[key]
-        if "rgb_image" in key:
-            if data_seq[0].ndim == 1:
-                data_seq = np.array(
-                    [cv2.imdecode(data, flags=cv2.IMREAD_COLOR) for data in data_seq]
-                )
-        elif ("depth_image" in key) and ("fov" not in key):
-            if data_seq[0].ndim == 1:
-                data_seq = np.array(
-                    [
-                        cv2.imdecode(data, flags=cv2.IMREAD_UNCHANGED)
-                        for data in data_seq
-                    ]
-                )
+        if isinstance(data_seq, DataBuffer):
+            data_seq = data_seq.array
+        if DataKey.is_image_key(key) and data_seq[0].ndim == 1:
+            data_seq = self.image_codec.decode_batch(
+                data_seq,
+                DataKey.is_depth_image_key(key),
+                self.get_depth_scale(key, self.all_data_seq),
+            )
         return data_seq
 
+    def get_synced_data(self, key, skip=1):
+        """
+        Get the data sequence at the time indices 0, skip, 2 * skip, ..., which is synchronized among the keys
+        recorded at different intervals. skip must be a multiple of the record interval of the key.
+        """
+        key = self.resolve_key(key)  # For backward compatibility
+        interval = self.get_record_interval(key, self.all_data_seq)
+        if skip % interval != 0:
+            raise ValueError(
+                f"[DataManager] Skip {skip} is not a multiple of the record interval {interval} of {key}."
+            )
+        return self.get_data(key)[:: skip // interval]
+
+    def get_record_interval(self, key, all_data_seq):
+        """Get the interval of the time steps at which the data of the key is recorded."""
+        interval_key = key + "_record_interval"
+        if interval_key in all_data_seq:
+            return int(np.asarray(all_data_seq[interval_key]))
+        # The interval of the data being recorded is added to the data sequence only when it is saved
+        if key in self._step_num_dict:
+            return self.recording_info.get(interval_key, 1)
+        return 1
+
+    def enable_frame_cache(self, max_bytes=512 * 1024**2, prefetch_num=8):
+        """
+        Enable the cache of decoded images for get_single_data.
+
+        This is useful for interactive tools that access the same images repeatedly.
+        """
+        if self.frame_cache is not None:
+            self.frame_cache.close()
+        self.frame_cache = FrameCache(max_bytes=max_bytes, prefetch_num=prefetch_num)
+
+    def clear_frame_cache(self):
+        """Clear the cache of decoded images."""
+        if self.frame_cache is not None:
+            self.frame_cache.clear()
+
+    def get_depth_scale(self, key, all_data_seq):
+        """Get the scale [m] of quantized depth images."""
+        scale_key = key + "_scale"
+        if scale_key in all_data_seq:
+            return float(np.asarray(all_data_seq[scale_key]))
+        return self.camera_info.get(scale_key)
+
+    def update_codec_info(self, key, compress_flag):
+        """Update the information needed to decompress the data."""
+        if compress_flag == "png":
+            self.camera_info[key + "_scale"] = self.image_codec.depth_scale
+
     def compress_data(self, key, compress_flag):
         """Compress data."""
-        key = DataKey.replace_deprecated_key(key)  # For backward compatibility
-        for time_idx, data in enumerate(self.all_data_seq[key]):
-            if compress_flag == "jpg":
-                self.all_data_seq[key][time_idx] = cv2.imencode(
-                    ".jpg", data, (cv2.IMWRITE_JPEG_QUALITY, 95)
-                )[1]
-            elif compress_flag == "exr":
-                self.all_data_seq[key][time_idx] = cv2.imencode(".exr", data)[1]
+        if self.is_streaming:
+            raise RuntimeError(
+                "[DataManager] Streamed data cannot be compressed afterwards. "
+                "Pass the compress flag to start_stream instead."
+            )
+        key = self.resolve_key(key)  # For backward compatibility
+        self.clear_frame_cache()
+        self.all_data_seq[key] = self.image_codec.encode_batch(
+            self.all_data_seq[key], compress_flag
+        )
+        self.update_codec_info(key, compress_flag)
 
     def save_data(self, filename):
         """Save data."""
+        if self.is_streaming:
+            self.stream_writer.finalize(
+                filename,
+                {
+                    **self.general_info,
+                    **self.world_info,
+                    **self.camera_info,
+                    **self.recording_info,
+                },
+            )
+            self.stream_writer = None
+            self.update_catalog(filename)
+            self.data_idx += 1
+            return
+
         # For backward compatibility
         for orig_key in self.all_data_seq.keys():
             new_key = DataKey.replace_deprecated_key(orig_key)
             if orig_key != new_key:
                 self.all_data_seq[new_key] = self.all_data_seq.pop(orig_key)
 
-        # If each element has a different shape, save it as an object array
+        # Convert the buffers to arrays
         for key in self.all_data_seq.keys():
-            if (
-                isinstance(self.all_data_seq[key], list)
-                and len(
-                    {
-                        data.shape if isinstance(data, np.ndarray) else None
-                        for data in self.all_data_seq[key]
-                    }
-                )
-                > 1
-            ):
-                self.all_data_seq[key] = np.array(self.all_data_seq[key], dtype=object)
+            if isinstance(self.all_data_seq[key], DataBuffer):
+                self._buffer_capacity_dict[key] = len(self.all_data_seq[key])
+                self.all_data_seq[key] = self.all_data_seq[key].array
+
+        for key in self.all_data_seq.keys():
+            self.all_data_seq[key] = self.to_saved_data_seq(self.all_data_seq[key])
 
         os.makedirs(os.path.dirname(filename), exist_ok=True)
         self.all_data_seq.update(self.general_info)
         self.all_data_seq.update(self.world_info)
         self.all_data_seq.update(self.camera_info)
-        np.savez(
-            filename,
-            **self.all_data_seq,
-        )
+        self.all_data_seq.update(self.recording_info)
+        self.write_data_file(filename, self.all_data_seq)
+        self.update_catalog(filename)
         self.data_idx += 1
 
-    def load_data(self, filename):
-        """Load data."""
+    def detach(self):
+        """
+        Hand over the recorded data sequence to a new data manager, which can be saved in another thread.
+
+        The returned data manager owns the data sequence (or the stream writer) and a copy of the information of
+        the episode, and this data manager starts with an empty data sequence and the next data index as if the
+        data were saved.
+        """
+        detached_data_manager = copy.copy(self)
+        detached_data_manager.general_info = dict(self.general_info)
+        detached_data_manager.world_info = dict(self.world_info)
+        detached_data_manager.camera_info = dict(self.camera_info)
+        detached_data_manager.recording_info = dict(self.recording_info)
+        detached_data_manager.frame_cache = None
+
         self.all_data_seq = {}
-        npz_data = np.load(filename, allow_pickle=True)
-        for orig_key in npz_data.keys():
+        self.stream_writer = None
+        self.data_idx += 1
+
+        return detached_data_manager
+
+    @staticmethod
+    def to_saved_data_seq(data_seq):
+        """Convert a data sequence to be saved. If each element has a different shape, it is converted to an object array."""
+        if (
+            isinstance(data_seq, list)
+            and len(
+                {
+                    data.shape if isinstance(data, np.ndarray) else None
+                    for data in data_seq
+                }
+            )
+            > 1
+        ):
+            return np.array(data_seq, dtype=object)
+        return data_seq
+
+    def update_catalog(self, filename):
+        """Add the saved episode to the episode catalog in catalog_dir if it is set."""
+        if self.catalog_dir is None:
+            return
+        catalog = EpisodeCatalog(self.catalog_dir)
+        catalog.add_episode(filename)
+        catalog.close()
+
+    @staticmethod
+    def write_data_file(filename, all_data_seq):
+        """
+        Write the data sequence to a file.
+
+        If the filename ends with .npz, a npz file is written. Otherwise, an episode directory is written,
+        which can be memory-mapped when loading.
+        Both are written to a temporary name first so that a partial file is never found as an episode file.
+        """
+        if filename.endswith(".npz"):
+            # Write via a file object because np.savez appends .npz to a filename that does not end with it
+            tmp_filename = filename + ".tmp"
+            with open(tmp_filename, "wb") as f:
+                np.savez(f, **all_data_seq)
+            os.replace(tmp_filename, filename)
+        else:
+            writer = EpisodeDirWriter(filename)
+            for key in all_data_seq.keys():
+                writer.write_data(key, all_data_seq[key])
+            writer.close()
+
+    def load_data(self, filename, keys=None):
+        """
+        Load data.
+
+        Each array is read from the file only when its key is accessed for the first time.
+        If keys is given, only these keys (and the information needed to decompress them) are available.
+        """
+        self.clear_frame_cache()
+        self.all_data_seq = self.open_data(filename, keys)
+        self._step_num_dict = {}
+
+    def open_data(self, filename, keys=None):
+        """
+        Open a data file as a lazy mapping from keys to data sequences.
+
+        If the data file refers to the data shared with another data file, the shared data is also available, and
+        an error is raised if the shared data file has been deleted, moved or modified (e.g., trimmed).
+        """
+        if keys is not None:
+            keys = {DataKey.replace_deprecated_key(key) for key in keys}
+            keys |= {key + "_scale" for key in keys if DataKey.is_image_key(key)}
+            keys |= {key + "_record_interval" for key in keys}
+        if is_episode_dir(filename):
+            source = EpisodeDirReader(filename)
+        else:
+            source = np.load(filename, allow_pickle=True)
+        key_dict = {}
+        shared_data = None
+        for orig_key in source.keys():
+            if orig_key in self.SHARED_DATA_REFERENCE_KEYS:
+                continue
             new_key = DataKey.replace_deprecated_key(
                 orig_key
             )  # For backward compatibility
-            self.all_data_seq[new_key] = np.copy(npz_data[orig_key])
+            if (keys is None) or (new_key in keys):
+                key_dict[new_key] = orig_key
+        if self.SHARED_DATA_FILE_KEY in source.keys():
+            shared_filename = os.path.normpath(
+                os.path.join(
+                    os.path.dirname(filename.rstrip("/")),
+                    str(source[self.SHARED_DATA_FILE_KEY]),
+                )
+            )
+            if not os.path.exists(shared_filename):
+                raise FileNotFoundError(
+                    f"[DataManager] The shared data file {shared_filename} referred to by {filename} does not exist. "
+                    "It must not be deleted or moved while other episodes refer to it."
+                )
+            if self.SHARED_DATA_LENGTHS_KEY in source.keys():
+                self.check_shared_data(
+                    filename,
+                    shared_filename,
+                    dict(
+                        zip(
+                            source[self.SHARED_DATA_KEYS_KEY].tolist(),
+                            source[self.SHARED_DATA_LENGTHS_KEY].tolist(),
+                        )
+                    ),
+                )
+            shared_keys = set(source[self.SHARED_DATA_KEYS_KEY].tolist())
+            if keys is not None:
+                shared_keys &= keys
+            shared_data = self.open_data(shared_filename, shared_keys)
+        return LazyEpisodeData(source, key_dict, shared_data)
+
+    @staticmethod
+    def check_shared_data(filename, shared_filename, shared_length_dict):
+        """Check that the shared data file has the shared data sequences of the lengths recorded when saved."""
+        key_schema = read_key_schema(shared_filename)
+        for key, length in shared_length_dict.items():
+            if key not in key_schema:
+                actual_length = None
+            elif length < 0:
+                continue
+            else:
+                shape = key_schema[key][0]
+                actual_length = shape[0] if len(shape) > 0 else None
+            if actual_length != length:
+                raise ValueError(
+                    f"[DataManager] The shared data file {shared_filename} referred to by {filename} has been "
+                    f'modified (length of "{key}": {actual_length}, expected: {length}). '
+                    "It must not be trimmed or replaced while other episodes refer to it."
+                )
 
     def go_to_next_status(self):
         """Go to the next status."""
@@ -207,7 +593,20 @@ class DataManager(object):
         self.status = MotionStatus(self.status.value + 1)
 
     def get_status_image(self):
-        """Get the image corresponding to the current status."""
+        """
+        Get the image corresponding to the current status.
+
+        The image is created once for each status and cached, so it must not be modified.
+        """
+        status_image = self._status_image_cache.get(self.status)
+        if status_image is None:
+            status_image = self.create_status_image()
+            status_image.flags.writeable = False
+            self._status_image_cache[self.status] = status_image
+        return status_image
+
+    def create_status_image(self):
+        """Create the image corresponding to the current status."""
         status_image = np.zeros((50, 320, 3), dtype=np.uint8)
         if self.status == MotionStatus.INITIAL:
             status_image[:, :] = np.array([200, 255, 200])
@@ -250,6 +649,10 @@ class DataManager(object):
             self.camera_info[depth_key + "_fovy"] = self.env.unwrapped.get_camera_fovy(
                 camera_name
             )
+            # The pose of the camera is available only if it is static
+            camera_pose = self.env.unwrapped.get_camera_pose(camera_name)
+            if camera_pose is not None:
+                self.camera_info[depth_key + "_pose"] = camera_pose
 
     @property
     def status(self):
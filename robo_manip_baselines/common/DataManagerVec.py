@@ -1,125 +1,305 @@
 import os
 import numpy as np
-import cv2
 from .DataManager import MotionStatus, DataKey, DataManager
+from .DataBuffer import DataBuffer
 
 
 class DataManagerVec(DataManager):
-    """Data manager with vectorization."""
+    """
+    Data manager with vectorization.
+
+    The data sequences of all environments are recorded in a batched buffer of [num_envs, T, ...] for each key.
+    The data sequences common to all environments (e.g., time) can be recorded only once as shared data, which
+    is saved only in one data file and referred to from the other data files.
+    Compressing and saving data are distributed over the thread pool of image_codec with one environment per
+    task, which runs in parallel because OpenCV and file I/O release the GIL.
+    """
 
     def reset(self):
         """Reset."""
         self.status = MotionStatus(0)
 
-        self.all_data_seq_list = [{} for env_idx in range(self.env.unwrapped.num_envs)]
+        # Each value is a batched buffer or a list of the data sequences of each environment
+        self.all_data_seq = {}
+        # Each value is a data sequence common to all environments
+        self.shared_data_seq = {}
+        self._step_num_dict = {}
+
+    def start_stream(self, stream_root_dir, compress_flag_dict=None):
+        """Start streaming the data sequence to disk instead of keeping it in memory."""
+        raise NotImplementedError(
+            "[DataManagerVec] Streaming the data sequence to disk is not supported."
+        )
 
     def append_single_data(self, key, data_list):
         """Append a single data to the data sequence."""
-        key = DataKey.replace_deprecated_key(key)  # For backward compatibility
-        for all_data_seq, data in zip(self.all_data_seq_list, data_list):
-            if key not in all_data_seq:
-                all_data_seq[key] = []
-            all_data_seq[key].append(data)
+        key = self.resolve_key(key)  # For backward compatibility
+        policy = self.get_recording_policy(key)
+        if policy is not None:
+            if not self.count_step(key, policy):
+                return
+            data_list = [policy.apply(key, data) for data in data_list]
+        data_seq = self.all_data_seq.get(key)
+        if data_seq is None:
+            data_seq = self.make_data_seq(key, data_list)
+            self.all_data_seq[key] = data_seq
+        if isinstance(data_seq, DataBuffer):
+            try:
+                data_seq.append(data_list)
+                return
+            except ValueError:
+                # If the shape of the data changes, fall back to lists
+                data_seq = [list(env_data_seq) for env_data_seq in data_seq.array]
+                self.all_data_seq[key] = data_seq
+        for env_data_seq, data in zip(data_seq, data_list):
+            env_data_seq.append(data)
+
+    def append_shared_single_data(self, key, data):
+        """Append a single data common to all environments to the shared data sequence."""
+        key = self.resolve_key(key)  # For backward compatibility
+        policy = self.get_recording_policy(key)
+        if policy is not None:
+            if not self.count_step(key, policy):
+                return
+            data = policy.apply(key, data)
+        data_seq = self.shared_data_seq.get(key)
+        if data_seq is None:
+            data_seq = DataManager.make_data_seq(self, key, data)
+            self.shared_data_seq[key] = data_seq
+        try:
+            data_seq.append(data)
+        except ValueError:
+            # If the shape of the data changes, fall back to a list
+            self.shared_data_seq[key] = list(data_seq) + [data]
+
+    def make_data_seq(self, key, data_list):
+        """Make an empty batched data sequence to which the data of the key is appended."""
+        if key not in self.data_schema:
+            data = np.asanyarray(data_list[0])
+            if data.dtype == object:
+                return [[] for data in data_list]
+            self.data_schema[key] = (data.shape, data.dtype)
+        shape, dtype = self.data_schema[key]
+        # The capacity is based on the length of the last saved data sequence
+        return DataBuffer(
+            shape,
+            dtype,
+            self._buffer_capacity_dict.get(key, 256),
+            batch_size=len(data_list),
+        )
+
+    def get_env_num(self):
+        """Get the number of environments of the data sequences."""
+        for data_seq in self.all_data_seq.values():
+            if isinstance(data_seq, DataBuffer):
+                return data_seq.batch_size
+            return len(data_seq)
+        return self.env.unwrapped.num_envs
+
+    def get_env_data_seq(self, key, env_idx):
+        """Get the data sequence of an environment as it is stored."""
+        if key in self.shared_data_seq:
+            return self.shared_data_seq[key][:]
+        data_seq = self.all_data_seq[key]
+        if isinstance(data_seq, DataBuffer):
+            return data_seq.array[env_idx]
+        return data_seq[env_idx]
+
+    def get_env_depth_scale(self, key, env_idx):
+        """Get the scale [m] of quantized depth images of an environment."""
+        scale_key = key + "_scale"
+        if scale_key in self.all_data_seq:
+            return float(np.asarray(self.get_env_data_seq(scale_key, env_idx)))
+        return self.camera_info.get(scale_key)
+
+    def get_env_record_interval(self, key, env_idx):
+        """Get the interval of the time steps at which the data of the key of an environment is recorded."""
+        interval_key = key + "_record_interval"
+        if interval_key in self.all_data_seq:
+            return int(np.asarray(self.get_env_data_seq(interval_key, env_idx)))
+        # The interval of the data being recorded is added to the data sequence only when it is saved
+        if key in self._step_num_dict:
+            return self.recording_info.get(interval_key, 1)
+        return 1
 
     def get_single_data(self, key, time_idx):
-        """Get a single data from the data sequence."""
-        key = DataKey.replace_deprecated_key(key)  # For backward compatibility
+        """
+        Get a single data from the data sequence.
+
+        If the key is recorded at an interval, the latest data recorded at or before the time index is returned.
+        """
+        key = self.resolve_key(key)  # For backward compatibility
+        if key in self.shared_data_seq:
+            time_idx //= self.get_env_record_interval(key, 0)
+            return [self.shared_data_seq[key][time_idx]] * self.get_env_num()
+        data_seq = self.all_data_seq[key]
+        if isinstance(data_seq, DataBuffer):
+            # The data being recorded has the same interval in all environments
+            time_idx //= self.get_env_record_interval(key, 0)
+            return list(data_seq.array[:, time_idx])
         data_list = []
-        for all_data_seq in self.all_data_seq_list:
-            data = all_data_seq[key][time_idx]
-            if "rgb_image" in key:
-                if data.ndim == 1:
-                    data = cv2.imdecode(data, flags=cv2.IMREAD_COLOR)
-            elif ("depth_image" in key) and ("fov" not in key):
-                if data.ndim == 1:
-                    data = cv2.imdecode(data, flags=cv2.IMREAD_UNCHANGED)
+        for env_idx, env_data_seq in enumerate(data_seq):
+            data = env_data_seq[time_idx // self.get_env_record_interval(key, env_idx)]
+            if DataKey.is_image_key(key) and data.ndim == 1:
+                data = self.image_codec.decode(
+                    data,
+                    DataKey.is_depth_image_key(key),
+                    self.get_env_depth_scale(key, env_idx),
+                )
             data_list.append(data)
         return data_list
 
     def get_data(self, key):
-        """Get a data sequence."""
-        key = DataKey.replace_deprecated_key(key)  # For backward compatibility
+        """
+        Get a data sequence.
+
+        If the data is recorded in a batched buffer or as shared data, its view of [num_envs, T, ...] is returned.
+        Otherwise, the list of the data sequences of each environment is returned.
+        """
+        key = self.resolve_key(key)  # For backward compatibility
+        if key in self.shared_data_seq:
+            data_seq = np.asarray(self.shared_data_seq[key])
+            return np.broadcast_to(data_seq, (self.get_env_num(),) + data_seq.shape)
+        data_seq = self.all_data_seq[key]
+        if isinstance(data_seq, DataBuffer):
+            return data_seq.array
         data_seq_list = []
-        for all_data_seq in self.all_data_seq_list:
-            data_seq = all_data_seq[key]
-            if "rgb_image" in key:
-                if data_seq[0].ndim == 1:
-                    data_seq = np.array(
-                        [
-                            cv2.imdecode(data, flags=cv2.IMREAD_COLOR)
-                            for data in data_seq
-                        ]
-                    )
-            elif ("depth_image" in key) and ("fov" not in key):
-                if data_seq[0].ndim == 1:
-                    data_seq = np.array(
-                        [
-                            cv2.imdecode(data, flags=cv2.IMREAD_UNCHANGED)
-                            for data in data_seq
-                        ]
-                    )
-            data_seq_list.append(data_seq)
+        for env_idx, env_data_seq in enumerate(data_seq):
+            if DataKey.is_image_key(key) and env_data_seq[0].ndim == 1:
+                env_data_seq = self.image_codec.decode_batch(
+                    env_data_seq,
+                    DataKey.is_depth_image_key(key),
+                    self.get_env_depth_scale(key, env_idx),
+                )
+            data_seq_list.append(env_data_seq)
         return data_seq_list
 
+    def get_synced_data(self, key, skip=1):
+        """
+        Get the data sequences at the time indices 0, skip, 2 * skip, ... (see DataManager.get_synced_data).
+        skip must be a multiple of the record interval of the key in each environment.
+        """
+        key = self.resolve_key(key)  # For backward compatibility
+        interval_list = [
+            self.get_env_record_interval(key, env_idx)
+            for env_idx in range(self.get_env_num())
+        ]
+        for interval in interval_list:
+            if skip % interval != 0:
+                raise ValueError(
+                    f"[DataManagerVec] Skip {skip} is not a multiple of the record interval {interval} of {key}."
+                )
+        data_seq = self.get_data(key)
+        if isinstance(data_seq, np.ndarray):
+            return data_seq[:, :: skip // interval_list[0]]
+        return [
+            env_data_seq[:: skip // interval]
+            for env_data_seq, interval in zip(data_seq, interval_list)
+        ]
+
     def compress_data(self, key, compress_flag, filter_list=None):
-        """Compress data."""
-        key = DataKey.replace_deprecated_key(key)  # For backward compatibility
-        for data_idx, all_data_seq in enumerate(self.all_data_seq_list):
-            if (filter_list is not None) and (not filter_list[data_idx]):
-                continue
-            for time_idx, data in enumerate(all_data_seq[key]):
-                if compress_flag == "jpg":
-                    all_data_seq[key][time_idx] = cv2.imencode(
-                        ".jpg", data, (cv2.IMWRITE_JPEG_QUALITY, 95)
-                    )[1]
-                elif compress_flag == "exr":
-                    all_data_seq[key][time_idx] = cv2.imencode(".exr", data)[1]
-
-    def save_data(self, filename_list):
-        """Save data."""
-        # For backward compatibility
-        for orig_key in self.all_data_seq_list[0].keys():
-            new_key = DataKey.replace_deprecated_key(orig_key)
-            if orig_key != new_key:
-                for all_data_seq in self.all_data_seq_list:
-                    all_data_seq[new_key] = all_data_seq.pop(orig_key)
-
-        # If each element has a different shape, save it as an object array
-        for all_data_seq in self.all_data_seq_list:
-            for key in all_data_seq.keys():
-                if (
-                    isinstance(all_data_seq[key], list)
-                    and len(
-                        {
-                            data.shape if isinstance(data, np.ndarray) else None
-                            for data in all_data_seq[key]
-                        }
-                    )
-                    > 1
-                ):
-                    all_data_seq[key] = np.array(all_data_seq[key], dtype=object)
-
-        for all_data_seq, filename in zip(self.all_data_seq_list, filename_list):
-            if filename is None:
-                continue
+        """Compress data. The environments whose filter_list value is False are skipped."""
+        key = self.resolve_key(key)  # For backward compatibility
+        env_idx_list = [
+            env_idx
+            for env_idx in range(self.get_env_num())
+            if (filter_list is None) or filter_list[env_idx]
+        ]
+        compressed_data_seq_list = self._map_envs(
+            "_compress_env_data",
+            [(key, env_idx, compress_flag) for env_idx in env_idx_list],
+        )
+        data_seq = [
+            self.get_env_data_seq(key, env_idx) for env_idx in range(self.get_env_num())
+        ]
+        for env_idx, compressed_data_seq in zip(env_idx_list, compressed_data_seq_list):
+            data_seq[env_idx] = compressed_data_seq
+        self.all_data_seq[key] = data_seq
+        self.update_codec_info(key, compress_flag)
+
+    def _compress_env_data(self, key, env_idx, compress_flag):
+        # Each task of the thread pool compresses the images of an environment serially
+        return [
+            self.image_codec.encode(image, compress_flag)
+            for image in self.get_env_data_seq(key, env_idx)
+        ]
+
+    def save_data(self, filename_list, shared_env_idx=None):
+        """
+        Save data. The environments whose filename is None are skipped.
+
+        The shared data and the information such as general_info are saved only in the data file of
+        shared_env_idx (or the first saved environment if it is skipped or None). The other data files refer to
+        this data file, and DataManager.load_data reads the shared data from it.
+        """
+        for key, data_seq in {**self.all_data_seq, **self.shared_data_seq}.items():
+            if isinstance(data_seq, DataBuffer):
+                self._buffer_capacity_dict[key] = len(data_seq)
+
+        env_idx_list = [
+            env_idx
+            for env_idx, filename in enumerate(filename_list)
+            if filename is not None
+        ]
+        if (shared_env_idx is None) or (filename_list[shared_env_idx] is None):
+            shared_env_idx = env_idx_list[0] if len(env_idx_list) > 0 else None
+        task_list = []
+        for env_idx in env_idx_list:
+            filename = filename_list[env_idx]
             os.makedirs(os.path.dirname(filename), exist_ok=True)
-            np.savez(
-                filename,
-                **all_data_seq,
-                **self.general_info,
-                **self.world_info,
-                **self.camera_info,
-            )
+            if env_idx == shared_env_idx:
+                shared_filename = None
+            else:
+                shared_filename = os.path.relpath(
+                    filename_list[shared_env_idx], os.path.dirname(filename)
+                )
+            task_list.append((env_idx, filename, shared_filename))
+        self._map_envs("_save_env_data", task_list)
+        for env_idx in env_idx_list:
+            self.update_catalog(filename_list[env_idx])
 
         self.data_idx += 1
 
-    def load_data(self, filename_list):
-        """Load data."""
-        self.all_data_seq_list = [{} for file_idx in range(len(filename_list))]
-        for all_data_seq, filename in zip(self.all_data_seq_list, filename_list):
-            npz_data = np.load(filename, allow_pickle=True)
-            for orig_key in npz_data.keys():
-                new_key = DataKey.replace_deprecated_key(
-                    orig_key
-                )  # For backward compatibility
-                all_data_seq[new_key] = np.copy(npz_data[orig_key])
+    def _save_env_data(self, env_idx, filename, shared_filename):
+        all_data_seq = {
+            key: self.to_saved_data_seq(self.get_env_data_seq(key, env_idx))
+            for key in self.all_data_seq.keys()
+        }
+        shared_data = {
+            **{
+                key: self.to_saved_data_seq(data_seq[:])
+                for key, data_seq in self.shared_data_seq.items()
+            },
+            **self.general_info,
+            **self.world_info,
+            **self.camera_info,
+            **self.recording_info,
+        }
+        if shared_filename is None:
+            all_data_seq.update(shared_data)
+        else:
+            all_data_seq[self.SHARED_DATA_FILE_KEY] = shared_filename
+            all_data_seq[self.SHARED_DATA_KEYS_KEY] = np.array(list(shared_data.keys()))
+            all_data_seq[self.SHARED_DATA_LENGTHS_KEY] = np.array(
+                [
+                    len(value) if np.ndim(value) > 0 else -1
+                    for value in shared_data.values()
+                ]
+            )
+        self.write_data_file(filename, all_data_seq)
+
+    def _map_envs(self, method_name, args_list):
+        """Call a method with each arguments on the thread pool of image_codec and return the list of the results."""
+        method = getattr(self, method_name)
+        return self.image_codec.map(lambda args: method(*args), args_list)
+
+    def load_data(self, filename_list, keys=None):
+        """Load data. Unlike DataManager, all the data of the keys is read."""
+        all_data_seq_list = [
+            self.open_data(filename, keys) for filename in filename_list
+        ]
+        self.all_data_seq = {
+            key: [all_data_seq[key] for all_data_seq in all_data_seq_list]
+            for key in all_data_seq_list[0].keys()
+        }
+        self._step_num_dict = {}
@@ -0,0 +1,205 @@
+import os
+import shutil
+import tempfile
+import threading
+import queue
+import zipfile
+import numpy as np
+from .EpisodeDir import EpisodeDirWriter
+
+
+class DataStreamWriter(object):
+    """
+    Data writer that streams data sequences to disk in chunks.
+
+    Appended data are handed to a background thread, which optionally compresses them and writes them to a
+    temporary directory as one npy file per chunk and key. Finalizing the stream assembles the chunks into a
+    npz file or an episode directory that is compatible with the one written by DataManager.save_data.
+    """
+
+    def __init__(
+        self,
+        stream_root_dir,
+        compress_flag_dict=None,
+        compress_func=None,
+        chunk_size=64,
+        max_queue_size=1024,
+    ):
+        os.makedirs(stream_root_dir, exist_ok=True)
+        self.stream_dir = tempfile.mkdtemp(prefix="stream_", dir=stream_root_dir)
+
+        self.compress_flag_dict = compress_flag_dict or {}
+        self.compress_func = compress_func
+        self.chunk_size = chunk_size
+
+        self.chunk_buffers = {}
+        self.chunk_nums = {}
+        self.seq_lens = {}
+
+        self._error = None
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def append(self, key, data):
+        """Append a single data to the data sequence."""
+        self._raise_error_if_any()
+        self._queue.put((key, data))
+
+    def finalize(self, filename, extra_data=None):
+        """
+        Write the streamed data sequences to a file and remove the temporary directory.
+
+        If the filename ends with .npz, a npz file is written. Otherwise, an episode directory is written.
+        """
+        self._stop()
+        self._raise_error_if_any()
+        for key in self.chunk_buffers.keys():
+            self._flush(key)
+
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        if filename.endswith(".npz"):
+            self._write_npz(filename, extra_data or {})
+        else:
+            self._write_episode_dir(filename, extra_data or {})
+
+        shutil.rmtree(self.stream_dir, ignore_errors=True)
+
+    def discard(self):
+        """Discard the streamed data sequences."""
+        self._stop()
+        shutil.rmtree(self.stream_dir, ignore_errors=True)
+
+    def __len__(self):
+        """Get the number of keys."""
+        return len(self.seq_lens)
+
+    def _stop(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _raise_error_if_any(self):
+        if self._error is not None:
+            raise RuntimeError(
+                f"[DataStreamWriter] Failed to write streamed data: {self._error}"
+            ) from self._error
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self._error is not None:
+                continue
+            key, data = item
+            try:
+                self._append(key, data)
+            except Exception as e:
+                self._error = e
+
+    def _append(self, key, data):
+        if key not in self.chunk_buffers:
+            os.makedirs(os.path.join(self.stream_dir, key), exist_ok=True)
+            self.chunk_buffers[key] = []
+            self.chunk_nums[key] = 0
+            self.seq_lens[key] = 0
+        compress_flag = self.compress_flag_dict.get(key)
+        if compress_flag is not None:
+            data = self.compress_func(data, compress_flag)
+        self.chunk_buffers[key].append(np.asanyarray(data))
+        self.seq_lens[key] += 1
+        if len(self.chunk_buffers[key]) >= self.chunk_size:
+            self._flush(key)
+
+    def _flush(self, key):
+        chunk = self.chunk_buffers[key]
+        if len(chunk) == 0:
+            return
+        if (
+            chunk[0].dtype != object
+            and len({(data.shape, data.dtype) for data in chunk}) == 1
+        ):
+            chunk_array = np.stack(chunk)
+        else:
+            chunk_array = np.empty(len(chunk), dtype=object)
+            for data_idx, data in enumerate(chunk):
+                chunk_array[data_idx] = data
+        np.save(self._get_chunk_path(key, self.chunk_nums[key]), chunk_array)
+        self.chunk_nums[key] += 1
+        self.chunk_buffers[key] = []
+
+    def _get_chunk_path(self, key, chunk_idx):
+        return os.path.join(self.stream_dir, key, f"{chunk_idx:0>6}.npy")
+
+    def _write_npz(self, filename, extra_data):
+        tmp_filename = filename + ".tmp"
+        with zipfile.ZipFile(
+            tmp_filename, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True
+        ) as zip_file:
+            for key in self.chunk_nums.keys():
+                chunk_list = self._load_chunk_list(key)
+                with zip_file.open(key + ".npy", mode="w", force_zip64=True) as f:
+                    if self._has_same_frame_shape(chunk_list):
+                        self._write_chunks(f, key, chunk_list)
+                    else:
+                        np.lib.format.write_array(f, self._merge_chunks(chunk_list))
+            for key, value in extra_data.items():
+                with zip_file.open(key + ".npy", mode="w", force_zip64=True) as f:
+                    np.lib.format.write_array(f, np.asanyarray(value))
+        os.replace(tmp_filename, filename)
+
+    def _write_episode_dir(self, filename, extra_data):
+        writer = EpisodeDirWriter(filename)
+        for key in self.chunk_nums.keys():
+            chunk_list = self._load_chunk_list(key)
+            if self._has_same_frame_shape(chunk_list):
+                with writer.open_array_file(key) as f:
+                    self._write_chunks(f, key, chunk_list)
+            else:
+                writer.write_data(key, self._merge_chunks(chunk_list))
+        for key, value in extra_data.items():
+            writer.write_data(key, value)
+        writer.close()
+
+    def _load_chunk_list(self, key):
+        return [
+            self._load_chunk(self._get_chunk_path(key, chunk_idx))
+            for chunk_idx in range(self.chunk_nums[key])
+        ]
+
+    @staticmethod
+    def _has_same_frame_shape(chunk_list):
+        return all(chunk.dtype != object for chunk in chunk_list) and (
+            len({(chunk.shape[1:], chunk.dtype) for chunk in chunk_list}) == 1
+        )
+
+    def _write_chunks(self, f, key, chunk_list):
+        # Copy the chunks one by one without loading them entirely
+        header = {
+            "descr": np.lib.format.dtype_to_descr(chunk_list[0].dtype),
+            "fortran_order": False,
+            "shape": (self.seq_lens[key],) + chunk_list[0].shape[1:],
+        }
+        np.lib.format.write_array_header_1_0(f, header)
+        for chunk in chunk_list:
+            f.write(np.ascontiguousarray(chunk).tobytes())
+
+    @staticmethod
+    def _merge_chunks(chunk_list):
+        # If each element has a different shape, merge them into an object array
+        data_list = [data for chunk in chunk_list for data in chunk]
+        if len({data.shape for data in data_list}) == 1:
+            return np.array(data_list)
+        data_seq = np.empty(len(data_list), dtype=object)
+        for data_idx, data in enumerate(data_list):
+            data_seq[data_idx] = data
+        return data_seq
+
+    @staticmethod
+    def _load_chunk(chunk_path):
+        try:
+            return np.load(chunk_path, mmap_mode="r")
+        except ValueError:
+            # Object arrays cannot be memory-mapped
+            return np.load(chunk_path, allow_pickle=True)
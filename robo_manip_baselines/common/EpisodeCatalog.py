@@ -0,0 +1,423 @@
+import os
+import glob
+import json
+import hashlib
+import sqlite3
+import zipfile
+import numpy as np
+from .EpisodeDir import EpisodeDirReader, is_episode_dir
+
+# Keys of a data file that refers to the data shared with another data file (see DataManager)
+SHARED_DATA_FILE_KEY = "shared_data_file"
+SHARED_DATA_KEYS_KEY = "shared_data_keys"
+SHARED_DATA_LENGTHS_KEY = "shared_data_lengths"
+
+
+class EpisodeCatalog(object):
+    """
+    Catalog of the episodes in a data directory.
+
+    The catalog is a SQLite file in the data directory that records the metadata (env, demo, world_idx, length,
+    general_info etc.), the shape, dtype and byte size of each key, and the content hash of each episode, so
+    that episodes can be listed and filtered without opening the episode files. Paths are stored relative to
+    the data directory.
+
+    DataManager.save_data adds an episode to the catalog if DataManager.catalog_dir is set. The catalog of
+    existing data can be created or brought up to date with sync, which find_episode_files calls before the first
+    query of each data directory in a process so that episodes added, modified or deleted without DataManager are
+    reflected.
+    """
+
+    catalog_filename = "episode_catalog.sqlite"
+    episode_patterns = ("**/*.npz", "**/*.rmb")
+
+    def __init__(self, data_dir, in_memory=False):
+        self.data_dir = data_dir
+        if in_memory:
+            self.conn = sqlite3.connect(":memory:")
+        else:
+            os.makedirs(data_dir, exist_ok=True)
+            self.conn = sqlite3.connect(self.get_catalog_path(data_dir), timeout=30.0)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS episodes (
+                path TEXT PRIMARY KEY,
+                env TEXT,
+                demo TEXT,
+                world_idx INTEGER,
+                length INTEGER,
+                num_bytes INTEGER,
+                mtime REAL,
+                content_hash TEXT,
+                info TEXT
+            );
+            CREATE TABLE IF NOT EXISTS episode_keys (
+                path TEXT,
+                key TEXT,
+                shape TEXT,
+                dtype TEXT,
+                num_bytes INTEGER,
+                PRIMARY KEY (path, key)
+            );
+            """
+        )
+        self.conn.commit()
+
+    @classmethod
+    def get_catalog_path(cls, data_dir):
+        """Get the path of the catalog file in the data directory."""
+        return os.path.join(data_dir, cls.catalog_filename)
+
+    @classmethod
+    def exists(cls, data_dir):
+        """Check whether the data directory has a catalog."""
+        return os.path.isfile(cls.get_catalog_path(data_dir))
+
+    def add_episode(self, filename, compute_hash=True):
+        """
+        Add an episode to the catalog or update it.
+
+        If the episode refers to the data shared with another episode, the shared keys are recorded as well.
+        """
+        key_schema = read_key_schema(filename)
+        if SHARED_DATA_FILE_KEY in key_schema:
+            shared_filename = os.path.join(
+                os.path.dirname(filename.rstrip("/")),
+                key_schema.pop(SHARED_DATA_FILE_KEY)[3],
+            )
+            key_schema.pop(SHARED_DATA_KEYS_KEY, None)
+            key_schema.pop(SHARED_DATA_LENGTHS_KEY, None)
+            key_schema = {**read_key_schema(shared_filename), **key_schema}
+        info = {
+            key: value
+            for key, (shape, dtype, num_bytes, value) in key_schema.items()
+            if value is not None
+        }
+        seq_len_list = [
+            shape[0]
+            for shape, dtype, num_bytes, value in key_schema.values()
+            if len(shape) > 0
+        ]
+        if "time" in key_schema:
+            length = key_schema["time"][0][0]
+        else:
+            length = max(seq_len_list, default=0)
+
+        path = self._get_relative_path(filename)
+        with self.conn:
+            self.conn.execute("DELETE FROM episode_keys WHERE path = ?", (path,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    path,
+                    info.get("env"),
+                    info.get("demo"),
+                    info.get("world_idx"),
+                    length,
+                    get_file_size(filename),
+                    get_file_mtime(filename),
+                    compute_content_hash(filename) if compute_hash else None,
+                    json.dumps(info),
+                ),
+            )
+            self.conn.executemany(
+                "INSERT INTO episode_keys VALUES (?, ?, ?, ?, ?)",
+                [
+                    (path, key, json.dumps(list(shape)), dtype, num_bytes)
+                    for key, (shape, dtype, num_bytes, value) in key_schema.items()
+                ],
+            )
+
+    def remove_episode(self, filename):
+        """Remove an episode from the catalog."""
+        path = self._get_relative_path(filename)
+        with self.conn:
+            self.conn.execute("DELETE FROM episodes WHERE path = ?", (path,))
+            self.conn.execute("DELETE FROM episode_keys WHERE path = ?", (path,))
+
+    def sync(self, compute_hash=True):
+        """
+        Bring the catalog up to date with the episode files in the data directory.
+
+        Only the episodes that are new or whose modification time or byte size has changed since they were added
+        are read, and the episodes whose files no longer exist are removed.
+        Return the number of added, updated or removed episodes.
+        """
+        filename_list = glob_episode_files(self.data_dir)
+        cataloged_stats = {
+            path: (mtime, num_bytes)
+            for path, mtime, num_bytes in self.conn.execute(
+                "SELECT path, mtime, num_bytes FROM episodes"
+            ).fetchall()
+        }
+        updated_num = 0
+        for filename in filename_list:
+            path = self._get_relative_path(filename)
+            if cataloged_stats.pop(path, None) != (
+                get_file_mtime(filename),
+                get_file_size(filename),
+            ):
+                self.add_episode(filename, compute_hash)
+                updated_num += 1
+        for path in cataloged_stats.keys():
+            self.remove_episode(os.path.join(self.data_dir, path))
+            updated_num += 1
+        return updated_num
+
+    def query(
+        self,
+        env=None,
+        world_idx=None,
+        demo=None,
+        keywords=None,
+        min_length=None,
+        max_length=None,
+    ):
+        """
+        Get the sorted list of episode files that satisfy all the given conditions.
+
+        The world_idx can be an integer or a list of integers. An episode matches keywords if its path contains
+        any of them.
+        """
+        conditions = []
+        params = []
+        if env is not None:
+            conditions.append("env = ?")
+            params.append(env)
+        if world_idx is not None:
+            world_idx_list = np.atleast_1d(world_idx).tolist()
+            conditions.append(
+                "world_idx IN ({})".format(", ".join("?" * len(world_idx_list)))
+            )
+            params.extend(world_idx_list)
+        if demo is not None:
+            conditions.append("demo = ?")
+            params.append(demo)
+        if keywords is not None:
+            if isinstance(keywords, str):
+                keywords = [keywords]
+            conditions.append(
+                "({})".format(" OR ".join(["instr(path, ?) > 0"] * len(keywords)))
+            )
+            params.extend(keywords)
+        if min_length is not None:
+            conditions.append("length >= ?")
+            params.append(min_length)
+        if max_length is not None:
+            conditions.append("length <= ?")
+            params.append(max_length)
+
+        sql = "SELECT path FROM episodes"
+        if len(conditions) > 0:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY path"
+        return [
+            os.path.join(self.data_dir, path)
+            for (path,) in self.conn.execute(sql, params).fetchall()
+        ]
+
+    def get_episode_info(self, filename):
+        """Get the metadata of an episode."""
+        row = self.conn.execute(
+            "SELECT env, demo, world_idx, length, num_bytes, content_hash, info "
+            "FROM episodes WHERE path = ?",
+            (self._get_relative_path(filename),),
+        ).fetchone()
+        if row is None:
+            raise KeyError(filename)
+        return {
+            "env": row[0],
+            "demo": row[1],
+            "world_idx": row[2],
+            "length": row[3],
+            "num_bytes": row[4],
+            "content_hash": row[5],
+            "info": json.loads(row[6]),
+        }
+
+    def get_key_schema(self, filename):
+        """Get the dictionary from each key of an episode to its shape, dtype and byte size."""
+        return {
+            key: {
+                "shape": tuple(json.loads(shape)),
+                "dtype": dtype,
+                "num_bytes": num_bytes,
+            }
+            for key, shape, dtype, num_bytes in self.conn.execute(
+                "SELECT key, shape, dtype, num_bytes FROM episode_keys WHERE path = ?",
+                (self._get_relative_path(filename),),
+            ).fetchall()
+        }
+
+    def close(self):
+        """Close the catalog."""
+        self.conn.close()
+
+    def _get_relative_path(self, filename):
+        return os.path.relpath(
+            os.path.abspath(filename.rstrip("/")), os.path.abspath(self.data_dir)
+        )
+
+
+def glob_episode_files(data_dir):
+    """Get the sorted list of episode files (npz files and episode directories) under the data directory."""
+    filename_list = []
+    for pattern in EpisodeCatalog.episode_patterns:
+        filename_list += glob.glob(os.path.join(data_dir, pattern), recursive=True)
+    return sorted(filename_list)
+
+
+# Data directories whose catalog has been synchronized by find_episode_files in this process
+_synced_data_dir_set = set()
+
+
+def find_episode_files(data_dir, sync=None, **query_kwargs):
+    """
+    Get the sorted list of episode files under the data directory that satisfy the conditions.
+
+    The catalog of the data directory is used if it exists, after it is brought up to date with the episode files
+    in the directory (without computing the content hash of new or modified episodes). Because this requires
+    listing the whole directory tree, the catalog is synchronized only in the first call for each data directory
+    in a process by default; if sync is True or False, the catalog is always or never synchronized, respectively.
+    Otherwise (or if the catalog cannot be written), the episode files are searched with glob, and are opened to
+    check the conditions only if conditions other than keywords are given.
+    See EpisodeCatalog.query for the conditions.
+    """
+    if EpisodeCatalog.exists(data_dir):
+        abs_data_dir = os.path.abspath(data_dir)
+        if sync is None:
+            sync = abs_data_dir not in _synced_data_dir_set
+        try:
+            catalog = EpisodeCatalog(data_dir)
+            try:
+                if sync:
+                    catalog.sync(compute_hash=False)
+                    _synced_data_dir_set.add(abs_data_dir)
+                return catalog.query(**query_kwargs)
+            finally:
+                catalog.close()
+        except sqlite3.OperationalError:
+            # The catalog is not writable (e.g., read-only directory), so search the episode files with glob
+            pass
+
+    filename_list = glob_episode_files(data_dir)
+    keywords = query_kwargs.pop("keywords", None)
+    if keywords is not None:
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        filename_list = [
+            filename
+            for filename in filename_list
+            if any(keyword in filename for keyword in keywords)
+        ]
+    if all(value is None for value in query_kwargs.values()):
+        return filename_list
+
+    catalog = EpisodeCatalog(data_dir, in_memory=True)
+    for filename in filename_list:
+        catalog.add_episode(filename, compute_hash=False)
+    filename_list = catalog.query(**query_kwargs)
+    catalog.close()
+    return filename_list
+
+
+def find_shared_data_files(data_dir):
+    """Get the absolute paths of the episode files under the data directory whose data is shared with other episodes."""
+    shared_filename_set = set()
+    for filename in glob_episode_files(data_dir):
+        key_schema = read_key_schema(filename)
+        if SHARED_DATA_FILE_KEY in key_schema:
+            shared_filename_set.add(
+                os.path.abspath(
+                    os.path.join(
+                        os.path.dirname(filename.rstrip("/")),
+                        key_schema[SHARED_DATA_FILE_KEY][3],
+                    )
+                )
+            )
+    return shared_filename_set
+
+
+def read_key_schema(filename):
+    """
+    Read the shape, dtype and byte size of each key of an episode without reading the data sequences.
+
+    Return the dictionary from each key to the tuple of (shape, dtype, byte size, value), where value is the
+    scalar value for information such as general_info and None for data sequences.
+    """
+    key_schema = {}
+    if is_episode_dir(filename):
+        reader = EpisodeDirReader(filename)
+        for key in reader.keys():
+            if key in reader.header["info"]:
+                value = reader.header["info"][key]
+                key_schema[key] = ((), np.asarray(value).dtype.str, 0, value)
+            elif key in reader.header["arrays"]:
+                array_path = os.path.join(
+                    filename, reader.header["arrays"][key]["file"]
+                )
+                array = np.load(array_path, mmap_mode="r")
+                key_schema[key] = (
+                    array.shape,
+                    array.dtype.str,
+                    os.path.getsize(array_path),
+                    None,
+                )
+            else:
+                frames_info = reader.header["frames"][key]
+                offsets = np.load(os.path.join(filename, frames_info["offsets_file"]))
+                key_schema[key] = ((len(offsets) - 1,), "|O", int(offsets[-1]), None)
+    else:
+        with zipfile.ZipFile(filename) as zip_file:
+            for zip_info in zip_file.infolist():
+                key = os.path.splitext(zip_info.filename)[0]
+                with zip_file.open(zip_info) as f:
+                    if np.lib.format.read_magic(f) == (1, 0):
+                        shape, fortran_order, dtype = (
+                            np.lib.format.read_array_header_1_0(f)
+                        )
+                    else:
+                        shape, fortran_order, dtype = (
+                            np.lib.format.read_array_header_2_0(f)
+                        )
+                    if shape == () and not dtype.hasobject:
+                        value = np.frombuffer(f.read(dtype.itemsize), dtype=dtype)[
+                            0
+                        ].item()
+                    else:
+                        value = None
+                key_schema[key] = (shape, dtype.str, zip_info.file_size, value)
+    return key_schema
+
+
+def get_file_size(filename):
+    """Get the byte size of an episode file or directory."""
+    if os.path.isdir(filename):
+        return sum(
+            os.path.getsize(os.path.join(filename, name))
+            for name in os.listdir(filename)
+        )
+    return os.path.getsize(filename)
+
+
+def get_file_mtime(filename):
+    """Get the modification time of an episode file or directory."""
+    if os.path.isdir(filename):
+        return os.path.getmtime(os.path.join(filename, "header.json"))
+    return os.path.getmtime(filename)
+
+
+def compute_content_hash(filename):
+    """Compute the SHA-256 hash of the contents of an episode file or directory."""
+    hash_obj = hashlib.sha256()
+    if os.path.isdir(filename):
+        path_list = [
+            os.path.join(filename, name) for name in sorted(os.listdir(filename))
+        ]
+    else:
+        path_list = [filename]
+    for path in path_list:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024**2), b""):
+                hash_obj.update(block)
+    return hash_obj.hexdigest()
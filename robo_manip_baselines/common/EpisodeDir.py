@@ -0,0 +1,159 @@
+import os
+import shutil
+import json
+import numpy as np
+
+
+class EpisodeDirWriter(object):
+    """
+    Writer of the episode directory format.
+
+    The episode directory format stores an episode as a directory instead of a single npz file so that it can be
+    memory-mapped and read without pickle:
+    - header.json: Scalar data such as general_info, world_info and camera_info, and the list of keys.
+    - <key>.npy: Data sequence whose elements have the same shape.
+    - <key>.bin and <key>_offsets.npy: Data sequence whose elements have different lengths (e.g., compressed
+      images), stored as a packed byte blob and the offsets of each element in it.
+    """
+
+    format_name = "RoboManipBaselines-EpisodeDir"
+    format_version = 1
+
+    def __init__(self, dirname):
+        self.dirname = dirname
+        self.tmp_dirname = dirname.rstrip("/") + ".tmp"
+        if os.path.exists(self.tmp_dirname):
+            shutil.rmtree(self.tmp_dirname)
+        os.makedirs(self.tmp_dirname)
+
+        self.header = {
+            "format": self.format_name,
+            "format_version": self.format_version,
+            "info": {},
+            "arrays": {},
+            "frames": {},
+        }
+
+    def write_data(self, key, data):
+        """Write a data sequence or a scalar data."""
+        if isinstance(data, list):
+            if len({np.shape(elem) for elem in data}) > 1:
+                self.write_frames(key, data)
+                return
+            data = np.array(data)
+
+        data = np.asanyarray(data)
+        if data.dtype == object:
+            self.write_frames(key, list(data))
+        elif data.ndim == 0:
+            self.header["info"][key] = data.tolist()
+        else:
+            self.write_array(key, data)
+
+    def write_array(self, key, array):
+        """Write a data sequence whose elements have the same shape."""
+        with self.open_array_file(key) as f:
+            np.lib.format.write_array(f, np.ascontiguousarray(array))
+
+    def open_array_file(self, key):
+        """Open the npy file of a data sequence to write its header and contents directly."""
+        filename = key + ".npy"
+        self.header["arrays"][key] = {"file": filename}
+        return open(os.path.join(self.tmp_dirname, filename), "wb")
+
+    def write_frames(self, key, frame_list):
+        """Write a data sequence whose elements are one-dimensional arrays with different lengths."""
+        frame_list = [np.asarray(frame) for frame in frame_list]
+        if any(frame.ndim != 1 for frame in frame_list) or (
+            len({frame.dtype for frame in frame_list}) > 1
+        ):
+            raise ValueError(
+                f"[EpisodeDirWriter] Elements of {key} must be one-dimensional arrays with the same dtype."
+            )
+        offsets = np.zeros(len(frame_list) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([frame.nbytes for frame in frame_list])
+        data_filename = key + ".bin"
+        offsets_filename = key + "_offsets.npy"
+        with open(os.path.join(self.tmp_dirname, data_filename), "wb") as f:
+            for frame in frame_list:
+                f.write(np.ascontiguousarray(frame).tobytes())
+        np.save(os.path.join(self.tmp_dirname, offsets_filename), offsets)
+        self.header["frames"][key] = {
+            "data_file": data_filename,
+            "offsets_file": offsets_filename,
+            "dtype": np.lib.format.dtype_to_descr(
+                frame_list[0].dtype if len(frame_list) > 0 else np.dtype(np.uint8)
+            ),
+        }
+
+    def close(self):
+        """Write the header and move the directory to its final location."""
+        with open(os.path.join(self.tmp_dirname, "header.json"), "w") as f:
+            json.dump(self.header, f, indent=2)
+        if os.path.exists(self.dirname):
+            shutil.rmtree(self.dirname)
+        os.replace(self.tmp_dirname, self.dirname)
+
+
+class EpisodeDirReader(object):
+    """
+    Reader of the episode directory format.
+
+    Fixed-shape data sequences are memory-mapped, and each element of variable-length data sequences is a view
+    of the memory-mapped byte blob, so no data is copied until it is used.
+    """
+
+    def __init__(self, dirname):
+        self.dirname = dirname
+        with open(os.path.join(dirname, "header.json"), "r") as f:
+            self.header = json.load(f)
+        if self.header.get("format") != EpisodeDirWriter.format_name:
+            raise ValueError(
+                f"[EpisodeDirReader] Not an episode directory: {self.dirname}"
+            )
+
+    def keys(self):
+        """Get the keys."""
+        return (
+            list(self.header["arrays"].keys())
+            + list(self.header["frames"].keys())
+            + list(self.header["info"].keys())
+        )
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __getitem__(self, key):
+        if key in self.header["arrays"]:
+            return np.load(
+                os.path.join(self.dirname, self.header["arrays"][key]["file"]),
+                mmap_mode="r",
+            )
+        elif key in self.header["frames"]:
+            frames_info = self.header["frames"][key]
+            offsets = np.load(os.path.join(self.dirname, frames_info["offsets_file"]))
+            data_filename = os.path.join(self.dirname, frames_info["data_file"])
+            dtype = np.lib.format.descr_to_dtype(frames_info["dtype"])
+            if offsets[-1] > 0:
+                blob = np.memmap(data_filename, dtype=np.uint8, mode="r")
+            else:
+                blob = np.zeros(0, dtype=np.uint8)
+            frame_seq = np.empty(len(offsets) - 1, dtype=object)
+            for frame_idx in range(len(frame_seq)):
+                frame_seq[frame_idx] = blob[
+                    offsets[frame_idx] : offsets[frame_idx + 1]
+                ].view(dtype)
+            return frame_seq
+        elif key in self.header["info"]:
+            return np.array(self.header["info"][key])
+        else:
+            raise KeyError(key)
+
+    def close(self):
+        """Close the reader. Memory-mapped arrays remain valid while they are referenced."""
+        pass
+
+
+def is_episode_dir(filename):
+    """Check whether the path is an episode directory."""
+    return os.path.isfile(os.path.join(filename, "header.json"))
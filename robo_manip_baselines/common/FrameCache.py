@@ -0,0 +1,152 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FrameCache(object):
+    """
+    LRU cache of decoded frames with read-ahead prefetch.
+
+    Frames are cached per key and time index, and the least recently used frames are evicted when the total
+    size of the cached frames exceeds max_bytes. Each time a frame is requested, the next prefetch_num frames
+    in the direction of the last move (e.g., every 10th frame backwards) are decoded on a background thread,
+    so that scrubbing through compressed images does not wait for decoding.
+
+    Cached frames are shared between calls and are therefore read-only.
+    """
+
+    def __init__(self, max_bytes=512 * 1024**2, prefetch_num=8):
+        self.max_bytes = max_bytes
+        self.prefetch_num = prefetch_num
+
+        self.hit_num = 0
+        self.miss_num = 0
+
+        self._frames = OrderedDict()
+        self._total_bytes = 0
+        self._last_time_idx = {}
+        self._request_idx = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def get(self, key, time_idx, data_seq, decode_func):
+        """
+        Get a decoded frame.
+
+        The data_seq is the sequence of encoded data, and decode_func converts a single encoded data into a frame.
+        """
+        time_idx = int(time_idx)
+        if time_idx < 0:
+            time_idx += len(data_seq)
+
+        frame = self._lookup(key, time_idx)
+        if frame is None:
+            self.miss_num += 1
+            with self._lock:
+                generation = self._generation
+            frame = self._insert(
+                key, time_idx, decode_func(data_seq[time_idx]), generation
+            )
+        else:
+            self.hit_num += 1
+
+        if self.prefetch_num > 0:
+            self._prefetch(key, time_idx, data_seq, decode_func)
+        return frame
+
+    def clear(self):
+        """Clear the cached frames and cancel the pending prefetch."""
+        with self._lock:
+            self._frames.clear()
+            self._total_bytes = 0
+            self._last_time_idx.clear()
+            self._request_idx.clear()
+            self._generation += 1
+
+    def close(self):
+        """Clear the cached frames and shut down the prefetch thread."""
+        self.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    @property
+    def total_bytes(self):
+        """Total size of the cached frames in bytes."""
+        return self._total_bytes
+
+    @property
+    def hit_rate(self):
+        """Ratio of the requests served from the cache."""
+        request_num = self.hit_num + self.miss_num
+        return self.hit_num / request_num if request_num > 0 else 0.0
+
+    def _lookup(self, key, time_idx):
+        with self._lock:
+            frame = self._frames.get((key, time_idx))
+            if frame is not None:
+                self._frames.move_to_end((key, time_idx))
+            return frame
+
+    def _insert(self, key, time_idx, frame, generation):
+        frame.flags.writeable = False
+        with self._lock:
+            # Discard the frame decoded for the data before clear
+            if generation != self._generation:
+                return frame
+            if (key, time_idx) in self._frames:
+                return self._frames[(key, time_idx)]
+            if frame.nbytes > self.max_bytes:
+                return frame
+            self._frames[(key, time_idx)] = frame
+            self._total_bytes += frame.nbytes
+            while self._total_bytes > self.max_bytes:
+                _, evicted_frame = self._frames.popitem(last=False)
+                self._total_bytes -= evicted_frame.nbytes
+        return frame
+
+    def _prefetch(self, key, time_idx, data_seq, decode_func):
+        with self._lock:
+            last_time_idx = self._last_time_idx.get(key)
+            self._last_time_idx[key] = time_idx
+            # A new request cancels the prefetch for the previous position
+            request_idx = self._request_idx.get(key, 0) + 1
+            self._request_idx[key] = request_idx
+            generation = self._generation
+
+        stride = 1 if last_time_idx is None else time_idx - last_time_idx
+        if stride == 0:
+            stride = 1
+        time_idx_list = [
+            time_idx + stride * prefetch_idx
+            for prefetch_idx in range(1, self.prefetch_num + 1)
+            if 0 <= time_idx + stride * prefetch_idx < len(data_seq)
+        ]
+        if len(time_idx_list) == 0:
+            return
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        self._executor.submit(
+            self._prefetch_loop,
+            key,
+            request_idx,
+            time_idx_list,
+            data_seq,
+            decode_func,
+            generation,
+        )
+
+    def _prefetch_loop(
+        self, key, request_idx, time_idx_list, data_seq, decode_func, generation
+    ):
+        for time_idx in time_idx_list:
+            with self._lock:
+                if (generation != self._generation) or (
+                    self._request_idx.get(key) != request_idx
+                ):
+                    return
+                if (key, time_idx) in self._frames:
+                    continue
+            self._insert(key, time_idx, decode_func(data_seq[time_idx]), generation)
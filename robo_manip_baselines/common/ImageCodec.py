@@ -0,0 +1,98 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+
+# https://github.com/opencv/opencv/issues/21326
+os.environ["OPENCV_IO_ENABLE_OPENEXR"] = "1"
+
+
+class ImageCodec(object):
+    """
+    Image codec to compress and decompress images.
+
+    Batches of frames are encoded and decoded on a thread pool, which runs in parallel because OpenCV releases
+    the GIL. To support another compression format, inherit this class and override encode and decode.
+
+    The following compress flags are supported:
+    - "jpg": lossy compression of rgb images.
+    - "exr": lossless compression of float depth images.
+    - "png": depth images are quantized to uint16 in units of depth_scale [m] and compressed losslessly as
+      16-bit PNG. Non-finite and non-positive depths become 0, and depths beyond the uint16 range are clipped.
+    """
+
+    def __init__(
+        self, num_workers=None, jpg_quality=95, depth_scale=1e-3, png_compression=1
+    ):
+        self.num_workers = num_workers or os.cpu_count()
+        self.jpg_quality = jpg_quality
+        self.depth_scale = depth_scale
+        self.png_compression = png_compression
+
+        self._executor = None
+
+    def encode(self, image, compress_flag):
+        """Encode a single image."""
+        if compress_flag == "jpg":
+            return cv2.imencode(
+                ".jpg", image, (cv2.IMWRITE_JPEG_QUALITY, self.jpg_quality)
+            )[1]
+        elif compress_flag == "exr":
+            return cv2.imencode(".exr", image)[1]
+        elif compress_flag == "png":
+            return cv2.imencode(
+                ".png",
+                self.quantize_depth(image),
+                (cv2.IMWRITE_PNG_COMPRESSION, self.png_compression),
+            )[1]
+        else:
+            raise ValueError(f"[ImageCodec] Unknown compress flag: {compress_flag}")
+
+    def decode(self, data, is_depth=False, depth_scale=None):
+        """Decode a single image."""
+        if is_depth:
+            image = cv2.imdecode(data, flags=cv2.IMREAD_UNCHANGED)
+            if image.dtype == np.uint16:
+                image = self.dequantize_depth(image, depth_scale)
+            return image
+        else:
+            return cv2.imdecode(data, flags=cv2.IMREAD_COLOR)
+
+    def quantize_depth(self, depth_image):
+        """Quantize a float depth image to uint16 in units of depth_scale."""
+        quantized_image = np.nan_to_num(
+            depth_image / self.depth_scale, nan=0.0, posinf=0.0, neginf=0.0
+        )
+        return np.clip(np.rint(quantized_image), 0, np.iinfo(np.uint16).max).astype(
+            np.uint16
+        )
+
+    def dequantize_depth(self, quantized_image, depth_scale=None):
+        """Convert a quantized uint16 depth image back to float depth image [m]."""
+        if depth_scale is None:
+            depth_scale = self.depth_scale
+        return quantized_image.astype(np.float32) * np.float32(depth_scale)
+
+    def encode_batch(self, image_seq, compress_flag):
+        """Encode a sequence of images and return the list of encoded data."""
+        return self.map(lambda image: self.encode(image, compress_flag), image_seq)
+
+    def decode_batch(self, data_seq, is_depth=False, depth_scale=None):
+        """Decode a sequence of encoded data and return the array of images."""
+        return np.array(
+            self.map(lambda data: self.decode(data, is_depth, depth_scale), data_seq)
+        )
+
+    def close(self):
+        """Shut down the thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def map(self, func, seq):
+        """Apply the function to each element of the sequence on the thread pool and return the list of the results."""
+        if self.num_workers <= 1 or len(seq) <= 1:
+            return [func(elem) for elem in seq]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        return list(self._executor.map(func, seq))
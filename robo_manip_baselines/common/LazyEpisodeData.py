@@ -0,0 +1,72 @@
+from collections.abc import MutableMapping
+
+
+class LazyEpisodeData(MutableMapping):
+    """
+    Episode data that reads each array from the file only when its key is accessed for the first time.
+
+    The source is a mapping that reads an array on access (e.g., the return value of np.load for a npz file).
+    The key_dict maps each key of this episode data to the original key in the source, which allows deprecated
+    keys to be renamed and unnecessary keys to be filtered out without reading any array.
+    The keys of shared_data (another episode data whose data is shared with this episode) that are not in the
+    source are read from shared_data.
+    """
+
+    def __init__(self, source, key_dict, shared_data=None):
+        self.source = source
+        self.key_dict = dict(key_dict)
+        self.shared_data = shared_data
+        if shared_data is None:
+            self.shared_keys = []
+        else:
+            self.shared_keys = [key for key in shared_data if key not in self.key_dict]
+
+        self._data = {}
+
+    def __getitem__(self, key):
+        if key not in self._data:
+            if key in self.key_dict:
+                self._data[key] = self.source[self.key_dict[key]]
+            elif key in self.shared_keys:
+                self._data[key] = self.shared_data[key]
+            else:
+                raise KeyError(key)
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._data.pop(key, None)
+        self.key_dict.pop(key, None)
+        if key in self.shared_keys:
+            self.shared_keys.remove(key)
+
+    def __contains__(self, key):
+        return (
+            (key in self._data) or (key in self.key_dict) or (key in self.shared_keys)
+        )
+
+    def __iter__(self):
+        yield from self.key_dict.keys()
+        yield from self.shared_keys
+        for key in list(self._data.keys()):
+            if (key not in self.key_dict) and (key not in self.shared_keys):
+                yield key
+
+    def __len__(self):
+        return len(self.key_dict.keys() | set(self.shared_keys) | self._data.keys())
+
+    @property
+    def loaded_keys(self):
+        """Keys whose arrays have already been read."""
+        return list(self._data.keys())
+
+    def close(self):
+        """Close the source file. Arrays that have not been read become unavailable."""
+        if hasattr(self.source, "close"):
+            self.source.close()
+        if self.shared_data is not None:
+            self.shared_data.close()
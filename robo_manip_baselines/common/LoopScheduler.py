@@ -0,0 +1,146 @@
+import time
+import numpy as np
+
+
+class LoopScheduler(object):
+    """
+    Scheduler of a loop running at a fixed period.
+
+    The deadlines of the iterations are absolute times on a grid of the period from the start, measured with the
+    monotonic clock, so that the errors of sleeping do not accumulate. When an iteration overruns its deadline,
+    the behavior depends on overrun_mode:
+
+    - "skip": Start the next iteration immediately and skip the missed deadlines, keeping the grid.
+    - "catchup": Start the next iterations without sleeping until the missed deadlines are caught up.
+    - "warn": Print a warning and restart the grid from the end of the overrun iteration.
+
+    The number of missed deadlines and the real-time factor (the period divided by the duration of the
+    iteration excluding sleep) are recorded.
+    """
+
+    overrun_mode_list = ("skip", "catchup", "warn")
+
+    def __init__(
+        self,
+        period,
+        overrun_mode="skip",
+        rtf_bin_edges=(0.5, 0.8, 0.9, 1.0, 1.25, 1.5, 2.0),
+    ):
+        if overrun_mode not in self.overrun_mode_list:
+            raise ValueError(
+                f"[LoopScheduler] Invalid overrun mode: {overrun_mode} (must be one of {self.overrun_mode_list})"
+            )
+        self.period = period  # [s]
+        self.overrun_mode = overrun_mode
+        self.rtf_bin_edges = np.array(rtf_bin_edges)
+
+        self.warn_interval = 1.0  # [s]
+
+        self.reset_statistics()
+        self.start()
+
+    def start(self):
+        """Start the grid of the deadlines from now (e.g., after a reset that takes long)."""
+        now = time.monotonic()
+        self.iteration_start_time = now
+        self.last_iteration_duration = None
+        self.next_deadline = now + self.period
+        self.last_warn_time = None
+        self.unwarned_miss_num = 0
+
+    def reset_statistics(self):
+        self.iteration_num = 0
+        self.miss_num = 0
+        self.skipped_deadline_num = 0
+        self.iteration_duration_list = []
+
+    def wait(self, record=True):
+        """
+        Wait until the deadline of the current iteration, which is called at the end of each iteration.
+
+        Returns whether the deadline was met. The statistics are recorded only if record is True.
+        """
+        now = time.monotonic()
+        iteration_duration = now - self.iteration_start_time
+        self.last_iteration_duration = iteration_duration
+        deadline = self.next_deadline
+        met = now <= deadline
+
+        if met:
+            time.sleep(deadline - now)
+            self.next_deadline = deadline + self.period
+            self.iteration_start_time = time.monotonic()
+        else:
+            if self.overrun_mode == "skip":
+                skipped_deadline_num = int(np.ceil((now - deadline) / self.period))
+                self.next_deadline = deadline + skipped_deadline_num * self.period
+                if record:
+                    self.skipped_deadline_num += skipped_deadline_num - 1
+            elif self.overrun_mode == "catchup":
+                self.next_deadline = deadline + self.period
+            elif self.overrun_mode == "warn":
+                self.next_deadline = now + self.period
+                self.unwarned_miss_num += 1
+                if (
+                    self.last_warn_time is None
+                    or now - self.last_warn_time > self.warn_interval
+                ):
+                    print(
+                        f"[LoopScheduler] Missed {self.unwarned_miss_num} deadlines. "
+                        f"(overrun: {(now - deadline) * 1e3:.1f} ms, period: {self.period * 1e3:.1f} ms)"
+                    )
+                    self.last_warn_time = now
+                    self.unwarned_miss_num = 0
+            self.iteration_start_time = now
+
+        if record:
+            self.iteration_num += 1
+            self.miss_num += not met
+            self.iteration_duration_list.append(iteration_duration)
+
+        return met
+
+    def get_rtf_histogram(self):
+        """Get the counts of the real-time factor in the bins split by rtf_bin_edges."""
+        rtf_list = self.period / np.maximum(self.iteration_duration_list, 1e-9)
+        return np.bincount(
+            np.searchsorted(self.rtf_bin_edges, rtf_list, side="right"),
+            minlength=len(self.rtf_bin_edges) + 1,
+        )
+
+    def print_statistics(self):
+        if self.iteration_num == 0:
+            return
+        iteration_duration_list = np.array(self.iteration_duration_list)
+        print(
+            f"  - Real-time factor | {self.period / iteration_duration_list.mean():.2f}"
+        )
+        print(
+            "  - Iteration duration [s] | "
+            f"mean: {iteration_duration_list.mean():.3f}, std: {iteration_duration_list.std():.3f} "
+            f"min: {iteration_duration_list.min():.3f}, max: {iteration_duration_list.max():.3f}"
+        )
+        print(
+            f"  - Deadline misses | {self.miss_num} / {self.iteration_num} "
+            f"({self.miss_num / self.iteration_num * 100:.1f}%, overrun mode: {self.overrun_mode}"
+            + (
+                f", skipped deadlines: {self.skipped_deadline_num})"
+                if self.overrun_mode == "skip"
+                else ")"
+            )
+        )
+        bin_label_list = (
+            [f"<{self.rtf_bin_edges[0]:g}"]
+            + [
+                f"{lower:g}-{upper:g}"
+                for lower, upper in zip(self.rtf_bin_edges[:-1], self.rtf_bin_edges[1:])
+            ]
+            + [f">={self.rtf_bin_edges[-1]:g}"]
+        )
+        print(
+            "  - Real-time factor histogram | "
+            + ", ".join(
+                f"{bin_label}: {count}"
+                for bin_label, count in zip(bin_label_list, self.get_rtf_histogram())
+            )
+        )
@@ -1,29 +1,44 @@
+import os
+import time
+import hashlib
 import numpy as np
 import pinocchio as pin
 
+# Process-wide cache of pinocchio models (worker processes created by fork inherit it)
+_pin_model_cache = {}
+
 
 class MotionManager(object):
     """
     Motion manager for robot arm and gripper.
 
     The manager computes forward and inverse kinematics using Pinocchio, a robot modeling library.
+    The Pinocchio model is cached in the process (see get_pin_model), and additionally on disk if
+    pin_model_cache_dir is set, so that creating many managers does not parse the URDF each time.
     """
 
+    pin_model_cache_dir = None
+
     def __init__(self, env):
         self.env = env
 
         # Setup pinocchio model and data
-        self.pin_model = pin.buildModelFromUrdf(self.env.unwrapped.arm_urdf_path)
-        if self.env.unwrapped.arm_root_pose is not None:
-            root_se3 = pin.SE3(
-                pin.Quaternion(self.env.unwrapped.arm_root_pose[[4, 5, 6, 3]]),
-                self.env.unwrapped.arm_root_pose[0:3],
-            )
-            self.pin_model.jointPlacements[1] = root_se3.act(
-                self.pin_model.jointPlacements[1]
-            )
+        # The model is shared with the other motion managers of the same robot, so it must not be modified
+        self.pin_model = get_pin_model(
+            self.env.unwrapped.arm_urdf_path,
+            self.env.unwrapped.arm_root_pose,
+            self.pin_model_cache_dir,
+        )
         self.pin_data = self.pin_model.createData()
         self.pin_data_obs = self.pin_model.createData()
+        self.pin_data_batch = self.pin_model.createData()
+
+        # Budget and tolerance of iterative inverse kinematics
+        self.ik_max_iter = 100
+        self.ik_max_time = 5e-3  # [s]
+        self.ik_tol = 1e-5
+        # Maximum displacement of each joint per call of iterative inverse kinematics (i.e., per control tick)
+        self.ik_max_joint_delta = 0.05  # [rad]
 
         # Setup arm
         self.joint_pos = self.env.unwrapped.init_qpos[
@@ -53,28 +68,88 @@ class MotionManager(object):
     def forward_kinematics(self):
         pin.forwardKinematics(self.pin_model, self.pin_data, self.joint_pos)
 
-    def inverse_kinematics(self):
-        """Solve inverse kinematics."""
+    def inverse_kinematics(
+        self, max_iter=1, max_time=None, tol=None, clamp_joint_limits=False
+    ):
+        """
+        Solve inverse kinematics.
+
+        By default, a single step of damped least squares is taken from the current joint position. If max_iter
+        is larger than 1, the steps are repeated until the residual is smaller than tol, the number of steps
+        reaches max_iter, or the elapsed time exceeds max_time [s]. If clamp_joint_limits is True, the joint
+        position is clamped to the joint limits of the URDF after each step.
+        Return the number of steps and the residual (the norm of the pose error vector) after the last step.
+        """
         # https://gepettoweb.laas.fr/doc/stack-of-tasks/pinocchio/master/doxygen-html/md_doc_b-examples_d-inverse-kinematics.html
-        error_se3 = self.current_se3.actInv(self.target_se3)
-        error_vec = pin.log(error_se3).vector  # in joint frame
-        J = pin.computeJointJacobian(
-            self.pin_model,
-            self.pin_data,
-            self.joint_pos,
-            self.env.unwrapped.ik_eef_joint_id,
-        )  # in joint frame
-        J = -1 * np.dot(pin.Jlog6(error_se3.inverse()), J)
+        start_time = time.perf_counter()
+        eef_id = self.env.unwrapped.ik_eef_joint_id
         damping_scale = 1e-6
-        delta_joint_pos = -1 * J.T.dot(
-            np.linalg.solve(
-                J.dot(J.T)
-                + (np.dot(error_vec, error_vec) + damping_scale) * np.identity(6),
-                error_vec,
+        iteration_num = 0
+        residual = None
+        while iteration_num < max_iter:
+            # Forward kinematics and Jacobian are computed in a single pass
+            pin.computeJointJacobians(self.pin_model, self.pin_data, self.joint_pos)
+            error_se3 = self.current_se3.actInv(self.target_se3)
+            error_vec = pin.log(error_se3).vector  # in joint frame
+            residual = np.linalg.norm(error_vec)
+            if (tol is not None) and (residual < tol):
+                break
+            J = pin.getJointJacobian(
+                self.pin_model, self.pin_data, eef_id, pin.ReferenceFrame.LOCAL
+            )  # in joint frame
+            J = -1 * np.dot(pin.Jlog6(error_se3.inverse()), J)
+            delta_joint_pos = -1 * J.T.dot(
+                np.linalg.solve(
+                    J.dot(J.T) + (residual**2 + damping_scale) * np.identity(6),
+                    error_vec,
+                )
             )
-        )
-        self.joint_pos = pin.integrate(self.pin_model, self.joint_pos, delta_joint_pos)
+            self.joint_pos = pin.integrate(
+                self.pin_model, self.joint_pos, delta_joint_pos
+            )
+            if clamp_joint_limits:
+                self.joint_pos = np.clip(
+                    self.joint_pos,
+                    self.pin_model.lowerPositionLimit,
+                    self.pin_model.upperPositionLimit,
+                )
+            iteration_num += 1
+            if (max_time is not None) and (time.perf_counter() - start_time > max_time):
+                break
         self.forward_kinematics()
+        if iteration_num > 0:
+            residual = np.linalg.norm(
+                pin.log(self.current_se3.actInv(self.target_se3)).vector
+            )
+        return iteration_num, residual
+
+    def inverse_kinematics_until_converged(self):
+        """
+        Solve inverse kinematics iteratively within the budget given by ik_max_iter and ik_max_time [s].
+
+        This is used to reach a distant target (e.g., in the reach phases) in fewer control ticks than the
+        single-step inverse kinematics. Because the command is sent to the robot in one tick, the displacement of
+        each joint from the current joint position is limited to ik_max_joint_delta [rad], and the remaining
+        displacement is solved in the following ticks.
+        """
+        prev_joint_pos = self.joint_pos.copy()
+        iteration_num, residual = self.inverse_kinematics(
+            max_iter=self.ik_max_iter,
+            max_time=self.ik_max_time,
+            tol=self.ik_tol,
+            clamp_joint_limits=True,
+        )
+        if self.ik_max_joint_delta is not None:
+            delta_joint_pos = self.joint_pos - prev_joint_pos
+            if np.max(np.abs(delta_joint_pos)) > self.ik_max_joint_delta:
+                self.joint_pos = prev_joint_pos + np.clip(
+                    delta_joint_pos, -self.ik_max_joint_delta, self.ik_max_joint_delta
+                )
+                self.forward_kinematics()
+                residual = np.linalg.norm(
+                    pin.log(self.current_se3.actInv(self.target_se3)).vector
+                )
+        return iteration_num, residual
 
     def set_relative_target_se3(self, delta_pos=None, delta_rpy=None):
         """Set the target pose of the end-effector relatively."""
@@ -130,6 +205,37 @@ class MotionManager(object):
             ]
         )
 
+    def get_measured_eef_batch(self, obs_list):
+        """Get measured end-effector poses (tx, ty, tz, qw, qx, qy, qz) of a list of observations as [N, 7]."""
+        measured_joint_pos_array = np.array(
+            [
+                self.env.unwrapped.get_joint_pos_from_obs(obs, exclude_gripper=True)
+                for obs in obs_list
+            ]
+        )
+        return self.get_eef_pose_batch(measured_joint_pos_array)
+
+    def get_eef_pose_batch(self, joint_pos_array):
+        """
+        Get end-effector poses (tx, ty, tz, qw, qx, qy, qz) of a batch of arm joint positions.
+
+        The joint_pos_array is an array of [N, dof] (e.g., the joint positions of all environments or of a whole
+        episode), and the returned poses are an array of [N, 7]. Only forward kinematics is computed for each
+        joint position, and the rotation matrices are converted to quaternions at once.
+        """
+        joint_pos_array = np.asarray(joint_pos_array, dtype=np.float64)
+        eef_id = self.env.unwrapped.ik_eef_joint_id
+        pos_array = np.empty((len(joint_pos_array), 3))
+        rot_array = np.empty((len(joint_pos_array), 3, 3))
+        for batch_idx, joint_pos in enumerate(joint_pos_array):
+            pin.forwardKinematics(self.pin_model, self.pin_data_batch, joint_pos)
+            eef_se3 = self.pin_data_batch.oMi[eef_id]
+            pos_array[batch_idx] = eef_se3.translation
+            rot_array[batch_idx] = eef_se3.rotation
+        return np.concatenate(
+            [pos_array, get_quat_batch_from_rot_batch(rot_array)], axis=1
+        )
+
     def get_command_eef(self):
         """Get command end-effector pose (tx, ty, tz, qw, qx, qy, qz)."""
         return np.concatenate(
@@ -157,3 +263,94 @@ class MotionManager(object):
             self.env.action_space.low[self.env.unwrapped.gripper_action_idx],
             self.env.action_space.high[self.env.unwrapped.gripper_action_idx],
         )
+
+
+def get_pin_model(urdf_path, root_pose=None, cache_dir=None):
+    """
+    Get the pinocchio model of a URDF file whose root joint is placed at root_pose (tx, ty, tz, qw, qx, qy, qz).
+
+    The model is cached in the process with the key of the URDF path, the modification time of the URDF file and
+    the root pose, so the returned model is shared and must not be modified (create a pinocchio Data for each
+    user). If cache_dir is given, the model is also serialized to a binary file in this directory and is loaded
+    from it by other processes (e.g., worker processes that are not created by fork).
+    """
+    urdf_path = os.path.abspath(urdf_path)
+    key = (
+        urdf_path,
+        os.path.getmtime(urdf_path),
+        None if root_pose is None else tuple(np.asarray(root_pose).tolist()),
+    )
+    pin_model = _pin_model_cache.get(key)
+    if pin_model is not None:
+        return pin_model
+
+    if cache_dir is not None:
+        cache_filename = os.path.join(
+            cache_dir,
+            "{}_{}.bin".format(
+                os.path.splitext(os.path.basename(urdf_path))[0],
+                hashlib.sha256(repr(key).encode()).hexdigest()[:16],
+            ),
+        )
+    else:
+        cache_filename = None
+
+    if (cache_filename is not None) and os.path.isfile(cache_filename):
+        pin_model = pin.Model()
+        pin_model.loadFromBinary(cache_filename)
+    else:
+        pin_model = pin.buildModelFromUrdf(urdf_path)
+        if root_pose is not None:
+            root_se3 = pin.SE3(
+                pin.Quaternion(np.asarray(root_pose)[[4, 5, 6, 3]]),
+                np.asarray(root_pose)[0:3],
+            )
+            pin_model.jointPlacements[1] = root_se3.act(pin_model.jointPlacements[1])
+        if cache_filename is not None:
+            # Write to a temporary file first so that other processes do not read a partial file
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_cache_filename = "{}.{}.tmp".format(cache_filename, os.getpid())
+            pin_model.saveToBinary(tmp_cache_filename)
+            os.replace(tmp_cache_filename, cache_filename)
+
+    _pin_model_cache[key] = pin_model
+    return pin_model
+
+
+def get_quat_batch_from_rot_batch(rot_array):
+    """
+    Convert rotation matrices [N, 3, 3] to quaternions (qw, qx, qy, qz) [N, 4].
+
+    The same algorithm as pin.Quaternion (Eigen) is used, so that the signs of the quaternions are identical.
+    """
+    rot_array = np.asarray(rot_array)
+    quat_array = np.empty((len(rot_array), 4))
+
+    # If the trace is positive, qw is the largest component
+    trace = np.trace(rot_array, axis1=1, axis2=2)
+    mask = trace > 0.0
+    t = np.sqrt(trace[mask] + 1.0)
+    rot = rot_array[mask]
+    quat_array[mask, 0] = 0.5 * t
+    t = 0.5 / t
+    quat_array[mask, 1] = (rot[:, 2, 1] - rot[:, 1, 2]) * t
+    quat_array[mask, 2] = (rot[:, 0, 2] - rot[:, 2, 0]) * t
+    quat_array[mask, 3] = (rot[:, 1, 0] - rot[:, 0, 1]) * t
+
+    # Otherwise, the component of the largest diagonal element is the largest
+    diag = np.diagonal(rot_array, axis1=1, axis2=2)
+    max_idx = np.where(diag[:, 1] > diag[:, 0], 1, 0)
+    max_idx = np.where(diag[:, 2] > diag[np.arange(len(diag)), max_idx], 2, max_idx)
+    for i in range(3):
+        j = (i + 1) % 3
+        k = (j + 1) % 3
+        mask_i = (~mask) & (max_idx == i)
+        rot = rot_array[mask_i]
+        t = np.sqrt(rot[:, i, i] - rot[:, j, j] - rot[:, k, k] + 1.0)
+        quat_array[mask_i, 1 + i] = 0.5 * t
+        t = 0.5 / t
+        quat_array[mask_i, 0] = (rot[:, k, j] - rot[:, j, k]) * t
+        quat_array[mask_i, 1 + j] = (rot[:, j, i] + rot[:, i, j]) * t
+        quat_array[mask_i, 1 + k] = (rot[:, k, i] + rot[:, i, k]) * t
+
+    return quat_array
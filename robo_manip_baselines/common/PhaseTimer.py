@@ -0,0 +1,135 @@
+import os
+import time
+import json
+import csv
+import numpy as np
+
+
+class PhaseDuration(object):
+    """Ring buffer of the durations of a phase, which is also the context manager to measure the phase."""
+
+    def __init__(self, capacity):
+        self.buffer = np.zeros(capacity, dtype=np.float64)
+        self.total_num = 0
+        self.start_time = None
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.append(time.perf_counter() - self.start_time)
+
+    def append(self, duration):
+        self.buffer[self.total_num % len(self.buffer)] = duration
+        self.total_num += 1
+
+    def get_durations(self):
+        """Get the durations in the buffer (the latest ones up to the capacity)."""
+        return self.buffer[: min(self.total_num, len(self.buffer))]
+
+
+class PhaseTimer(object):
+    """
+    Timer of the phases of a control loop (e.g., inference, IK, env.step).
+
+    Each phase is measured with a context manager, and the durations are written to a ring buffer preallocated
+    for each phase, so that the latest durations up to capacity are kept without allocating memory in the
+    loop:
+
+        with phase_timer.phase("step"):
+            env.step(action)
+
+    If summary_interval [s] is given, the percentiles of the durations are printed at that interval when tick is
+    called at the end of each iteration. The summary can be exported to a JSON or CSV file by export.
+    """
+
+    percentile_list = (50, 95, 99)
+
+    def __init__(self, name="", capacity=10000, summary_interval=None):
+        self.name = name
+        self.capacity = capacity
+        self.summary_interval = summary_interval  # [s]
+
+        self.phase_dict = {}
+        self.last_summary_time = time.monotonic()
+
+    def phase(self, phase_name):
+        """Get the context manager to measure the phase."""
+        phase = self.phase_dict.get(phase_name)
+        if phase is None:
+            phase = PhaseDuration(self.capacity)
+            self.phase_dict[phase_name] = phase
+        return phase
+
+    def record(self, phase_name, duration):
+        """Record the duration [s] of the phase measured outside the timer."""
+        self.phase(phase_name).append(duration)
+
+    def tick(self):
+        """Print the summary if the summary interval has elapsed (called at the end of each iteration)."""
+        if self.summary_interval is None or self.summary_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self.last_summary_time >= self.summary_interval:
+            self.print_summary()
+            self.last_summary_time = now
+
+    def get_summary(self):
+        """Get the number, mean, maximum and percentiles of the durations [s] of each phase."""
+        summary = {}
+        # The phases can be added from another thread (e.g., rendering thread)
+        for phase_name, phase in list(self.phase_dict.items()):
+            durations = phase.get_durations()
+            if len(durations) == 0:
+                continue
+            phase_summary = {
+                "total_num": phase.total_num,
+                "num": len(durations),
+                "mean": float(durations.mean()),
+                "max": float(durations.max()),
+            }
+            for percentile, value in zip(
+                self.percentile_list, np.percentile(durations, self.percentile_list)
+            ):
+                phase_summary[f"p{percentile}"] = float(value)
+            summary[phase_name] = phase_summary
+        return summary
+
+    def print_summary(self):
+        print(f"[{self.name or 'PhaseTimer'}] Duration of phases [ms]")
+        for phase_name, phase_summary in self.get_summary().items():
+            print(
+                f"  - {phase_name} | "
+                + ", ".join(
+                    f"p{percentile}: {phase_summary[f'p{percentile}'] * 1e3:.2f}"
+                    for percentile in self.percentile_list
+                )
+                + f", mean: {phase_summary['mean'] * 1e3:.2f}, max: {phase_summary['max'] * 1e3:.2f}"
+            )
+
+    def export(self, filename):
+        """Export the summary to a JSON or CSV file, which is determined by the extension."""
+        summary = self.get_summary()
+        dirname = os.path.dirname(filename)
+        if dirname != "":
+            os.makedirs(dirname, exist_ok=True)
+        ext = os.path.splitext(filename)[1].lower()
+        if ext == ".json":
+            with open(filename, "w") as f:
+                json.dump(
+                    {"name": self.name, "unit": "s", "phases": summary}, f, indent=2
+                )
+        elif ext == ".csv":
+            field_name_list = ["phase", "total_num", "num", "mean", "max"] + [
+                f"p{percentile}" for percentile in self.percentile_list
+            ]
+            with open(filename, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=field_name_list)
+                writer.writeheader()
+                for phase_name, phase_summary in summary.items():
+                    writer.writerow({"phase": phase_name, **phase_summary})
+        else:
+            raise ValueError(
+                f"[PhaseTimer] Unsupported extension of timing file: {filename}"
+            )
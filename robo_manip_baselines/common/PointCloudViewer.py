@@ -0,0 +1,313 @@
+import threading
+import numpy as np
+import cv2
+
+# RGB colors of point clouds when they are colored for each cloud
+CLOUD_COLOR_LIST = (
+    (255, 80, 80),
+    (80, 220, 80),
+    (80, 140, 255),
+    (255, 200, 60),
+    (220, 80, 255),
+    (60, 220, 220),
+)
+
+# Rotation from the world frame (z-axis up) to the optical frame looking along the x-axis of the world
+WORLD_TO_OPTICAL_ROT = np.array(
+    [[0.0, -1.0, 0.0], [0.0, 0.0, -1.0], [1.0, 0.0, 0.0]], dtype=np.float32
+)
+
+
+class PointCloudTile(object):
+    """Tile of PointCloudViewer that shows point clouds in a common frame from its own orbit camera."""
+
+    def __init__(self, frame):
+        if frame == "camera":
+            # Look from the camera in which the point clouds are obtained
+            self.base_rot = np.eye(3, dtype=np.float32)
+            self.default_elevation = 0.0
+        elif frame == "world":
+            # Look down obliquely from the front of the world
+            self.base_rot = WORLD_TO_OPTICAL_ROT
+            self.default_elevation = np.deg2rad(30.0)
+        else:
+            raise ValueError(f"[PointCloudViewer] Invalid frame: {frame}")
+
+        # Each value is a dictionary of the buffers of positions and colors and the number of points
+        self.cloud_dict = {}
+        self.reset_view()
+
+    def reset_view(self):
+        """Reset the orbit camera, which is fitted to the point clouds in the next rendering."""
+        self.azimuth = 0.0
+        self.elevation = self.default_elevation
+        self.distance = None
+        self.target = None
+
+    def get_rot(self):
+        """Get the rotation from the frame of the point clouds to the optical frame of the orbit camera."""
+        cos_azimuth, sin_azimuth = np.cos(self.azimuth), np.sin(self.azimuth)
+        cos_elevation, sin_elevation = np.cos(self.elevation), np.sin(self.elevation)
+        azimuth_rot = np.array(
+            [
+                [cos_azimuth, 0.0, sin_azimuth],
+                [0.0, 1.0, 0.0],
+                [-sin_azimuth, 0.0, cos_azimuth],
+            ]
+        )
+        elevation_rot = np.array(
+            [
+                [1.0, 0.0, 0.0],
+                [0.0, cos_elevation, -sin_elevation],
+                [0.0, sin_elevation, cos_elevation],
+            ]
+        )
+        return (elevation_rot @ azimuth_rot @ self.base_rot).astype(np.float32)
+
+
+class PointCloudViewer(object):
+    """
+    Viewer of point clouds drawn with OpenCV.
+
+    The points are projected with NumPy and drawn in a window consisting of tiles. Each tile shows the point
+    clouds in a common frame (e.g., the point clouds of the static cameras in the world frame, or that of a
+    camera attached to the robot in its frame) from its own orbit camera. The buffers of the point clouds and
+    the image are allocated once and updated in place.
+
+    The orbit camera is controlled with the mouse: drag with the left button to rotate, drag with the right
+    button or use the wheel to zoom, and drag with the middle button (or the left button with the shift key) to
+    pan. Press the 'r' key to reset the view and the 'c' key to switch between the colors of the points and
+    the colors of each cloud. The methods can be called from different threads (e.g., rendering in the thread of
+    the preview renderer and handling keys in the main thread).
+    """
+
+    def __init__(
+        self,
+        window_name="point cloud",
+        tile_size=(320, 320),
+        fovy=45.0,
+        point_size=2,
+        background_color=(0, 0, 0),
+    ):
+        self.window_name = window_name
+        self.tile_width, self.tile_height = tile_size
+        self.focal_length = 0.5 * self.tile_height / np.tan(np.deg2rad(fovy) / 2.0)
+        self.point_size = point_size
+        self.background_color = background_color
+        self.cloud_color_mode = False
+
+        # Each value is a tile, which is created when its point cloud is set first
+        self.tile_dict = {}
+        self.image = None
+        self.window_created = False
+        self.drag_start = None
+
+        # The point clouds and views are accessed from the thread that renders the image and from the threads
+        # that handle the key and mouse events
+        self._lock = threading.Lock()
+
+    def set_point_cloud(
+        self, tile_name, cloud_name, xyz_array, rgb_array=None, frame="camera"
+    ):
+        """
+        Set the point cloud to be drawn.
+
+        xyz_array [N, 3] and rgb_array [N, 3] (in [0, 1], or None to use the color of the cloud) are copied
+        to the buffers of the cloud. frame is "camera" (z-axis forward and y-axis down) or "world" (z-axis up),
+        and is used for the initial view of the tile.
+        """
+        with self._lock:
+            tile = self.tile_dict.get(tile_name)
+            if tile is None:
+                tile = PointCloudTile(frame)
+                self.tile_dict[tile_name] = tile
+            cloud = tile.cloud_dict.get(cloud_name)
+            num_points = len(xyz_array)
+            if cloud is None or len(cloud["xyz"]) < num_points:
+                # Allocate the buffers with a margin because the number of points changes in each step
+                capacity = int(1.5 * num_points) + 1
+                cloud_idx = sum(
+                    len(_tile.cloud_dict) for _tile in self.tile_dict.values()
+                )
+                if cloud is not None:
+                    cloud_idx = cloud["idx"]
+                cloud = {
+                    "idx": cloud_idx,
+                    "xyz": np.empty((capacity, 3), dtype=np.float32),
+                    "rgb": np.empty((capacity, 3), dtype=np.uint8),
+                }
+                tile.cloud_dict[cloud_name] = cloud
+            cloud["num"] = num_points
+            cloud["xyz"][:num_points] = xyz_array
+            if rgb_array is None:
+                cloud["rgb"][:num_points] = CLOUD_COLOR_LIST[
+                    cloud["idx"] % len(CLOUD_COLOR_LIST)
+                ]
+            else:
+                np.multiply(
+                    rgb_array, 255.0, out=cloud["rgb"][:num_points], casting="unsafe"
+                )
+
+    def render(self):
+        """Render the image (RGB) of the viewer, in which the tiles are arranged horizontally."""
+        with self._lock:
+            image_shape = (self.tile_height, self.tile_width * len(self.tile_dict), 3)
+            if self.image is None or self.image.shape != image_shape:
+                self.image = np.empty(image_shape, dtype=np.uint8)
+            self.image[:] = self.background_color
+            for tile_idx, tile in enumerate(self.tile_dict.values()):
+                self.render_tile(
+                    tile,
+                    self.image[
+                        :, tile_idx * self.tile_width : (tile_idx + 1) * self.tile_width
+                    ],
+                )
+            return self.image
+
+    def render_tile(self, tile, tile_image):
+        xyz_array = np.concatenate(
+            [cloud["xyz"][: cloud["num"]] for cloud in tile.cloud_dict.values()]
+        )
+        if len(xyz_array) == 0:
+            return
+        if self.cloud_color_mode:
+            rgb_array = np.concatenate(
+                [
+                    np.broadcast_to(
+                        np.array(
+                            CLOUD_COLOR_LIST[cloud["idx"] % len(CLOUD_COLOR_LIST)],
+                            dtype=np.uint8,
+                        ),
+                        (cloud["num"], 3),
+                    )
+                    for cloud in tile.cloud_dict.values()
+                ]
+            )
+        else:
+            rgb_array = np.concatenate(
+                [cloud["rgb"][: cloud["num"]] for cloud in tile.cloud_dict.values()]
+            )
+
+        rot = tile.get_rot()
+        if tile.target is None:
+            # Fit the view to the point clouds
+            tile.target = np.median(xyz_array, axis=0)
+            view_xyz_array = (xyz_array - tile.target) @ rot.T
+            extent = np.percentile(np.abs(view_xyz_array[:, 0:2]), 95)
+            tile.distance = max(
+                extent * self.focal_length / (0.5 * self.tile_height)
+                + np.percentile(np.abs(view_xyz_array[:, 2]), 95),
+                1e-3,
+            )
+
+        # Transform to the optical frame of the orbit camera and project
+        view_xyz_array = (xyz_array - tile.target) @ rot.T
+        view_xyz_array[:, 2] += tile.distance
+        front_indices = np.flatnonzero(view_xyz_array[:, 2] > 1e-3)
+        view_xyz_array = view_xyz_array[front_indices]
+        inv_z = self.focal_length / view_xyz_array[:, 2]
+        u_array = (view_xyz_array[:, 0] * inv_z + 0.5 * self.tile_width).astype(
+            np.int32
+        )
+        v_array = (view_xyz_array[:, 1] * inv_z + 0.5 * self.tile_height).astype(
+            np.int32
+        )
+
+        # Draw the far points first so that they are overwritten by the near points
+        order = np.argsort(-view_xyz_array[:, 2], kind="stable")
+        u_array = u_array[order]
+        v_array = v_array[order]
+        rgb_array = rgb_array[front_indices[order]]
+        half_size = self.point_size // 2
+        for du in range(-half_size, self.point_size - half_size):
+            for dv in range(-half_size, self.point_size - half_size):
+                _u_array = u_array + du
+                _v_array = v_array + dv
+                inside_indices = np.flatnonzero(
+                    (_u_array >= 0)
+                    & (_u_array < self.tile_width)
+                    & (_v_array >= 0)
+                    & (_v_array < self.tile_height)
+                )
+                tile_image[_v_array[inside_indices], _u_array[inside_indices]] = (
+                    rgb_array[inside_indices]
+                )
+
+    def setup_window(self):
+        """Create the window and register the mouse callback (called in the thread that shows the window)."""
+        if self.window_created:
+            return
+        cv2.namedWindow(
+            self.window_name,
+            flags=(cv2.WINDOW_AUTOSIZE | cv2.WINDOW_KEEPRATIO | cv2.WINDOW_GUI_NORMAL),
+        )
+        cv2.setMouseCallback(self.window_name, self.mouse_callback)
+        self.window_created = True
+
+    def show(self):
+        """Render and show the image in the window."""
+        self.setup_window()
+        cv2.imshow(self.window_name, cv2.cvtColor(self.render(), cv2.COLOR_RGB2BGR))
+
+    def get_tile(self, x):
+        if len(self.tile_dict) == 0:
+            return None
+        tile_idx = min(max(x // self.tile_width, 0), len(self.tile_dict) - 1)
+        return list(self.tile_dict.values())[tile_idx]
+
+    def mouse_callback(self, event, x, y, flags, param):
+        with self._lock:
+            if event in (
+                cv2.EVENT_LBUTTONDOWN,
+                cv2.EVENT_RBUTTONDOWN,
+                cv2.EVENT_MBUTTONDOWN,
+            ):
+                self.drag_start = (event, x, y, self.get_tile(x))
+            elif event in (
+                cv2.EVENT_LBUTTONUP,
+                cv2.EVENT_RBUTTONUP,
+                cv2.EVENT_MBUTTONUP,
+            ):
+                self.drag_start = None
+            elif event == cv2.EVENT_MOUSEMOVE and self.drag_start is not None:
+                button_event, prev_x, prev_y, tile = self.drag_start
+                self.drag_start = (button_event, x, y, tile)
+                if tile is None or tile.target is None:
+                    return
+                dx, dy = x - prev_x, y - prev_y
+                if button_event == cv2.EVENT_MBUTTONDOWN or (
+                    button_event == cv2.EVENT_LBUTTONDOWN
+                    and flags & cv2.EVENT_FLAG_SHIFTKEY
+                ):
+                    # Pan in the image plane of the orbit camera
+                    tile.target -= (
+                        tile.get_rot().T
+                        @ np.array([dx, dy, 0.0], dtype=np.float32)
+                        * tile.distance
+                        / self.focal_length
+                    )
+                elif button_event == cv2.EVENT_LBUTTONDOWN:
+                    tile.azimuth -= 0.01 * dx
+                    tile.elevation = np.clip(
+                        tile.elevation + 0.01 * dy, -np.pi / 2.0, np.pi / 2.0
+                    )
+                elif button_event == cv2.EVENT_RBUTTONDOWN:
+                    tile.distance *= np.exp(0.01 * dy)
+            elif event == cv2.EVENT_MOUSEWHEEL:
+                tile = self.get_tile(x)
+                if tile is not None and tile.distance is not None:
+                    tile.distance *= (
+                        0.9 if cv2.getMouseWheelDelta(flags) > 0 else 1.0 / 0.9
+                    )
+
+    def handle_key(self, key):
+        """Handle the key pressed on the window, and return whether it is used by the viewer."""
+        with self._lock:
+            if key == ord("r"):
+                for tile in self.tile_dict.values():
+                    tile.reset_view()
+            elif key == ord("c"):
+                self.cloud_color_mode = not self.cloud_color_mode
+            else:
+                return False
+            return True
@@ -0,0 +1,81 @@
+import cv2
+from .DataManager import DataKey
+
+
+class RecordingPolicy(object):
+    """
+    Policy to record the data sequence of a key.
+
+    The data is recorded only every interval steps (i.e., at the time indices 0, interval, 2 * interval, ...),
+    images are resized to image_size (width, height) when they are recorded, and the key is not recorded at
+    all if skip is True.
+
+    A policy can be given as a string of "<key_pattern>:<option>[,<option>...]", where key_pattern is a key
+    or a shell-style wildcard (e.g., "*_depth_image") and each option is one of "interval=<k>",
+    "size=<width>x<height>" and "skip":
+
+        hand_depth_image:skip
+        *_rgb_image:interval=2,size=320x240
+    """
+
+    def __init__(self, interval=1, image_size=None, skip=False):
+        if interval < 1:
+            raise ValueError(
+                f"[RecordingPolicy] Interval must be a positive integer: {interval}"
+            )
+        self.interval = interval
+        self.image_size = None if image_size is None else tuple(image_size)
+        self.skip = skip
+
+    @classmethod
+    def from_str(cls, policy_str):
+        """Parse the string of the policy, and return the key pattern and the policy."""
+        key_pattern, sep, option_str = policy_str.partition(":")
+        if key_pattern == "" or sep == "" or option_str == "":
+            raise ValueError(
+                f"[RecordingPolicy] Invalid policy (must be <key_pattern>:<options>): {policy_str}"
+            )
+        kwargs = {}
+        for option in option_str.split(","):
+            name, _, value = option.partition("=")
+            try:
+                if name == "interval":
+                    kwargs["interval"] = int(value)
+                elif name == "size":
+                    width, height = value.lower().split("x")
+                    kwargs["image_size"] = (int(width), int(height))
+                elif name == "skip" and value == "":
+                    kwargs["skip"] = True
+                else:
+                    raise ValueError
+            except ValueError:
+                raise ValueError(
+                    f'[RecordingPolicy] Invalid option "{option}" of policy: {policy_str}'
+                ) from None
+        return DataKey.replace_deprecated_key(key_pattern), cls(**kwargs)
+
+    def get_shape(self, key, shape):
+        """Get the shape of the data of the key recorded with the policy."""
+        if self.image_size is None or not DataKey.is_image_key(key):
+            return tuple(shape)
+        width, height = self.image_size
+        return (height, width) + tuple(shape[2:])
+
+    def apply(self, key, data):
+        """Apply the policy to a single data of the key to be recorded."""
+        if self.image_size is None or not DataKey.is_image_key(key):
+            return data
+        return cv2.resize(
+            data,
+            self.image_size,
+            interpolation=(
+                cv2.INTER_NEAREST if DataKey.is_depth_image_key(key) else cv2.INTER_AREA
+            ),
+        )
+
+    def __repr__(self):
+        if self.skip:
+            return "RecordingPolicy(skip=True)"
+        return (
+            f"RecordingPolicy(interval={self.interval}, image_size={self.image_size})"
+        )
@@ -1,47 +1,159 @@
+import functools
 import numpy as np
 import cv2
 
 
-def convertDepthImageToColorImage(image):
-    """Convert depth image (float type) to color image (uint8 type)."""
-    eps = 1e-6
-    image_copied = image.copy()
-    image_copied[np.logical_not(np.isfinite(image_copied))] = image_copied[
-        np.isfinite(image_copied)
-    ].max()
-    image_copied = (
-        255
-        * (
-            (image_copied - image_copied.min())
-            / (image_copied.max() - image_copied.min() + eps)
-        )
-    ).astype(np.uint8)
-    return cv2.merge((image_copied,) * 3)
+@functools.lru_cache(maxsize=16)
+def getDepthColorMapLut(colormap=None):
+    """
+    Get the lookup table of [256, 1, 3] from depth levels to RGB colors.
 
+    The colormap is an OpenCV colormap (e.g., cv2.COLORMAP_JET), and grayscale is used if it is None.
+    The lookup table is cached for each colormap, and is therefore read-only.
+    """
+    levels = np.arange(256, dtype=np.uint8).reshape(256, 1)
+    if colormap is None:
+        lut = cv2.merge((levels,) * 3)
+    else:
+        lut = cv2.cvtColor(cv2.applyColorMap(levels, colormap), cv2.COLOR_BGR2RGB)
+    lut.flags.writeable = False
+    return lut
 
-def convertDepthImageToPointCloud(depth_image, fovy, rgb_image=None, dist_thre=None):
-    """Convert depth image (float type) to point cloud (array of 3D position)."""
-    focal_scaling = (1.0 / np.tan(np.deg2rad(fovy) / 2.0)) * depth_image.shape[0] / 2.0
-    xyz_array = np.array(
-        [
-            (i, j)
-            for i in range(depth_image.shape[0])
-            for j in range(depth_image.shape[1])
-        ],
-        dtype=np.float32,
+
+def convertDepthImageToColorImage(image, depth_range=None, colormap=None, out=None):
+    """
+    Convert depth image (float type) to color image (uint8 type).
+
+    If depth_range (min, max) [m] is given, depths are mapped linearly from it to the colormap and clipped.
+    Otherwise, the range is the minimum and maximum of the finite depths of the image, and non-finite depths are
+    regarded as the maximum. See getDepthColorMapLut for colormap. If out (uint8 array of [height, width, 3])
+    is given, the color image is written to it.
+    """
+    if depth_range is None:
+        finite_mask = np.isfinite(image)
+        if not finite_mask.all():
+            image = np.where(finite_mask, image, image[finite_mask].max())
+        depth_min, depth_max, _, _ = cv2.minMaxLoc(image)
+    else:
+        depth_min, depth_max = depth_range
+        # Infinite depths are clipped here because they are not saturated correctly
+        image = cv2.min(image, float(depth_max))
+    eps = 1e-6
+    scale = 255.0 / (depth_max - depth_min + eps)
+    # Scaling with saturation to uint8 is done in a single pass
+    level_image = cv2.addWeighted(
+        image, scale, image, 0.0, -depth_min * scale, dtype=cv2.CV_8U
     )
-    xyz_array = (
-        xyz_array - 0.5 * np.array(depth_image.shape[:2], dtype=np.float32)
-    ) / focal_scaling
-    xyz_array *= depth_image.flatten()[:, np.newaxis]
-    xyz_array = np.hstack((xyz_array[:, [1, 0]], depth_image.flatten()[:, np.newaxis]))
+    return cv2.applyColorMap(level_image, getDepthColorMapLut(colormap), dst=out)
+
+
+@functools.lru_cache(maxsize=16)
+def getDepthImageRayGrid(height, width, fovy):
+    """
+    Get the ray grid of a depth image, i.e., the (x, y) position of each pixel at unit depth as an array of
+    [height * width, 2].
+
+    The ray grid is cached for each image size and fovy, and is therefore read-only.
+    """
+    focal_scaling = (1.0 / np.tan(np.deg2rad(fovy) / 2.0)) * height / 2.0
+    ray_grid = np.empty((height, width, 2), dtype=np.float32)
+    ray_grid[:, :, 0] = (
+        np.arange(width, dtype=np.float32) - np.float32(0.5 * width)
+    ) / np.float32(focal_scaling)
+    ray_grid[:, :, 1] = (
+        (np.arange(height, dtype=np.float32) - np.float32(0.5 * height))
+        / np.float32(focal_scaling)
+    )[:, np.newaxis]
+    ray_grid = ray_grid.reshape(-1, 2)
+    ray_grid.flags.writeable = False
+    return ray_grid
+
+
+def convertDepthImageToPointCloud(
+    depth_image, fovy, rgb_image=None, dist_thre=None, out=None
+):
+    """
+    Convert depth image (float type) to point cloud (array of 3D position).
+
+    If out (array of [height * width, 3]) is given, the point cloud is written to its first rows, and the view
+    of these rows is returned.
+    """
+    height, width = depth_image.shape[:2]
+    ray_grid = getDepthImageRayGrid(height, width, float(fovy))
+    depth_array = depth_image.reshape(-1)
+    if rgb_image is not None:
+        rgb_array = rgb_image.reshape(-1, 3)
     if dist_thre:
-        dist_thre_indices = np.argwhere(depth_image.flatten() < dist_thre)[:, 0]
-        xyz_array = xyz_array[dist_thre_indices]
+        # Taking the indices is faster than boolean indexing of multi-dimensional arrays
+        dist_thre_indices = np.flatnonzero(depth_array < dist_thre)
+        ray_grid = ray_grid.take(dist_thre_indices, axis=0)
+        depth_array = depth_array.take(dist_thre_indices)
         if rgb_image is not None:
-            rgb_array = rgb_image.reshape(-1, 3)[dist_thre_indices]
+            rgb_array = rgb_array.take(dist_thre_indices, axis=0)
+    if out is None:
+        out = np.empty(
+            (len(depth_array), 3), dtype=np.result_type(np.float32, depth_image.dtype)
+        )
+    xyz_array = out[: len(depth_array)]
+    np.multiply(ray_grid, depth_array[:, np.newaxis], out=xyz_array[:, 0:2])
+    xyz_array[:, 2] = depth_array
     if rgb_image is None:
         return xyz_array
     else:
         rgb_array = rgb_array.astype(np.float32) / 255.0
         return xyz_array, rgb_array
+
+
+def transformPointCloud(xyz_array, pose):
+    """Transform point cloud from the local frame to the frame in which the local frame has pose (tx, ty, tz, qw, qx, qy, qz)."""
+    pose = np.asarray(pose, dtype=np.float64)
+    qw, qx, qy, qz = pose[3:7] / np.linalg.norm(pose[3:7])
+    rot = np.array(
+        [
+            [1 - 2 * (qy**2 + qz**2), 2 * (qx * qy - qz * qw), 2 * (qx * qz + qy * qw)],
+            [2 * (qx * qy + qz * qw), 1 - 2 * (qx**2 + qz**2), 2 * (qy * qz - qx * qw)],
+            [2 * (qx * qz - qy * qw), 2 * (qy * qz + qx * qw), 1 - 2 * (qx**2 + qy**2)],
+        ],
+        dtype=xyz_array.dtype,
+    )
+    return xyz_array @ rot.T + pose[0:3].astype(xyz_array.dtype)
+
+
+def downsamplePointCloud(xyz_array, rgb_array, voxel_size, num_points=None, rng=None):
+    """
+    Downsample point cloud with a voxel grid.
+
+    The points in each voxel are replaced by their centroid (and mean color). If num_points is given, the
+    voxels are randomly sampled (with replacement only if there are fewer voxels) so that exactly num_points
+    points are returned.
+    """
+    if len(xyz_array) == 0:
+        return xyz_array, rgb_array
+
+    voxel_idx_array = np.floor(xyz_array / voxel_size).astype(np.int32)
+    voxel_idx_array -= voxel_idx_array.min(axis=0)
+    voxel_dims = voxel_idx_array.max(axis=0) + 1
+    voxel_keys = np.ravel_multi_index(voxel_idx_array.T, voxel_dims)
+    _, voxel_inverse, voxel_counts = np.unique(
+        voxel_keys, return_inverse=True, return_counts=True
+    )
+
+    point_array = np.concatenate((xyz_array, rgb_array), axis=1)
+    downsampled_array = np.empty(
+        (len(voxel_counts), point_array.shape[1]), dtype=point_array.dtype
+    )
+    for dim_idx in range(point_array.shape[1]):
+        downsampled_array[:, dim_idx] = (
+            np.bincount(voxel_inverse, weights=point_array[:, dim_idx]) / voxel_counts
+        )
+
+    if num_points is not None and len(downsampled_array) > 0:
+        if rng is None:
+            rng = np.random.default_rng()
+        sample_indices = rng.choice(
+            len(downsampled_array),
+            num_points,
+            replace=len(downsampled_array) < num_points,
+        )
+        downsampled_array = downsampled_array[sample_indices]
+    return downsampled_array[:, :3], downsampled_array[:, 3:]
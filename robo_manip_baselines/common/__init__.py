@@ -1,4 +1,14 @@
 from .MotionManager import MotionManager
 from .DataManager import MotionStatus, DataKey, DataManager
 from .DataManagerVec import DataManagerVec
-from .VisionUtils import convertDepthImageToColorImage, convertDepthImageToPointCloud
+from .RecordingPolicy import RecordingPolicy
+from .ImageCodec import ImageCodec
+from .EpisodeCatalog import EpisodeCatalog, find_episode_files, find_shared_data_files
+from .VisionUtils import (
+    convertDepthImageToColorImage,
+    convertDepthImageToPointCloud,
+    transformPointCloud,
+)
+from .PointCloudViewer import PointCloudViewer
+from .LoopScheduler import LoopScheduler
+from .PhaseTimer import PhaseTimer
@@ -1,14 +1,23 @@
 from abc import ABCMeta, abstractmethod
+import os
 import sys
+import random
 import argparse
 import time
+import json
 import numpy as np
 import matplotlib
 import matplotlib.pylab as plt
 from matplotlib.backends.backend_agg import FigureCanvasAgg
 import cv2
 import torch
-from robo_manip_baselines.common import MotionManager, MotionStatus, DataManager
+from robo_manip_baselines.common import (
+    MotionManager,
+    MotionStatus,
+    DataManager,
+    LoopScheduler,
+    PhaseTimer,
+)
 
 
 class RolloutBase(metaclass=ABCMeta):
@@ -29,89 +38,266 @@ class RolloutBase(metaclass=ABCMeta):
         self.data_manager = DataManager(self.env)
         self.data_manager.setup_sim_world(self.args.world_idx)
 
+        # Setup loop scheduler
+        self.loop_scheduler = LoopScheduler(
+            self.env.unwrapped.dt, overrun_mode=self.args.overrun_mode
+        )
+
+        # Setup timer of the phases of control loop
+        self.phase_timer = PhaseTimer(
+            self.__class__.__name__,
+            summary_interval=self.args.timing_summary_interval,
+        )
+
     def run(self):
+        if self.args.eval:
+            self.run_eval()
+            return
+
         self.obs, self.info = self.env.reset(seed=self.args.seed)
+        self.loop_scheduler.start()
 
-        inference_duration_list = []
         while True:
-            st_time = time.time()
             if self.data_manager.status == MotionStatus.TELEOP:
-                inference_start_time = time.time()
+                inference_start_time = time.perf_counter()
                 inference_called = self.infer_policy()
-                inference_duration = time.time() - inference_start_time
+                # Only the steps in which the policy is actually inferred are recorded
                 if inference_called:
-                    inference_duration_list.append(inference_duration)
-            command_st_time = time.time()
-            self.set_arm_command()
-            self.set_gripper_command()
-            action_st_time = time.time()
-            action = self.motion_manager.get_action()
-            step_st_time = time.time()
-            self.obs, _, _, _, self.info = self.env.step(action)
-            step_end_time = time.time()
-            
-
-            
+                    self.phase_timer.record(
+                        "inference", time.perf_counter() - inference_start_time
+                    )
+            with self.phase_timer.phase("command"):
+                self.set_arm_command()
+                self.set_gripper_command()
+                action = self.motion_manager.get_action()
+            with self.phase_timer.phase("step"):
+                self.obs, _, _, _, self.info = self.env.step(action)
+
             if self.data_manager.status == MotionStatus.TELEOP:
-                self.draw_plot()
+                with self.phase_timer.phase("draw"):
+                    self.draw_plot()
 
             # Manage status
-            key = cv2.waitKey(1)
-            if self.data_manager.status == MotionStatus.INITIAL:
-                initial_duration = 1.0  # [s]
-                if (
-                    not self.args.wait_before_start
-                    and self.data_manager.status_elapsed_duration > initial_duration
-                ) or (self.args.wait_before_start and key == ord("n")):
-                    self.data_manager.go_to_next_status()
-            elif self.data_manager.status == MotionStatus.PRE_REACH:
-                pre_reach_duration = 0.7  # [s]
-                if self.data_manager.status_elapsed_duration > pre_reach_duration:
-                    self.data_manager.go_to_next_status()
-            elif self.data_manager.status == MotionStatus.REACH:
-                reach_duration = 0.3  # [s]
-                if self.data_manager.status_elapsed_duration > reach_duration:
-                    self.data_manager.go_to_next_status()
-            elif self.data_manager.status == MotionStatus.GRASP:
-                grasp_duration = 0.5  # [s]
-                if self.data_manager.status_elapsed_duration > grasp_duration:
-                    self.auto_time_idx = 0
+            with self.phase_timer.phase("ui"):
+                key = cv2.waitKey(1)
+            if self.manage_status(key):
+                break
+            if key == 27:  # escape key
+                break
+
+            self.loop_scheduler.wait(
+                record=self.data_manager.status == MotionStatus.TELEOP
+            )
+            self.phase_timer.record(
+                "iteration", self.loop_scheduler.last_iteration_duration
+            )
+            self.phase_timer.tick()
+
+        print("[RolloutBase] Statistics on policy rollout")
+        self.loop_scheduler.print_statistics()
+        self.report_timing()
+
+        # self.env.close()
+
+    def manage_status(self, key=-1):
+        """Manage the status of policy rollout, and return whether to finish policy rollout."""
+        if self.data_manager.status == MotionStatus.INITIAL:
+            initial_duration = 1.0  # [s]
+            if (
+                (not self.args.wait_before_start or self.args.eval)
+                and self.data_manager.status_elapsed_duration > initial_duration
+            ) or (self.args.wait_before_start and key == ord("n")):
+                self.data_manager.go_to_next_status()
+        elif self.data_manager.status == MotionStatus.PRE_REACH:
+            pre_reach_duration = 0.7  # [s]
+            if self.data_manager.status_elapsed_duration > pre_reach_duration:
+                self.data_manager.go_to_next_status()
+        elif self.data_manager.status == MotionStatus.REACH:
+            reach_duration = 0.3  # [s]
+            if self.data_manager.status_elapsed_duration > reach_duration:
+                self.data_manager.go_to_next_status()
+        elif self.data_manager.status == MotionStatus.GRASP:
+            grasp_duration = 0.5  # [s]
+            if self.data_manager.status_elapsed_duration > grasp_duration:
+                self.auto_time_idx = 0
+                if not self.args.eval:
                     print("[RolloutBase] Press the 'n' key to finish policy rollout.")
-                    self.data_manager.go_to_next_status()
-            elif self.data_manager.status == MotionStatus.TELEOP:
-                self.auto_time_idx += 1
-                if key == ord("n"):
-                    print("[RolloutBase] Statistics on policy inference")
-                    policy_model_size = self.calc_model_size()
-                    print(
-                        f"  - Policy model size [MB] | {policy_model_size / 1024**2:.2f}"
-                    )
-                    gpu_memory_usage = torch.cuda.max_memory_reserved()
-                    print(
-                        f"  - GPU memory usage [GB] | {gpu_memory_usage / 1024**3:.3f}"
-                    )
-                    inference_duration_list = np.array(inference_duration_list)
-                    print(
-                        "  - Inference duration [s] | "
-                        f"mean: {inference_duration_list.mean():.2e}, std: {inference_duration_list.std():.2e} "
-                        f"min: {inference_duration_list.min():.2e}, max: {inference_duration_list.max():.2e}"
-                    )
+                self.data_manager.go_to_next_status()
+        elif self.data_manager.status == MotionStatus.TELEOP:
+            self.auto_time_idx += 1
+            if key == ord("n") or (
+                self.args.max_steps is not None
+                and self.auto_time_idx >= self.args.max_steps
+            ):
+                if not self.args.eval:
+                    self.print_inference_statistics()
                     print("[RolloutBase] Press the 'n' key to exit.")
-                    self.data_manager.go_to_next_status()
-            elif self.data_manager.status == MotionStatus.END:
-                if key == ord("n"):
-                    break
-            if key == 27:  # escape key
+                self.data_manager.go_to_next_status()
+        elif self.data_manager.status == MotionStatus.END:
+            if key == ord("n"):
+                return True
+        return False
+
+    def run_eval(self):
+        """Evaluate the policy headlessly over the worlds and seeds, and write the metrics."""
+        episode_result_list = []
+        episode_num = len(self.args.eval_world_idx_list) * len(self.args.eval_seed_list)
+        eval_start_time = time.perf_counter()
+        for world_idx in self.args.eval_world_idx_list:
+            for seed in self.args.eval_seed_list:
+                episode_result = self.run_episode(world_idx, seed)
+                episode_result_list.append(episode_result)
+                print(
+                    f"[RolloutBase] Episode {len(episode_result_list)}/{episode_num} | "
+                    f"world_idx: {episode_result['world_idx']}, seed: {seed}, "
+                    f"success: {episode_result['success']}, steps: {episode_result['steps']}, "
+                    f"wall time: {episode_result['wall_time']:.1f} s"
+                )
+        eval_duration = time.perf_counter() - eval_start_time
+
+        metrics = self.calc_eval_metrics(episode_result_list, eval_duration)
+        print("[RolloutBase] Statistics on policy evaluation")
+        print(
+            f"  - Success rate | {metrics['success_rate']:.3f} "
+            f"({metrics['success_num']}/{metrics['episode_num']})"
+        )
+        for world_idx, success_rate in metrics["success_rate_per_world"].items():
+            print(f"    - world_idx {world_idx} | {success_rate:.3f}")
+        print(
+            f"  - Episode wall time [s] | mean: {metrics['timing']['episode_wall_time_mean']:.2f}, "
+            f"total: {metrics['timing']['total_wall_time']:.2f}"
+        )
+        self.print_inference_statistics()
+        self.report_timing()
+        if self.args.metrics_file is not None:
+            dirname = os.path.dirname(self.args.metrics_file)
+            if dirname != "":
+                os.makedirs(dirname, exist_ok=True)
+            with open(self.args.metrics_file, "w") as f:
+                json.dump(metrics, f, indent=2)
+            print(f"[RolloutBase] Save the metrics: {self.args.metrics_file}")
+
+    def run_episode(self, world_idx, seed):
+        """
+        Run an episode of policy rollout without windows and key inputs.
+
+        The statuses before the policy rollout proceed automatically, and the episode finishes when the task
+        succeeds or the policy rollout has run for max_steps control steps.
+        """
+        episode_start_time = time.perf_counter()
+
+        self.set_random_seed(seed)
+
+        self.motion_manager.reset()
+        self.data_manager.setup_sim_world(world_idx)
+        self.reset_policy()
+        self.obs, self.info = self.env.reset(seed=seed)
+        # Reset status after the environment so that the elapsed duration is measured from the reset time
+        self.data_manager.reset()
+
+        success = False
+        while True:
+            iteration_start_time = time.perf_counter()
+
+            if self.data_manager.status == MotionStatus.TELEOP:
+                inference_start_time = time.perf_counter()
+                inference_called = self.infer_policy()
+                if inference_called:
+                    self.phase_timer.record(
+                        "inference", time.perf_counter() - inference_start_time
+                    )
+            with self.phase_timer.phase("command"):
+                self.set_arm_command()
+                self.set_gripper_command()
+                action = self.motion_manager.get_action()
+            with self.phase_timer.phase("step"):
+                self.obs, _, _, _, self.info = self.env.step(action)
+
+            # Judge the success after updating the status so that the current step is counted in auto_time_idx
+            is_teleop = self.data_manager.status == MotionStatus.TELEOP
+            self.manage_status()
+            if is_teleop:
+                success = self.env.unwrapped.get_success()
+
+            self.phase_timer.record(
+                "iteration", time.perf_counter() - iteration_start_time
+            )
+            self.phase_timer.tick()
+
+            if success or self.data_manager.status == MotionStatus.END:
                 break
-            
+
+        return {
+            "world_idx": self.data_manager.world_idx,
+            "seed": seed,
+            "success": bool(success),
+            "steps": self.auto_time_idx,
+            "sim_duration": self.env.unwrapped.get_time(),
+            "wall_time": time.perf_counter() - episode_start_time,
+        }
+
+    def set_random_seed(self, seed):
+        """Seed the random number generators so that the policy rollout is reproducible."""
+        random.seed(seed)
+        np.random.seed(seed)
+        torch.manual_seed(seed)
+        torch.cuda.manual_seed_all(seed)
+
+    def calc_eval_metrics(self, episode_result_list, eval_duration):
+        """Calculate the metrics of policy evaluation from the results of episodes."""
+        success_list = [result["success"] for result in episode_result_list]
+        success_list_per_world = {}
+        for result in episode_result_list:
+            success_list_per_world.setdefault(str(result["world_idx"]), []).append(
+                result["success"]
+            )
+        inference_duration_list = self.phase_timer.phase("inference").get_durations()
+        return {
+            "policy": self.__class__.__name__,
+            "env": None if self.env.spec is None else self.env.spec.id,
+            "max_steps": self.args.max_steps,
+            "episode_num": len(success_list),
+            "success_num": int(np.sum(success_list)),
+            "success_rate": float(np.mean(success_list)),
+            "success_rate_per_world": {
+                world_idx: float(np.mean(_success_list))
+                for world_idx, _success_list in success_list_per_world.items()
+            },
+            "timing": {
+                "total_wall_time": eval_duration,
+                "episode_wall_time_mean": float(
+                    np.mean([result["wall_time"] for result in episode_result_list])
+                ),
+                "inference_duration_mean": (
+                    float(inference_duration_list.mean())
+                    if len(inference_duration_list) > 0
+                    else None
+                ),
+                "phases": self.phase_timer.get_summary(),
+            },
+            "episodes": episode_result_list,
+        }
+
+    def report_timing(self):
+        """Print the summary of the duration of phases, and export it to the timing file if given."""
+        self.phase_timer.print_summary()
+        if self.args.timing_file is not None:
+            self.phase_timer.export(self.args.timing_file)
+            print(f"[RolloutBase] Save the duration of phases: {self.args.timing_file}")
+
+    def print_inference_statistics(self):
+        print("[RolloutBase] Statistics on policy inference")
+        policy_model_size = self.calc_model_size()
+        print(f"  - Policy model size [MB] | {policy_model_size / 1024**2:.2f}")
+        gpu_memory_usage = torch.cuda.max_memory_reserved()
+        print(f"  - GPU memory usage [GB] | {gpu_memory_usage / 1024**3:.3f}")
+        inference_duration_list = self.phase_timer.phase("inference").get_durations()
+        if len(inference_duration_list) > 0:
             print(
-                f"status: {self.data_manager.status.name}, " +
-                f"inference time: {round(step_st_time - command_st_time, 3)}, " +
-                f"command time: {round(action_st_time - command_st_time, 3)}, " +
-                f"action time: {round(step_st_time - action_st_time, 3)}, " +
-                f"step time: {round(step_end_time - step_st_time, 3)}, " +
-                f"total time: {round(time.time() - st_time, 3)}")
-        # self.env.close()
+                "  - Inference duration [s] | "
+                f"mean: {inference_duration_list.mean():.2e}, std: {inference_duration_list.std():.2e} "
+                f"min: {inference_duration_list.min():.2e}, max: {inference_duration_list.max():.2e}"
+            )
 
     def setup_args(self, parser=None, argv=None):
         if parser is None:
@@ -141,6 +327,25 @@ class RolloutBase(metaclass=ABCMeta):
         parser.add_argument(
             "--seed", type=int, default=42, help="random seed", required=False
         )
+        parser.add_argument(
+            "--timing_summary_interval",
+            type=float,
+            default=None,
+            help="interval [s] to print the summary of the duration of the phases of control loop (if not given, print only at exit)",
+        )
+        parser.add_argument(
+            "--timing_file",
+            type=str,
+            default=None,
+            help="JSON or CSV file to export the summary of the duration of the phases of control loop at exit",
+        )
+        parser.add_argument(
+            "--overrun_mode",
+            type=str,
+            default="skip",
+            choices=LoopScheduler.overrun_mode_list,
+            help="behavior when a control step overruns its deadline (skip: skip the missed deadlines, catchup: run without sleeping until catching up, warn: warn and restart the deadlines)",
+        )
         parser.add_argument(
             "--win_xy_policy",
             type=int,
@@ -153,11 +358,49 @@ class RolloutBase(metaclass=ABCMeta):
             action="store_true",
             help="whether to wait a key input before starting simulation",
         )
+        parser.add_argument(
+            "--max_steps",
+            type=int,
+            default=None,
+            help="maximum number of steps of policy rollout (required in evaluation)",
+        )
+        parser.add_argument(
+            "--eval",
+            action="store_true",
+            help="whether to evaluate the policy headlessly over the worlds and seeds without windows and key inputs",
+        )
+        parser.add_argument(
+            "--eval_world_idx_list",
+            type=int,
+            nargs="+",
+            default=None,
+            help="indices of the simulation worlds to evaluate the policy (if not given, only --world_idx)",
+        )
+        parser.add_argument(
+            "--eval_seed_list",
+            type=int,
+            nargs="+",
+            default=None,
+            help="random seeds to evaluate the policy in each world (if not given, only --seed)",
+        )
+        parser.add_argument(
+            "--metrics_file",
+            type=str,
+            default=None,
+            help="JSON file to save the metrics (e.g., success rate) of policy evaluation",
+        )
 
         if argv is None:
             argv = sys.argv
         self.args = parser.parse_args(argv[1:])
 
+        if self.args.eval and self.args.max_steps is None:
+            parser.error("--max_steps is required in evaluation (--eval)")
+        if self.args.eval_world_idx_list is None:
+            self.args.eval_world_idx_list = [self.args.world_idx]
+        if self.args.eval_seed_list is None:
+            self.args.eval_seed_list = [self.args.seed]
+
     @abstractmethod
     def setup_policy(self):
         pass
@@ -166,6 +409,15 @@ class RolloutBase(metaclass=ABCMeta):
     def setup_env(self):
         pass
 
+    @property
+    def render_mode(self):
+        """Render mode of the environment (the environment is not rendered in evaluation)."""
+        return None if self.args.eval else "human"
+
+    def reset_policy(self):
+        # Intended to be overridden in derived classes
+        pass
+
     def setup_plot(self, fig_ax=None):
         matplotlib.use("agg")
         if fig_ax is None:
@@ -179,6 +431,8 @@ class RolloutBase(metaclass=ABCMeta):
             _ax.axis("off")
         self.canvas = FigureCanvasAgg(self.fig)
         self.canvas.draw()
+        if self.args.eval:
+            return
         policy_image = np.asarray(self.canvas.buffer_rgba())
         cv2.imshow("Policy image", cv2.cvtColor(policy_image, cv2.COLOR_RGB2BGR))
         if self.args.win_xy_policy is not None:
@@ -7,7 +7,7 @@ from .RolloutBase import RolloutBase
 class RolloutIsaacUR5eCabinet(RolloutBase):
     def setup_env(self):
         self.env = gym.make(
-            "robo_manip_baselines/IsaacUR5eCabinetEnv-v0", render_mode="human"
+            "robo_manip_baselines/IsaacUR5eCabinetEnv-v0", render_mode=self.render_mode
         )
 
     def set_arm_command(self):
@@ -18,6 +18,6 @@ class RolloutIsaacUR5eCabinet(RolloutBase):
             elif self.data_manager.status == MotionStatus.REACH:
                 target_pos += np.array([0.38, 0.0, 0.3])  # [m]
             self.motion_manager.target_se3.translation = target_pos
-            self.motion_manager.inverse_kinematics()
+            self.motion_manager.inverse_kinematics_until_converged()
         else:
             super().set_arm_command()
@@ -8,7 +8,7 @@ from .RolloutBase import RolloutBase
 class RolloutMujocoAlohaCable(RolloutBase):
     def setup_env(self):
         self.env = gym.make(
-            "robo_manip_baselines/MujocoAlohaCableEnv-v0", render_mode="human"
+            "robo_manip_baselines/MujocoAlohaCableEnv-v0", render_mode=self.render_mode
         )
 
     def set_arm_command(self):
@@ -24,6 +24,6 @@ class RolloutMujocoAlohaCable(RolloutBase):
             self.motion_manager.target_se3 = pin.SE3(
                 pin.rpy.rpyToMatrix(*target_rpy), target_pos
             )
-            self.motion_manager.inverse_kinematics()
+            self.motion_manager.inverse_kinematics_until_converged()
         else:
             super().set_arm_command()
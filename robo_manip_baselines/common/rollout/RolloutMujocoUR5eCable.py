@@ -8,7 +8,7 @@ from .RolloutBase import RolloutBase
 class RolloutMujocoUR5eCable(RolloutBase):
     def setup_env(self):
         self.env = gym.make(
-            "robo_manip_baselines/MujocoUR5eCableEnv-v0", render_mode="human"
+            "robo_manip_baselines/MujocoUR5eCableEnv-v0", render_mode=self.render_mode
         )
 
     def set_arm_command(self):
@@ -21,6 +21,6 @@ class RolloutMujocoUR5eCable(RolloutBase):
             self.motion_manager.target_se3 = pin.SE3(
                 np.diag([-1.0, 1.0, -1.0]), target_pos
             )
-            self.motion_manager.inverse_kinematics()
+            self.motion_manager.inverse_kinematics_until_converged()
         else:
             super().set_arm_command()
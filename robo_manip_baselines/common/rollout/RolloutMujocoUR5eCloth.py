@@ -8,7 +8,7 @@ from .RolloutBase import RolloutBase
 class RolloutMujocoUR5eCloth(RolloutBase):
     def setup_env(self):
         self.env = gym.make(
-            "robo_manip_baselines/MujocoUR5eClothEnv-v0", render_mode="human"
+            "robo_manip_baselines/MujocoUR5eClothEnv-v0", render_mode=self.render_mode
         )
 
     def set_arm_command(self):
@@ -25,7 +25,7 @@ class RolloutMujocoUR5eCloth(RolloutBase):
             elif self.data_manager.status == MotionStatus.REACH:
                 target_se3 *= pin.SE3(np.identity(3), np.array([0.0, -0.2, -0.3]))
             self.motion_manager.target_se3 = target_se3
-            self.motion_manager.inverse_kinematics()
+            self.motion_manager.inverse_kinematics_until_converged()
         else:
             super().set_arm_command()
 
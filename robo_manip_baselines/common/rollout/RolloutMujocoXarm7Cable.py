@@ -8,7 +8,7 @@ from .RolloutBase import RolloutBase
 class RolloutMujocoXarm7Cable(RolloutBase):
     def setup_env(self):
         self.env = gym.make(
-            "robo_manip_baselines/MujocoXarm7CableEnv-v0", render_mode="human"
+            "robo_manip_baselines/MujocoXarm7CableEnv-v0", render_mode=self.render_mode
         )
 
     def set_arm_command(self):
@@ -21,6 +21,6 @@ class RolloutMujocoXarm7Cable(RolloutBase):
             self.motion_manager.target_se3 = pin.SE3(
                 pin.rpy.rpyToMatrix(np.pi, 0.0, -np.pi / 2), target_pos
             )
-            self.motion_manager.inverse_kinematics()
+            self.motion_manager.inverse_kinematics_until_converged()
         else:
             super().set_arm_command()
@@ -8,7 +8,7 @@ from .RolloutBase import RolloutBase
 class RolloutMujocoXarm7Ring(RolloutBase):
     def setup_env(self):
         self.env = gym.make(
-            "robo_manip_baselines/MujocoXarm7RingEnv-v0", render_mode="human"
+            "robo_manip_baselines/MujocoXarm7RingEnv-v0", render_mode=self.render_mode
         )
 
     def set_arm_command(self):
@@ -24,6 +24,6 @@ class RolloutMujocoXarm7Ring(RolloutBase):
             self.motion_manager.target_se3 = pin.SE3(
                 pin.rpy.rpyToMatrix(0.0, 1.5 * np.pi, np.pi), target_pos
             )
-            self.motion_manager.inverse_kinematics()
+            self.motion_manager.inverse_kinematics_until_converged()
         else:
             super().set_arm_command()
@@ -48,6 +48,9 @@ class RolloutDiffusionPolicy(RolloutBase):
         self.joint_scales = [1.0] * (self.joint_dim - 1) + [0.01]
         self.image_size = tuple(cfg.task.image_shape[1:][::-1])
         self.n_obs_steps = cfg.n_obs_steps
+        self.reset_policy()
+
+    def reset_policy(self):
         self.front_image_history = None
         self.obs_joint_history = None
         self.future_action_seq = []
@@ -327,6 +327,7 @@ class IsaacUR5eEnvBase(gym.Env, metaclass=ABCMeta):
 
         self.obs_list = self._get_obs_list()
         self.info_list = self._get_info_list()
+        self.success_list = self._get_success_list()
 
         # Return only the results of the representative environment to comply with the Gym API
         return self.obs_list[self.rep_env_idx], self.info_list[self.rep_env_idx]
@@ -419,7 +420,8 @@ class IsaacUR5eEnvBase(gym.Env, metaclass=ABCMeta):
 
     def _get_info_list(self):
         # Update camera image
-        self.gym.clear_lines(self.viewer)
+        if self.render_mode == "human":
+            self.gym.clear_lines(self.viewer)
         self.gym.render_all_camera_sensors(self.sim)
 
         # Get camera images
@@ -444,8 +446,13 @@ class IsaacUR5eEnvBase(gym.Env, metaclass=ABCMeta):
         # Intended to be overridden in derived classes
         return [False] * self.num_envs
 
+    def get_success(self):
+        """Get whether the task is successful in the representative environment."""
+        return self.success_list[self.rep_env_idx]
+
     def close(self):
-        self.gym.destroy_viewer(self.viewer)
+        if self.render_mode == "human":
+            self.gym.destroy_viewer(self.viewer)
         self.gym.destroy_sim(self.sim)
 
     def render(self):
@@ -521,6 +528,10 @@ class IsaacUR5eEnvBase(gym.Env, metaclass=ABCMeta):
         )
         return camera_fovy
 
+    def get_camera_pose(self, camera_name):
+        """Get pose (tx, ty, tz, qw, qx, qy, qz) of the camera. None is returned because it is not available."""
+        return None
+
     @abstractmethod
     def modify_world(self, world_idx=None, cumulative_idx=None):
         """Modify simulation world depending on world index."""
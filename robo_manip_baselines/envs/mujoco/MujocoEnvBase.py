@@ -40,6 +40,8 @@ class MujocoEnvBase(MujocoEnv, metaclass=ABCMeta):
         self.setup_robot(init_qpos)
         self.setup_camera()
 
+        self._descendant_body_ids = {}
+
     @abstractmethod
     def setup_robot(self, init_qpos):
         pass
@@ -114,6 +116,14 @@ class MujocoEnvBase(MujocoEnv, metaclass=ABCMeta):
     def _get_reset_info(self):
         return self._get_info()
 
+    def _get_success(self):
+        # Intended to be overridden in derived classes
+        return False
+
+    def get_success(self):
+        """Get whether the task is successful in the current state."""
+        return self._get_success()
+
     def reset_model(self):
         self.set_state(self.init_qpos, self.init_qvel)
         return self._get_obs()
@@ -157,6 +167,25 @@ class MujocoEnvBase(MujocoEnv, metaclass=ABCMeta):
         mujoco.mju_mat2Quat(xquat, geom.xmat.flatten())
         return np.concatenate((geom.xpos, xquat))
 
+    def get_descendant_body_pos_list(self, body_name):
+        """Get positions (tx, ty, tz) of all descendant bodies of the body in order of body id."""
+        if body_name not in self._descendant_body_ids:
+            root_body_id = self.model.body(body_name).id
+            body_ids = []
+            for body_id in range(root_body_id + 1, self.model.nbody):
+                parent_body_id = self.model.body_parentid[body_id]
+                while parent_body_id > root_body_id:
+                    parent_body_id = self.model.body_parentid[parent_body_id]
+                if parent_body_id == root_body_id:
+                    body_ids.append(body_id)
+            self._descendant_body_ids[body_name] = np.array(body_ids, dtype=int)
+        return self.data.xpos[self._descendant_body_ids[body_name]].copy()
+
+    def get_body_geom_ids(self, body_name):
+        """Get ids of the geoms attached to the body."""
+        body = self.model.body(body_name)
+        return np.arange(body.geomadr[0], body.geomadr[0] + body.geomnum[0])
+
     @property
     def camera_names(self):
         """Camera names being measured."""
@@ -166,6 +195,28 @@ class MujocoEnvBase(MujocoEnv, metaclass=ABCMeta):
         """Get vertical field-of-view of the camera."""
         return self.model.cam(camera_name).fovy[0]
 
+    def get_camera_pose(self, camera_name):
+        """
+        Get pose (tx, ty, tz, qw, qx, qy, qz) of the camera.
+
+        The pose is that of the optical frame (the z-axis is the viewing direction and the y-axis points down in
+        the image), in which convertDepthImageToPointCloud returns the point cloud.
+        None is returned if the camera can move (e.g., a camera attached to the robot).
+        """
+        camera = self.model.cam(camera_name)
+        if (
+            self.model.body_weldid[camera.bodyid[0]] != 0
+            or camera.mode[0] != mujoco.mjtCamLight.mjCAMLIGHT_FIXED
+        ):
+            return None
+        # The camera of MuJoCo looks along its negative z-axis and its y-axis points up in the image
+        optical_mat = self.data.cam(camera_name).xmat.reshape(3, 3) @ np.diag(
+            [1.0, -1.0, -1.0]
+        )
+        xquat = np.zeros(4)
+        mujoco.mju_mat2Quat(xquat, optical_mat.flatten())
+        return np.concatenate((self.data.cam(camera_name).xpos, xquat))
+
     @abstractmethod
     def modify_world(self, world_idx=None, cumulative_idx=None):
         """Modify simulation world depending on world index."""
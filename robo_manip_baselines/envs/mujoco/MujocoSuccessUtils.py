@@ -0,0 +1,40 @@
+import numpy as np
+
+
+def is_chain_passed_between(chain_pos_list, pole_pos1, pole_pos2, pole_top_z):
+    """
+    Check whether the chain (e.g., cable) passes between the two poles.
+
+    chain_pos_list is a sequence of positions (tx, ty, tz) along the chain, and pole_pos1 and pole_pos2 are the
+    positions of the poles. It is checked whether a segment of the chain crosses the vertical plane through the
+    two poles between them and below the top of the poles (pole_top_z).
+    """
+    chain_pos_list = np.asarray(chain_pos_list)
+    pole_dir = np.asarray(pole_pos2[0:2]) - np.asarray(pole_pos1[0:2])
+    rel_pos_list = chain_pos_list[:, 0:2] - np.asarray(pole_pos1[0:2])
+    # Signed distance of the chain points from the line through the poles
+    side_list = pole_dir[0] * rel_pos_list[:, 1] - pole_dir[1] * rel_pos_list[:, 0]
+    for idx in np.flatnonzero((side_list[:-1] < 0.0) != (side_list[1:] < 0.0)):
+        ratio = side_list[idx] / (side_list[idx] - side_list[idx + 1])
+        cross_pos = chain_pos_list[idx] + ratio * (
+            chain_pos_list[idx + 1] - chain_pos_list[idx]
+        )
+        pole_ratio = np.dot(cross_pos[0:2] - pole_pos1[0:2], pole_dir) / np.dot(
+            pole_dir, pole_dir
+        )
+        if 0.0 < pole_ratio < 1.0 and cross_pos[2] < pole_top_z:
+            return True
+    return False
+
+
+def is_inside_polygon(point, polygon_pos_list):
+    """Check whether the point is inside the polygon in the xy plane (the z coordinates are ignored)."""
+    x, y = point[0], point[1]
+    polygon_pos_list = np.asarray(polygon_pos_list)[:, 0:2]
+    inside = False
+    for (x1, y1), (x2, y2) in zip(
+        polygon_pos_list, np.roll(polygon_pos_list, -1, axis=0)
+    ):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
@@ -1,6 +1,7 @@
 from os import path
 import numpy as np
 
+from ..MujocoSuccessUtils import is_chain_passed_between
 from .MujocoAlohaEnvBase import MujocoAlohaEnvBase
 
 
@@ -40,3 +41,15 @@ class MujocoAlohaCableEnv(MujocoAlohaEnvBase):
         self.model.geom("pole2").pos = self.model.geom("pole1").pos
         self.model.geom("pole2").pos[0] *= -1
         return world_idx
+
+    def _get_success(self):
+        # The cable passes between the two poles
+        pole_geom_ids = self.get_body_geom_ids("poles")
+        pole_pos1, pole_pos2 = self.data.geom_xpos[pole_geom_ids]
+        pole_top_z = np.max(
+            self.data.geom_xpos[pole_geom_ids, 2]
+            + self.model.geom_size[pole_geom_ids, 1]
+        )
+        return is_chain_passed_between(
+            self.get_descendant_body_pos_list("cable"), pole_pos1, pole_pos2, pole_top_z
+        )
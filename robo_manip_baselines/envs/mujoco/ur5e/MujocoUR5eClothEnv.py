@@ -52,3 +52,8 @@ class MujocoUR5eClothEnv(MujocoUR5eEnvBase):
             self.original_board_pos + self.pos_cloth_offsets[world_idx]
         )
         return world_idx
+
+    def _get_success(self):
+        # The whole cloth is rolled up above the initial center of the cloth
+        cloth_pos_list = self.get_descendant_body_pos_list("cloth")
+        return np.min(cloth_pos_list[:, 2]) > self.get_body_pose("cloth")[2]
@@ -48,3 +48,19 @@ class MujocoUR5eInsertEnv(MujocoUR5eEnvBase):
             self.original_hole_pos + self.hole_pos_offsets[world_idx]
         )
         return world_idx
+
+    def _get_success(self):
+        # The bottom of the peg is inserted into the hole by 2 cm
+        peg_geom_id = self.get_body_geom_ids("peg")[0]
+        peg_pos = self.data.geom_xpos[peg_geom_id]
+        peg_bottom_z = peg_pos[2] - self.model.geom_size[peg_geom_id, 2]
+        hole_geom_ids = self.get_body_geom_ids("hole")
+        hole_top_z = np.max(
+            self.data.geom_xpos[hole_geom_ids, 2]
+            + self.model.geom_size[hole_geom_ids, 2]
+        )
+        hole_pos = self.get_body_pose("hole")[0:3]
+        return (
+            np.linalg.norm(peg_pos[0:2] - hole_pos[0:2]) < 0.01
+            and peg_bottom_z < hole_top_z - 0.02
+        )
@@ -44,3 +44,20 @@ class MujocoUR5eParticleEnv(MujocoUR5eEnvBase):
             self.original_particle_pos + self.pos_offsets[world_idx]
         )
         return world_idx
+
+    def _get_success(self):
+        # At least 10 particles are scooped into the goal case (inside its walls and below their top)
+        goal_case_pos = self.get_body_pose("goal_case")[0:3]
+        wall_geom_ids = self.get_body_geom_ids("goal_case")
+        wall_top_z = np.max(
+            self.data.geom_xpos[wall_geom_ids, 2]
+            + self.model.geom_size[wall_geom_ids, 2]
+        )
+        particle_pos_list = self.get_descendant_body_pos_list("particle")
+        inside_num = np.count_nonzero(
+            np.all(
+                np.abs(particle_pos_list[:, 0:2] - goal_case_pos[0:2]) < 0.08, axis=1
+            )
+            & (particle_pos_list[:, 2] < wall_top_z)
+        )
+        return inside_num >= 10
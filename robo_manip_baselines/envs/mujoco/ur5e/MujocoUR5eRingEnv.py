@@ -1,6 +1,7 @@
 from os import path
 import numpy as np
 
+from ..MujocoSuccessUtils import is_inside_polygon
 from .MujocoUR5eEnvBase import MujocoUR5eEnvBase
 
 
@@ -48,3 +49,14 @@ class MujocoUR5eRingEnv(MujocoUR5eEnvBase):
             self.original_pole_pos + self.pole_pos_offsets[world_idx]
         )
         return world_idx
+
+    def _get_success(self):
+        # The ring surrounds the pole below its top
+        pole_geom_id = self.get_body_geom_ids("pole")[0]
+        pole_pos = self.data.geom_xpos[pole_geom_id]
+        pole_top_z = pole_pos[2] + self.model.geom_size[pole_geom_id, 1]
+        ring_pos_list = self.get_descendant_body_pos_list("ring")
+        return (
+            is_inside_polygon(pole_pos, ring_pos_list)
+            and np.mean(ring_pos_list[:, 2]) < pole_top_z
+        )
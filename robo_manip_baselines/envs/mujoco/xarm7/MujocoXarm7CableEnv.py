@@ -1,6 +1,7 @@
 from os import path
 import numpy as np
 
+from ..MujocoSuccessUtils import is_chain_passed_between
 from .MujocoXarm7EnvBase import MujocoXarm7EnvBase
 
 
@@ -38,3 +39,15 @@ class MujocoXarm7CableEnv(MujocoXarm7EnvBase):
             self.original_pole_pos + self.pole_pos_offsets[world_idx]
         )
         return world_idx
+
+    def _get_success(self):
+        # The cable passes between the two poles
+        pole_geom_ids = self.get_body_geom_ids("poles")
+        pole_pos1, pole_pos2 = self.data.geom_xpos[pole_geom_ids]
+        pole_top_z = np.max(
+            self.data.geom_xpos[pole_geom_ids, 2]
+            + self.model.geom_size[pole_geom_ids, 1]
+        )
+        return is_chain_passed_between(
+            self.get_descendant_body_pos_list("cable"), pole_pos1, pole_pos2, pole_top_z
+        )
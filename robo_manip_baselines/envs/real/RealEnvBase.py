@@ -149,6 +149,10 @@ class RealEnvBase(gym.Env, metaclass=ABCMeta):
             return 45.0  # dummy
         return camera.depth_fovy
 
+    def get_camera_pose(self, camera_name):
+        """Get pose (tx, ty, tz, qw, qx, qy, qz) of the camera. None is returned because it is not available."""
+        return None
+
     def modify_world(self, world_idx=None, cumulative_idx=None):
         """Modify simulation world depending on world index."""
         raise NotImplementedError("[RealEnvBase] modify_world is not implemented.")
@@ -130,6 +130,9 @@ class RolloutMtAct(RolloutBase):
         # Set variables
         self.joint_dim = 7
         self.joint_scales = [1.0] * 6 + [0.01]
+        self.reset_policy()
+
+    def reset_policy(self):
         self.pred_action_list = np.empty((0, self.joint_dim))
         self.all_actions_history = []
 
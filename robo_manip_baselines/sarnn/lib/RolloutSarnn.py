@@ -48,8 +48,6 @@ class RolloutSarnn(RolloutBase):
         self.joint_scales = [1.0] * (self.joint_dim - 1) + [0.01]
         self.im_size = 64
         self.v_min_max = [self.params["vmin"], self.params["vmax"]]
-        self.pred_action_list = np.empty((0, self.joint_dim))
-        self.rnn_state = None
 
         # Define model
         self.policy = SARNN(
@@ -69,6 +67,12 @@ class RolloutSarnn(RolloutBase):
         self.policy.load_state_dict(ckpt["model_state_dict"])
         self.policy.eval()
 
+        self.reset_policy()
+
+    def reset_policy(self):
+        self.pred_action_list = np.empty((0, self.joint_dim))
+        self.rnn_state = None
+
     def setup_plot(self):
         fig_ax = plt.subplots(1, 3, figsize=(13.5, 6.0), dpi=60, squeeze=False)
         super().setup_plot(fig_ax=fig_ax)
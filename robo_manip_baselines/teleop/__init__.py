@@ -1,2 +1,4 @@
 from .lib.TeleopBase import TeleopBase
 from .lib.TeleopBaseVec import TeleopBaseVec
+from .lib.SpaceMouseReader import SpaceMouseReader
+from .lib.DataSaveQueue import DataSaveQueue
@@ -0,0 +1,111 @@
+import threading
+import queue
+import time
+import atexit
+import traceback
+
+
+class DataSaveQueue(object):
+    """
+    Queue of data to be compressed and saved in a background thread.
+
+    The control loop submits a data manager that owns the finished data sequence (see DataManager.detach) and
+    starts the next demonstration without waiting for the disk I/O. The queue holds at most maxsize data, and
+    submit blocks while it is full so that the memory usage is bounded. The progress and errors are printed by
+    the saving thread, and the pending data are saved by close, which is also called at exit. If phase_timer is
+    given, the duration of saving is recorded as the "save" phase.
+    """
+
+    def __init__(self, maxsize=2, phase_timer=None):
+        self.phase_timer = phase_timer
+
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.thread = None
+
+        self.saved_filename_list = []
+        self.failed_filename_list = []
+
+    @property
+    def is_running(self):
+        return self.thread is not None
+
+    @property
+    def pending_num(self):
+        """Number of the data that have been submitted but not saved yet."""
+        return self.queue.unfinished_tasks
+
+    def start(self):
+        """Start the saving thread."""
+        if self.is_running:
+            return
+        self.thread = threading.Thread(target=self.save_loop, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def close(self):
+        """Wait until the pending data are saved and stop the saving thread."""
+        if not self.is_running:
+            return
+        if self.pending_num > 0:
+            print(
+                f"[DataSaveQueue] Wait until the {self.pending_num} pending data are saved."
+            )
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+        atexit.unregister(self.close)
+
+    def submit(self, data_manager, filename, compress_flag_dict=None):
+        """Submit the data to be compressed and saved as the file, which blocks while the queue is full."""
+        self.start()
+        if self.queue.full():
+            print(
+                f"[DataSaveQueue] Wait until the queue has room for {filename} ({self.pending_num} data pending)."
+            )
+        self.queue.put((data_manager, filename, compress_flag_dict))
+
+    @staticmethod
+    def save(data_manager, filename, compress_flag_dict=None):
+        """Compress and save the data of the data manager."""
+        # Streamed data has already been compressed during teleoperation
+        if not data_manager.is_streaming:
+            for key, compress_flag in (compress_flag_dict or {}).items():
+                data_manager.compress_data(key, compress_flag)
+        data_manager.save_data(filename)
+
+    def save_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                break
+            data_manager, filename, compress_flag_dict = item
+            start_time = time.perf_counter()
+            try:
+                self.save(data_manager, filename, compress_flag_dict)
+            except Exception:
+                self.failed_filename_list.append(filename)
+                print(f"[DataSaveQueue] Failed to save the data as {filename}")
+                traceback.print_exc()
+            else:
+                duration = time.perf_counter() - start_time
+                self.saved_filename_list.append(filename)
+                if self.phase_timer is not None:
+                    self.phase_timer.record("save", duration)
+                print(
+                    f"[DataSaveQueue] Save the data as {filename} "
+                    f"({duration:.1f} s, {self.pending_num - 1} data pending)"
+                )
+            finally:
+                # Release the data before waiting for the next one
+                del item, data_manager
+                self.queue.task_done()
+
+    def print_statistics(self):
+        if len(self.saved_filename_list) + len(self.failed_filename_list) == 0:
+            return
+        print(
+            f"  - Saved data | {len(self.saved_filename_list)} saved, {len(self.failed_filename_list)} failed"
+        )
+        for filename in self.failed_filename_list:
+            print(f"    - Failed: {filename}")
@@ -0,0 +1,109 @@
+import threading
+import queue
+import time
+import cv2
+
+
+class PreviewRenderer(object):
+    """
+    Renderer of preview windows in a background thread.
+
+    The control loop submits the latest frame to a single slot without waiting, and the frame that has not been
+    rendered yet is dropped when a newer one is submitted. The rendering thread converts the frame to window
+    images with render_func at the rate of fps and shows them. Because all OpenCV window functions are called
+    in the rendering thread, the keys pressed on the windows are routed back to the control loop by get_key.
+    If phase_timer is given, the duration of rendering is recorded as the "preview" phase.
+    """
+
+    def __init__(self, render_func, fps=30.0, phase_timer=None):
+        self.render_func = render_func
+        self.period = 1.0 / fps  # [s]
+        self.phase_timer = phase_timer
+
+        self.frame_condition = threading.Condition()
+        self.frame = None
+        self.key_queue = queue.SimpleQueue()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        self.submitted_num = 0
+        self.rendered_num = 0
+        self.dropped_num = 0
+        self.error = None
+
+    @property
+    def is_running(self):
+        return self.thread is not None
+
+    def start(self):
+        """Start the rendering thread."""
+        if self.is_running:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.render_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the rendering thread and close the windows."""
+        if not self.is_running:
+            return
+        self.stop_event.set()
+        with self.frame_condition:
+            self.frame_condition.notify()
+        self.thread.join()
+        self.thread = None
+
+    def submit(self, frame):
+        """Submit the latest frame to be rendered without waiting for the rendering."""
+        if self.error is not None:
+            raise RuntimeError(
+                "[PreviewRenderer] The rendering thread has stopped due to an error."
+            ) from self.error
+        with self.frame_condition:
+            if self.frame is not None:
+                self.dropped_num += 1
+            self.frame = frame
+            self.submitted_num += 1
+            self.frame_condition.notify()
+
+    def get_key(self):
+        """Get the key pressed on the windows, or -1 if no key is pressed."""
+        try:
+            return self.key_queue.get_nowait()
+        except queue.Empty:
+            return -1
+
+    def render_loop(self):
+        try:
+            next_time = time.monotonic()
+            while not self.stop_event.is_set():
+                with self.frame_condition:
+                    self.frame_condition.wait_for(
+                        lambda: self.frame is not None or self.stop_event.is_set(),
+                        timeout=self.period,
+                    )
+                    frame = self.frame
+                    self.frame = None
+                if frame is not None:
+                    start_time = time.perf_counter()
+                    for window_name, window_image in self.render_func(frame).items():
+                        cv2.imshow(window_name, window_image)
+                    if self.phase_timer is not None:
+                        self.phase_timer.record(
+                            "preview", time.perf_counter() - start_time
+                        )
+                    self.rendered_num += 1
+
+                # Process the window events even without new frames to keep the windows responsive
+                key = cv2.waitKey(1)
+                if key != -1:
+                    self.key_queue.put(key)
+
+                # Render at most at the specified rate
+                next_time = max(next_time + self.period, time.monotonic())
+                self.stop_event.wait(next_time - time.monotonic())
+        except Exception as e:
+            self.error = e
+            raise
+        finally:
+            cv2.destroyAllWindows()
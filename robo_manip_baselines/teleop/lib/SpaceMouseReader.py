@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import namedtuple
+import pyspacemouse
+
+SpaceMouseState = namedtuple(
+    "SpaceMouseState", ["t", "x", "y", "z", "roll", "pitch", "yaw", "buttons"]
+)
+
+AXIS_NAMES = ("x", "y", "z", "roll", "pitch", "yaw")
+
+
+class SpaceMouseReader(object):
+    """
+    Reader of SpaceMouse in a background thread.
+
+    The device is polled in a dedicated thread so that the control loop can get the latest state without
+    blocking on the device I/O. If integrate is True, the axes of the state returned by get_state are the
+    time-weighted mean of the states read since the previous call, so that the motion between control ticks
+    is not lost.
+    """
+
+    def __init__(self, poll_period=1e-3, integrate=False):
+        self.poll_period = poll_period  # [s]
+        self.integrate = integrate
+
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        self.state = SpaceMouseState(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, [0, 0])
+        self.state_time = None
+        self.integral_time = None
+        self.read_num = 0
+        self.reset_integral()
+
+    @property
+    def is_running(self):
+        return self.thread is not None
+
+    def start(self):
+        """Open the device and start polling it."""
+        if self.is_running:
+            return
+        if not pyspacemouse.open():
+            raise RuntimeError("[SpaceMouseReader] Failed to open SpaceMouse.")
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.poll, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop polling and close the device."""
+        if not self.is_running:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        pyspacemouse.close()
+
+    def poll(self):
+        while not self.stop_event.is_set():
+            state = pyspacemouse.read()
+            now = time.monotonic()
+            if state is not None:
+                with self.lock:
+                    if self.integrate and self.integral_time is not None:
+                        # Each state is held until the next one is read
+                        duration = now - self.integral_time
+                        for axis_name in AXIS_NAMES:
+                            self.axis_integral[axis_name] += (
+                                getattr(self.state, axis_name) * duration
+                            )
+                        self.integral_duration += duration
+                    self.state = state
+                    self.state_time = now
+                    self.integral_time = now
+                    self.read_num += 1
+            self.stop_event.wait(self.poll_period)
+
+    def reset_integral(self):
+        self.axis_integral = {axis_name: 0.0 for axis_name in AXIS_NAMES}
+        self.integral_duration = 0.0
+
+    def get_state(self):
+        """
+        Get the snapshot of the device state without blocking on the device I/O.
+
+        Returns the state and its latency [s], which is the elapsed time since the state was read from the
+        device (None if no state has been read yet).
+        """
+        with self.lock:
+            now = time.monotonic()
+            state = self.state
+            if self.integrate and self.integral_time is not None:
+                duration = now - self.integral_time
+                integral_duration = self.integral_duration + duration
+                if integral_duration > 0.0:
+                    state = state._replace(
+                        **{
+                            axis_name: (
+                                self.axis_integral[axis_name]
+                                + getattr(self.state, axis_name) * duration
+                            )
+                            / integral_duration
+                            for axis_name in AXIS_NAMES
+                        }
+                    )
+                self.reset_integral()
+                self.integral_time = now
+            if self.state_time is None:
+                latency = None
+            else:
+                latency = now - self.state_time
+        return state, latency
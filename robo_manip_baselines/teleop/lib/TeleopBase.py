@@ -1,20 +1,27 @@
 from abc import ABCMeta, abstractmethod
+import os
 import sys
 import argparse
-import time
 import datetime
 import numpy as np
 import cv2
-import matplotlib.pylab as plt
-import pyspacemouse
 from robo_manip_baselines.common import (
     MotionManager,
     MotionStatus,
+    PointCloudViewer,
     DataKey,
     DataManager,
+    RecordingPolicy,
+    ImageCodec,
+    LoopScheduler,
+    PhaseTimer,
     convertDepthImageToColorImage,
     convertDepthImageToPointCloud,
+    transformPointCloud,
 )
+from .SpaceMouseReader import SpaceMouseReader
+from .PreviewRenderer import PreviewRenderer
+from .DataSaveQueue import DataSaveQueue
 
 
 class TeleopBase(metaclass=ABCMeta):
@@ -34,23 +41,47 @@ class TeleopBase(metaclass=ABCMeta):
         DataManagerClass = getattr(self, "DataManagerClass", DataManager)
         self.data_manager = DataManagerClass(self.env, demo_name=self.demo_name)
         self.data_manager.setup_camera_info()
+        self.data_manager.catalog_dir = self.get_data_dir()
+        self.data_manager.image_codec = ImageCodec(
+            num_workers=self.args.codec_workers, jpg_quality=self.args.jpg_quality
+        )
         self.datetime_now = datetime.datetime.now()
 
-        # Setup 3D plot
+        # Setup recording policies, where the policies of the command line override those of the environment
+        self.setup_recording_policies()
+
+        # Setup timer of the phases of control loop
+        self.phase_timer = PhaseTimer(
+            self.__class__.__name__,
+            summary_interval=self.args.timing_summary_interval,
+        )
+
+        # Setup queue of data to be saved in a background thread
+        self.data_save_queue = DataSaveQueue(
+            maxsize=self.args.save_queue_size, phase_timer=self.phase_timer
+        )
+
+        # Setup preview renderer, which runs in a background thread during teleoperation
+        self.preview_renderer = PreviewRenderer(
+            self.render_image, fps=self.args.preview_fps, phase_timer=self.phase_timer
+        )
+        self.depth_preview_buffers = {}
+
+        # Setup point cloud viewer, which is rendered with the preview
         if self.args.enable_3d_plot:
-            plt.rcParams["keymap.quit"] = ["q", "escape"]
-            self.fig, self.ax = plt.subplots(
-                len(self.env.unwrapped.camera_names),
-                1,
-                subplot_kw=dict(projection="3d"),
-            )
-            self.fig.tight_layout()
-            self.point_cloud_scatter_list = [None] * len(
-                self.env.unwrapped.camera_names
-            )
+            self.point_cloud_viewer = PointCloudViewer()
+
+        # Setup loop scheduler
+        self.loop_scheduler = LoopScheduler(
+            self.env.unwrapped.dt, overrun_mode=self.args.overrun_mode
+        )
+
+        # Setup spacemouse, which is opened when teleoperation starts
+        self.spacemouse_reader = SpaceMouseReader(
+            integrate=self.args.integrate_spacemouse
+        )
 
         # Command configuration
-        self._spacemouse_connected = False
         self.command_pos_scale = 1e-2
         self.command_rpy_scale = 5e-3
         self.gripper_scale = 5.0
@@ -58,22 +89,22 @@ class TeleopBase(metaclass=ABCMeta):
     def run(self):
         self.reset_flag = True
         self.quit_flag = False
-        iteration_duration_list = []
+        device_latency_list = []
+        self.preview_renderer.start()
 
         while True:
-            iteration_start_time = time.time()
-
             # Reset
             if self.reset_flag:
                 self.reset()
                 self.reset_flag = False
+                # The time taken for reset is not regarded as an overrun
+                self.loop_scheduler.start()
 
             # Read spacemouse
             if self.data_manager.status == MotionStatus.TELEOP:
-                # Empirically, you can call read repeatedly to get the latest device status
-                for i in range(10):
-                    self.spacemouse_state = pyspacemouse.read()
-            
+                with self.phase_timer.phase("device"):
+                    self.read_spacemouse(device_latency_list)
+
             # Get action
             if self.args.replay_log is not None and self.data_manager.status in (
                 MotionStatus.TELEOP,
@@ -84,55 +115,63 @@ class TeleopBase(metaclass=ABCMeta):
                 )
             else:
                 # Set commands
-                self.set_arm_command()
-                self.set_gripper_command()
+                with self.phase_timer.phase("command"):
+                    self.set_arm_command()
+                    self.set_gripper_command()
 
                 # Solve IK
-                self.motion_manager.draw_markers()
-                self.motion_manager.inverse_kinematics()
-
-                action = self.motion_manager.get_action()
+                with self.phase_timer.phase("ik"):
+                    self.motion_manager.draw_markers()
+                    if self.data_manager.status in (
+                        MotionStatus.PRE_REACH,
+                        MotionStatus.REACH,
+                    ):
+                        # Approach the distant target of the reach phases with a limited joint displacement per tick
+                        self.motion_manager.inverse_kinematics_until_converged()
+                    else:
+                        self.motion_manager.inverse_kinematics()
+
+                    action = self.motion_manager.get_action()
 
             # Record data
             if (
                 self.data_manager.status == MotionStatus.TELEOP
                 and self.args.replay_log is None
             ):
-                self.record_data(obs, action, info)  # noqa: F821
+                with self.phase_timer.phase("record"):
+                    self.record_data(obs, action, info)  # noqa: F821
 
             # Step environment
-            obs, _, _, _, info = self.env.step(action)
+            with self.phase_timer.phase("step"):
+                obs, _, _, _, info = self.env.step(action)
 
             # Draw images
-            self.draw_image(info)
-
-            # Draw point clouds
-            if self.args.enable_3d_plot:
-                self.draw_point_cloud(info)
+            with self.phase_timer.phase("draw"):
+                self.draw_image(info)
 
             # Manage status
-            self.manage_status()
+            with self.phase_timer.phase("ui"):
+                self.manage_status()
             if self.quit_flag:
+                self.data_manager.discard_stream()
+                self.spacemouse_reader.stop()
+                self.preview_renderer.stop()
+                self.data_save_queue.close()
                 break
 
-            iteration_duration = time.time() - iteration_start_time
-            if self.data_manager.status == MotionStatus.TELEOP:
-                iteration_duration_list.append(iteration_duration)
-            if iteration_duration < self.env.unwrapped.dt:
-                time.sleep(self.env.unwrapped.dt - iteration_duration)
-            print(f"Step duration: {iteration_duration:.4f} seconds")
-
-        print("[TeleopBase] Statistics on teleoperation")
-        if len(iteration_duration_list) > 0:
-            iteration_duration_list = np.array(iteration_duration_list)
-            print(
-                f"  - Real-time factor | {self.env.unwrapped.dt / iteration_duration_list.mean():.2f}"
+            self.loop_scheduler.wait(
+                record=self.data_manager.status == MotionStatus.TELEOP
             )
-            print(
-                "  - Iteration duration [s] | "
-                f"mean: {iteration_duration_list.mean():.3f}, std: {iteration_duration_list.std():.3f} "
-                f"min: {iteration_duration_list.min():.3f}, max: {iteration_duration_list.max():.3f}"
+            self.phase_timer.record(
+                "iteration", self.loop_scheduler.last_iteration_duration
             )
+            self.phase_timer.tick()
+
+        print("[TeleopBase] Statistics on teleoperation")
+        self.loop_scheduler.print_statistics()
+        self.print_device_latency(device_latency_list)
+        self.data_save_queue.print_statistics()
+        self.report_phase_timer()
 
         # self.env.close()
 
@@ -144,7 +183,9 @@ class TeleopBase(metaclass=ABCMeta):
             "--demo_name", type=str, default=None, help="demonstration name"
         )
         parser.add_argument(
-            "--enable_3d_plot", action="store_true", help="whether to enable 3d plot"
+            "--enable_3d_plot",
+            action="store_true",
+            help="whether to enable 3d plot of point clouds",
         )
         parser.add_argument(
             "--compress_rgb", type=int, default=1, help="whether to compress rgb image"
@@ -153,7 +194,85 @@ class TeleopBase(metaclass=ABCMeta):
             "--compress_depth",
             type=int,
             default=0,
-            help="whether to compress depth image (slow)",
+            help="whether to compress depth image (slow if depth_compress_flag is exr)",
+        )
+        parser.add_argument(
+            "--depth_compress_flag",
+            type=str,
+            default="exr",
+            choices=["exr", "png"],
+            help="compression format of depth image (exr: lossless float, png: fast uint16 quantized in millimeters)",
+        )
+        parser.add_argument(
+            "--codec_workers",
+            type=int,
+            default=None,
+            help="number of threads to compress images (and to compress and save the data of each environment in vectorized teleoperation) (if not given, use all cores)",
+        )
+        parser.add_argument(
+            "--jpg_quality", type=int, default=95, help="quality of jpg compression"
+        )
+        parser.add_argument(
+            "--stream_data",
+            action="store_true",
+            help="whether to stream data to disk during teleoperation instead of keeping it in memory",
+        )
+        parser.add_argument(
+            "--record_policy",
+            type=str,
+            nargs="+",
+            default=[],
+            help='policies to record data given as "<key_pattern>:<option>[,<option>...]" with the options "interval=<k>", "size=<width>x<height>" and "skip" (e.g., "*_rgb_image:interval=2,size=320x240 hand_depth_image:skip")',
+        )
+        parser.add_argument(
+            "--save_queue_size",
+            type=int,
+            default=2,
+            help="maximum number of data waiting to be saved in the background, or 0 to save data synchronously (vectorized teleoperation always saves data synchronously)",
+        )
+        parser.add_argument(
+            "--data_format",
+            type=str,
+            default="npz",
+            choices=["npz", "rmb"],
+            help="format of data file (npz: single npz file, rmb: memory-mappable episode directory)",
+        )
+        parser.add_argument(
+            "--preview_depth_range",
+            type=float,
+            nargs=2,
+            default=None,
+            help="depth range (min, max) [m] of the preview of depth images (if not given, the range of each image is used)",
+        )
+        parser.add_argument(
+            "--overrun_mode",
+            type=str,
+            default="skip",
+            choices=LoopScheduler.overrun_mode_list,
+            help="behavior when a control step overruns its deadline (skip: skip the missed deadlines, catchup: run without sleeping until catching up, warn: warn and restart the deadlines)",
+        )
+        parser.add_argument(
+            "--timing_summary_interval",
+            type=float,
+            default=None,
+            help="interval [s] to print the summary of the duration of the phases of control loop (if not given, print only at exit)",
+        )
+        parser.add_argument(
+            "--timing_file",
+            type=str,
+            default=None,
+            help="JSON or CSV file to export the summary of the duration of the phases of control loop at exit",
+        )
+        parser.add_argument(
+            "--preview_fps",
+            type=float,
+            default=30.0,
+            help="maximum frame rate of the preview rendered in the background",
+        )
+        parser.add_argument(
+            "--integrate_spacemouse",
+            action="store_true",
+            help="whether to use the mean of the spacemouse motion between control steps instead of the latest state",
         )
         parser.add_argument(
             "--world_idx_list",
@@ -180,6 +299,11 @@ class TeleopBase(metaclass=ABCMeta):
         self.motion_manager.reset()
         if self.args.replay_log is None:
             self.data_manager.reset()
+            if self.args.stream_data:
+                self.data_manager.start_stream(
+                    os.path.join(self.get_data_dir(), ".stream"),
+                    self.get_compress_flag_dict(),
+                )
             if self.args.world_idx_list is None:
                 world_idx = None
             else:
@@ -194,6 +318,8 @@ class TeleopBase(metaclass=ABCMeta):
             world_idx = self.data_manager.get_data("world_idx").tolist()
         self.data_manager.setup_sim_world(world_idx)
         obs, info = self.env.reset()
+        if self.args.replay_log is None:
+            self.setup_data_schema(obs, info)
         print(
             "[{}] data_idx: {}, world_idx: {}".format(
                 self.demo_name,
@@ -203,6 +329,44 @@ class TeleopBase(metaclass=ABCMeta):
         )
         print("[TeleopBase] Press the 'n' key to start automatic grasping.")
 
+    def setup_recording_policies(self):
+        """Setup the recording policies of data manager from default_record_policy_list and the command line."""
+        recording_policy_list = [
+            RecordingPolicy.from_str(policy_str)
+            for policy_str in getattr(self, "default_record_policy_list", [])
+            + self.args.record_policy
+        ]
+        self.data_manager.set_recording_policies(recording_policy_list)
+        for key_pattern, policy in recording_policy_list:
+            print(
+                f"[{self.__class__.__name__}] Recording policy of {key_pattern}: {policy}"
+            )
+
+    def read_spacemouse(self, device_latency_list=None):
+        """Get the latest spacemouse state from the background reader without blocking."""
+        self.spacemouse_state, device_latency = self.spacemouse_reader.get_state()
+        if device_latency_list is not None and device_latency is not None:
+            device_latency_list.append(device_latency)
+
+    def print_device_latency(self, device_latency_list):
+        if len(device_latency_list) == 0:
+            return
+        device_latency_list = np.array(device_latency_list)
+        print(
+            "  - Device latency [s] | "
+            f"mean: {device_latency_list.mean():.4f}, std: {device_latency_list.std():.4f} "
+            f"min: {device_latency_list.min():.4f}, max: {device_latency_list.max():.4f} "
+            f"(read {self.spacemouse_reader.read_num} times)"
+        )
+
+    def report_phase_timer(self):
+        self.phase_timer.print_summary()
+        if self.args.timing_file is not None:
+            self.phase_timer.export(self.args.timing_file)
+            print(
+                f"[{self.__class__.__name__}] Save the duration of phases: {self.args.timing_file}"
+            )
+
     def set_arm_command(self):
         if self.data_manager.status == MotionStatus.TELEOP:
             delta_pos = self.command_pos_scale * np.array(
@@ -238,6 +402,28 @@ class TeleopBase(metaclass=ABCMeta):
             ):
                 self.motion_manager.gripper_pos -= self.gripper_scale
 
+    def setup_data_schema(self, obs, info):
+        """Register the shape and dtype of the recorded data to preallocate the buffers."""
+        data_dict = {
+            DataKey.TIME: self.data_manager.status_elapsed_duration,
+            DataKey.MEASURED_JOINT_POS: self.motion_manager.get_joint_pos(obs),
+            DataKey.COMMAND_JOINT_POS: self.motion_manager.get_action(),
+            DataKey.MEASURED_JOINT_VEL: self.motion_manager.get_joint_vel(obs),
+            DataKey.MEASURED_EEF_POSE: self.motion_manager.get_measured_eef(obs),
+            DataKey.COMMAND_EEF_POSE: self.motion_manager.get_command_eef(),
+            DataKey.MEASURED_EEF_WRENCH: self.motion_manager.get_eef_wrench(obs),
+        }
+        for camera_name in self.env.unwrapped.camera_names:
+            data_dict[DataKey.get_rgb_image_key(camera_name)] = info["rgb_images"][
+                camera_name
+            ]
+            data_dict[DataKey.get_depth_image_key(camera_name)] = info["depth_images"][
+                camera_name
+            ]
+        for key, data in data_dict.items():
+            data = np.asarray(data)
+            self.data_manager.register_data_key(key, data.shape, data.dtype)
+
     def record_data(self, obs, action, info):
         self.data_manager.append_single_data(
             DataKey.TIME, self.data_manager.status_elapsed_duration
@@ -269,11 +455,22 @@ class TeleopBase(metaclass=ABCMeta):
             )
 
     def draw_image(self, info):
-        status_image = self.data_manager.get_status_image()
+        """Submit the images to the preview renderer without waiting for the rendering."""
+        self.preview_renderer.submit(
+            {
+                "rgb_images": info["rgb_images"],
+                "depth_images": info["depth_images"],
+                "status_image": self.data_manager.get_status_image(),
+            }
+        )
+
+    def render_image(self, frame):
+        """Render the preview window image from the frame (called in the thread of preview renderer)."""
+        status_image = frame["status_image"]
         rgb_images = []
         depth_images = []
         for camera_name in self.env.unwrapped.camera_names:
-            rgb_image = info["rgb_images"][camera_name]
+            rgb_image = frame["rgb_images"][camera_name]
             image_ratio = rgb_image.shape[1] / rgb_image.shape[0]
             resized_image_width = status_image.shape[1] / 2
             resized_image_size = (
@@ -281,10 +478,28 @@ class TeleopBase(metaclass=ABCMeta):
                 int(resized_image_width / image_ratio),
             )
             rgb_images.append(cv2.resize(rgb_image, resized_image_size))
-            depth_image = convertDepthImageToColorImage(
-                info["depth_images"][camera_name]
+            # Depth image is colorized after resizing into the buffer reused in each step
+            depth_image = cv2.resize(
+                frame["depth_images"][camera_name],
+                resized_image_size,
+                interpolation=cv2.INTER_NEAREST,
+            )
+            depth_preview_buffer = self.depth_preview_buffers.get(camera_name)
+            if (
+                depth_preview_buffer is None
+                or depth_preview_buffer.shape[:2] != depth_image.shape[:2]
+            ):
+                depth_preview_buffer = np.empty(
+                    depth_image.shape[:2] + (3,), dtype=np.uint8
+                )
+                self.depth_preview_buffers[camera_name] = depth_preview_buffer
+            depth_images.append(
+                convertDepthImageToColorImage(
+                    depth_image,
+                    depth_range=self.args.preview_depth_range,
+                    out=depth_preview_buffer,
+                )
             )
-            depth_images.append(cv2.resize(depth_image, resized_image_size))
         window_image = cv2.vconcat(
             (
                 cv2.hconcat((cv2.vconcat(rgb_images), cv2.vconcat(depth_images))),
@@ -295,57 +510,55 @@ class TeleopBase(metaclass=ABCMeta):
             "image",
             flags=(cv2.WINDOW_AUTOSIZE | cv2.WINDOW_KEEPRATIO | cv2.WINDOW_GUI_NORMAL),
         )
-        cv2.imshow("image", cv2.cvtColor(window_image, cv2.COLOR_RGB2BGR))
+        window_image_dict = {"image": cv2.cvtColor(window_image, cv2.COLOR_RGB2BGR)}
 
-    def draw_point_cloud(self, info):
+        if self.args.enable_3d_plot:
+            self.draw_point_cloud(frame)
+            self.point_cloud_viewer.setup_window()
+            window_image_dict[self.point_cloud_viewer.window_name] = cv2.cvtColor(
+                self.point_cloud_viewer.render(), cv2.COLOR_RGB2BGR
+            )
+
+        return window_image_dict
+
+    def draw_point_cloud(self, frame):
+        """Set the point clouds of the frame to the viewer (called in the thread of preview renderer)."""
         dist_thre_list = (3.0, 3.0, 0.8)  # [m]
         for camera_idx, camera_name in enumerate(self.env.unwrapped.camera_names):
             point_cloud_skip = 10
-            small_depth_image = info["depth_images"][camera_name][
+            small_depth_image = frame["depth_images"][camera_name][
                 ::point_cloud_skip, ::point_cloud_skip
             ]
-            small_rgb_image = info["rgb_images"][camera_name][
+            small_rgb_image = frame["rgb_images"][camera_name][
                 ::point_cloud_skip, ::point_cloud_skip
             ]
-            fovy = self.data_manager.camera_info[
-                DataKey.get_depth_image_key(camera_name) + "_fovy"
-            ]
+            depth_key = DataKey.get_depth_image_key(camera_name)
+            fovy = self.data_manager.camera_info[depth_key + "_fovy"]
             xyz_array, rgb_array = convertDepthImageToPointCloud(
                 small_depth_image,
                 fovy=fovy,
                 rgb_image=small_rgb_image,
                 dist_thre=dist_thre_list[camera_idx],
             )
-            if self.point_cloud_scatter_list[camera_idx] is None:
-
-                def get_min_max(v_min, v_max):
-                    return (
-                        0.75 * v_min + 0.25 * v_max,
-                        0.25 * v_min + 0.75 * v_max,
-                    )
-
-                self.ax[camera_idx].view_init(elev=-90, azim=-90)
-                self.ax[camera_idx].set_xlim(
-                    *get_min_max(xyz_array[:, 0].min(), xyz_array[:, 0].max())
-                )
-                self.ax[camera_idx].set_ylim(
-                    *get_min_max(xyz_array[:, 1].min(), xyz_array[:, 1].max())
-                )
-                self.ax[camera_idx].set_zlim(
-                    *get_min_max(xyz_array[:, 2].min(), xyz_array[:, 2].max())
+            # The point clouds of the static cameras are merged in the world frame
+            camera_pose = self.data_manager.camera_info.get(depth_key + "_pose")
+            if camera_pose is None:
+                self.point_cloud_viewer.set_point_cloud(
+                    camera_name, camera_name, xyz_array, rgb_array
                 )
             else:
-                self.point_cloud_scatter_list[camera_idx].remove()
-            self.ax[camera_idx].axis("off")
-            self.ax[camera_idx].set_box_aspect(xyz_array.ptp(axis=0))
-            self.point_cloud_scatter_list[camera_idx] = self.ax[camera_idx].scatter(
-                xyz_array[:, 0], xyz_array[:, 1], xyz_array[:, 2], c=rgb_array
-            )
-        plt.draw()
-        plt.pause(0.001)
+                self.point_cloud_viewer.set_point_cloud(
+                    "world",
+                    camera_name,
+                    transformPointCloud(xyz_array, camera_pose),
+                    rgb_array,
+                    frame="world",
+                )
 
     def manage_status(self):
-        key = cv2.waitKey(1)
+        key = self.preview_renderer.get_key()
+        if self.args.enable_3d_plot and self.point_cloud_viewer.handle_key(key):
+            key = -1
         if self.data_manager.status == MotionStatus.INITIAL:
             if key == ord("n"):
                 self.data_manager.go_to_next_status()
@@ -363,9 +576,8 @@ class TeleopBase(metaclass=ABCMeta):
         elif self.data_manager.status == MotionStatus.GRASP:
             if key == ord("n"):
                 # Setup spacemouse
-                if (self.args.replay_log is None) and (not self._spacemouse_connected):
-                    self._spacemouse_connected = True
-                    pyspacemouse.open()
+                if self.args.replay_log is None:
+                    self.spacemouse_reader.start()
                 self.teleop_time_idx = 0
                 if self.args.replay_log is None:
                     print("[TeleopBase] Press the 'n' key to finish teleoperation.")
@@ -405,29 +617,54 @@ class TeleopBase(metaclass=ABCMeta):
         if key == 27:  # escape key
             self.quit_flag = True
 
+    def get_data_dir(self):
+        return "teleop_data/{}_{:%Y%m%d_%H%M%S}".format(
+            self.demo_name, self.datetime_now
+        )
+
+    def get_compress_flag_dict(self):
+        compress_flag_dict = {}
+        for camera_name in self.env.unwrapped.camera_names:
+            if self.args.compress_rgb:
+                compress_flag_dict[DataKey.get_rgb_image_key(camera_name)] = "jpg"
+            if self.args.compress_depth:
+                compress_flag_dict[DataKey.get_depth_image_key(camera_name)] = (
+                    self.args.depth_compress_flag
+                )
+        # The keys that are not recorded are not compressed
+        for key in list(compress_flag_dict.keys()):
+            policy = self.data_manager.get_recording_policy(key)
+            if policy is not None and policy.skip:
+                del compress_flag_dict[key]
+        return compress_flag_dict
+
     def save_data(self, filename=None):
         if filename is None:
-            filename = "teleop_data/{}_{:%Y%m%d_%H%M%S}/env{:0>1}/{}_env{:0>1}_{:0>3}.npz".format(
-                self.demo_name,
-                self.datetime_now,
+            filename = "{}/env{:0>1}/{}_env{:0>1}_{:0>3}.{}".format(
+                self.get_data_dir(),
                 self.data_manager.world_idx,
                 self.demo_name,
                 self.data_manager.world_idx,
                 self.data_manager.data_idx,
+                self.args.data_format,
+            )
+        if self.args.save_queue_size == 0:
+            DataSaveQueue.save(
+                self.data_manager, filename, self.get_compress_flag_dict()
             )
-        if self.args.compress_rgb:
-            print("[TeleopBase] Compress rgb images")
-            for camera_name in self.env.unwrapped.camera_names:
-                self.data_manager.compress_data(
-                    DataKey.get_rgb_image_key(camera_name), "jpg"
+            print(
+                "[TeleopBase] Teleoperation succeeded: Save the data as {}".format(
+                    filename
                 )
-        if self.args.compress_depth:
-            print("[TeleopBase] Compress depth images")
-            for camera_name in self.env.unwrapped.camera_names:
-                self.data_manager.compress_data(
-                    DataKey.get_depth_image_key(camera_name), "exr"
+            )
+        else:
+            # The data are handed over to the saving thread so that the next teleoperation can be started
+            # immediately
+            self.data_save_queue.submit(
+                self.data_manager.detach(), filename, self.get_compress_flag_dict()
+            )
+            print(
+                "[TeleopBase] Teleoperation succeeded: Queue the data to be saved as {}".format(
+                    filename
                 )
-        self.data_manager.save_data(filename)
-        print(
-            "[TeleopBase] Teleoperation succeeded: Save the data as {}".format(filename)
-        )
+            )
@@ -1,6 +1,3 @@
-import time
-import numpy as np
-import pyspacemouse
 from robo_manip_baselines.common import MotionStatus, DataKey, DataManagerVec
 from .TeleopBase import TeleopBase
 
@@ -11,14 +8,18 @@ class TeleopBaseVec(TeleopBase):
 
         super().__init__()
 
+        if self.args.stream_data:
+            raise NotImplementedError(
+                '[TeleopBaseVec] The "stream_data" option is not supported.'
+            )
+
     def run(self):
         self.reset_flag = True
         self.quit_flag = False
-        iteration_duration_list = []
+        device_latency_list = []
+        self.preview_renderer.start()
 
         while True:
-            iteration_start_time = time.time()
-
             # Reset
             if self.reset_flag:
                 self.motion_manager.reset()
@@ -54,12 +55,13 @@ class TeleopBaseVec(TeleopBase):
                 )
                 print("[TeleopBaseVec] Press the 'n' key to start automatic grasping.")
                 self.reset_flag = False
+                # The time taken for reset is not regarded as an overrun
+                self.loop_scheduler.start()
 
             # Read spacemouse
             if self.data_manager.status == MotionStatus.TELEOP:
-                # Empirically, you can call read repeatedly to get the latest device status
-                for i in range(10):
-                    self.spacemouse_state = pyspacemouse.read()
+                with self.phase_timer.phase("device"):
+                    self.read_spacemouse(device_latency_list)
 
             # Get action
             if self.args.replay_log is not None and self.data_manager.status in (
@@ -71,14 +73,23 @@ class TeleopBaseVec(TeleopBase):
                 )
             else:
                 # Set commands
-                self.set_arm_command()
-                self.set_gripper_command()
+                with self.phase_timer.phase("command"):
+                    self.set_arm_command()
+                    self.set_gripper_command()
 
                 # Solve IK
-                self.motion_manager.draw_markers()
-                self.motion_manager.inverse_kinematics()
+                with self.phase_timer.phase("ik"):
+                    self.motion_manager.draw_markers()
+                    if self.data_manager.status in (
+                        MotionStatus.PRE_REACH,
+                        MotionStatus.REACH,
+                    ):
+                        # Approach the distant target of the reach phases with a limited joint displacement per tick
+                        self.motion_manager.inverse_kinematics_until_converged()
+                    else:
+                        self.motion_manager.inverse_kinematics()
 
-                action = self.motion_manager.get_action()
+                    action = self.motion_manager.get_action()
                 update_fluctuation = self.data_manager.status == MotionStatus.TELEOP
                 action_list = self.env.unwrapped.get_fluctuated_action_list(
                     action, update_fluctuation
@@ -89,84 +100,78 @@ class TeleopBaseVec(TeleopBase):
                 self.data_manager.status == MotionStatus.TELEOP
                 and self.args.replay_log is None
             ):
-                self.data_manager.append_single_data(
-                    DataKey.TIME,
-                    [self.data_manager.status_elapsed_duration]
-                    * self.env.unwrapped.num_envs,
-                )
-                self.data_manager.append_single_data(
-                    DataKey.MEASURED_JOINT_POS,
-                    [self.motion_manager.get_joint_pos(obs) for obs in obs_list],
-                )
-                self.data_manager.append_single_data(
-                    DataKey.COMMAND_JOINT_POS, action_list
-                )
-                self.data_manager.append_single_data(
-                    DataKey.MEASURED_JOINT_VEL,
-                    [self.motion_manager.get_joint_vel(obs) for obs in obs_list],
-                )
-                self.data_manager.append_single_data(
-                    DataKey.MEASURED_EEF_POSE,
-                    [self.motion_manager.get_measured_eef(obs) for obs in obs_list],
-                )
-                # TODO: COMMAND_EEF_POSE does not reflect the effect of action fluctuation
-                self.data_manager.append_single_data(
-                    DataKey.COMMAND_EEF_POSE,
-                    [self.motion_manager.get_command_eef()]
-                    * self.env.unwrapped.num_envs,
-                )
-                self.data_manager.append_single_data(
-                    DataKey.MEASURED_EEF_WRENCH,
-                    [self.motion_manager.get_eef_wrench(obs) for obs in obs_list],
-                )
-                for camera_name in self.env.unwrapped.camera_names:
-                    self.data_manager.append_single_data(
-                        DataKey.get_rgb_image_key(camera_name),
-                        [info["rgb_images"][camera_name] for info in info_list],
-                    )
-                    self.data_manager.append_single_data(
-                        DataKey.get_depth_image_key(camera_name),
-                        [info["depth_images"][camera_name] for info in info_list],
-                    )
+                with self.phase_timer.phase("record"):
+                    self.record_data(obs_list, action_list, info_list)
 
             # Step environment
-            self.env.unwrapped.action_list = action_list
-            self.env.step(action)
-            obs_list = self.env.unwrapped.obs_list
-            info_list = self.env.unwrapped.info_list
+            with self.phase_timer.phase("step"):
+                self.env.unwrapped.action_list = action_list
+                self.env.step(action)
+                obs_list = self.env.unwrapped.obs_list
+                info_list = self.env.unwrapped.info_list
 
             # Draw images
-            self.drawImage(info_list[self.env.unwrapped.rep_env_idx])
-
-            # Draw point clouds
-            if self.args.enable_3d_plot:
-                self.drawPointCloud(info_list[[self.env.unwrapped.rep_env_idx]])
+            with self.phase_timer.phase("draw"):
+                self.draw_image(info_list[self.env.unwrapped.rep_env_idx])
 
             # Manage status
-            self.manage_status()
+            with self.phase_timer.phase("ui"):
+                self.manage_status()
             if self.quit_flag:
+                self.spacemouse_reader.stop()
+                self.preview_renderer.stop()
                 break
 
-            iteration_duration = time.time() - iteration_start_time
-            if self.data_manager.status == MotionStatus.TELEOP:
-                iteration_duration_list.append(iteration_duration)
-            if iteration_duration < self.env.unwrapped.dt:
-                time.sleep(self.env.unwrapped.dt - iteration_duration)
-
-        print("[TeleopBaseVec] Statistics on teleoperation")
-        if len(iteration_duration_list) > 0:
-            iteration_duration_list = np.array(iteration_duration_list)
-            print(
-                f"  - Real-time factor | {self.env.unwrapped.dt / iteration_duration_list.mean():.2f}"
+            self.loop_scheduler.wait(
+                record=self.data_manager.status == MotionStatus.TELEOP
             )
-            print(
-                "  - Iteration duration [s] | "
-                f"mean: {iteration_duration_list.mean():.3f}, std: {iteration_duration_list.std():.3f} "
-                f"min: {iteration_duration_list.min():.3f}, max: {iteration_duration_list.max():.3f}"
+            self.phase_timer.record(
+                "iteration", self.loop_scheduler.last_iteration_duration
             )
+            self.phase_timer.tick()
+
+        print("[TeleopBaseVec] Statistics on teleoperation")
+        self.loop_scheduler.print_statistics()
+        self.print_device_latency(device_latency_list)
+        self.report_phase_timer()
 
         # self.env.close()
 
+    def record_data(self, obs_list, action_list, info_list):
+        self.data_manager.append_shared_single_data(
+            DataKey.TIME, self.data_manager.status_elapsed_duration
+        )
+        self.data_manager.append_single_data(
+            DataKey.MEASURED_JOINT_POS,
+            [self.motion_manager.get_joint_pos(obs) for obs in obs_list],
+        )
+        self.data_manager.append_single_data(DataKey.COMMAND_JOINT_POS, action_list)
+        self.data_manager.append_single_data(
+            DataKey.MEASURED_JOINT_VEL,
+            [self.motion_manager.get_joint_vel(obs) for obs in obs_list],
+        )
+        self.data_manager.append_single_data(
+            DataKey.MEASURED_EEF_POSE,
+            self.motion_manager.get_measured_eef_batch(obs_list),
+        )
+        # TODO: COMMAND_EEF_POSE does not reflect the effect of action fluctuation
+        self.data_manager.append_shared_single_data(
+            DataKey.COMMAND_EEF_POSE, self.motion_manager.get_command_eef()
+        )
+        self.data_manager.append_single_data(
+            DataKey.MEASURED_EEF_WRENCH,
+            [self.motion_manager.get_eef_wrench(obs) for obs in obs_list],
+        )
+        for camera_name in self.env.unwrapped.camera_names:
+            self.data_manager.append_single_data(
+                DataKey.get_rgb_image_key(camera_name),
+                [info["rgb_images"][camera_name] for info in info_list],
+            )
+            self.data_manager.append_single_data(
+                DataKey.get_depth_image_key(camera_name),
+                [info["depth_images"][camera_name] for info in info_list],
+            )
+
     def save_data(self):
         filename_list = []
         aug_idx = 0
@@ -179,33 +184,24 @@ class TeleopBaseVec(TeleopBase):
             else:
                 extra_label = f"augmented{aug_idx:0>3}"
                 aug_idx += 1
-            filename = "teleop_data/{}_{:%Y%m%d_%H%M%S}/env{:0>1}/{}_env{:0>1}_{:0>3}_{}.npz".format(
-                self.demo_name,
-                self.datetime_now,
+            filename = "{}/env{:0>1}/{}_env{:0>1}_{:0>3}_{}.{}".format(
+                self.get_data_dir(),
                 self.data_manager.world_idx,
                 self.demo_name,
                 self.data_manager.world_idx,
                 self.data_manager.data_idx,
                 extra_label,
+                self.args.data_format,
             )
             filename_list.append(filename)
-        if self.args.compress_rgb:
-            print("[TeleopBaseVec] Compress rgb images")
-            for camera_name in self.env.unwrapped.camera_names:
-                self.data_manager.compress_data(
-                    DataKey.get_rgb_image_key(camera_name),
-                    "jpg",
-                    filter_list=list(map(bool, filename_list)),
-                )
-        if self.args.compress_depth:
-            print("[TeleopBaseVec] Compress depth images")
-            for camera_name in self.env.unwrapped.camera_names:
-                self.data_manager.compress_data(
-                    DataKey.get_depth_image_key(camera_name),
-                    "exr",
-                    filter_list=list(map(bool, filename_list)),
-                )
-        self.data_manager.save_data(filename_list)
+        for key, compress_flag in self.get_compress_flag_dict().items():
+            print(f"[TeleopBaseVec] Compress {key}")
+            self.data_manager.compress_data(
+                key, compress_flag, filter_list=list(map(bool, filename_list))
+            )
+        self.data_manager.save_data(
+            filename_list, shared_env_idx=self.env.unwrapped.rep_env_idx
+        )
         num_success = sum(filename is not None for filename in filename_list)
         if num_success > 0:
             print(
@@ -0,0 +1,127 @@
+import time
+import argparse
+import numpy as np
+from robo_manip_baselines.common import DataKey, DataManager, RecordingPolicy
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--num_steps", type=int, default=1000)
+parser.add_argument("--camera_names", type=str, nargs="*", default=["front", "hand"])
+parser.add_argument("--width", type=int, default=640)
+parser.add_argument("--height", type=int, default=480)
+parser.add_argument(
+    "--record_interval",
+    type=int,
+    default=3,
+    help="interval at which the images are recorded in the benchmark with a recording policy",
+)
+args = parser.parse_args()
+
+
+def make_single_data_dict():
+    """Make the data recorded in a single step of teleoperation."""
+    single_data_dict = {
+        DataKey.TIME: 0.0,
+        DataKey.MEASURED_JOINT_POS: np.zeros(7),
+        DataKey.COMMAND_JOINT_POS: np.zeros(7),
+        DataKey.MEASURED_JOINT_VEL: np.zeros(7),
+        DataKey.MEASURED_EEF_POSE: np.zeros(7),
+        DataKey.COMMAND_EEF_POSE: np.zeros(7),
+        DataKey.MEASURED_EEF_WRENCH: np.zeros(6),
+    }
+    for camera_name in args.camera_names:
+        single_data_dict[DataKey.get_rgb_image_key(camera_name)] = np.zeros(
+            (args.height, args.width, 3), dtype=np.uint8
+        )
+        single_data_dict[DataKey.get_depth_image_key(camera_name)] = np.zeros(
+            (args.height, args.width), dtype=np.float32
+        )
+    return single_data_dict
+
+
+def make_step_data(single_data_dict):
+    """Copy the data because the environment returns new arrays in each step."""
+    return {key: np.copy(data) for key, data in single_data_dict.items()}
+
+
+def record_with_list(single_data_dict):
+    """Record data in the same way as DataManager did before it had preallocated buffers."""
+    all_data_seq = {}
+    start_time = time.perf_counter()
+    for time_idx in range(args.num_steps):
+        for key, data in make_step_data(single_data_dict).items():
+            key = DataKey.replace_deprecated_key(key)
+            if key not in all_data_seq:
+                all_data_seq[key] = []
+            all_data_seq[key].append(data)
+    record_duration = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    for key in single_data_dict.keys():
+        np.array(all_data_seq[key])
+    return record_duration, time.perf_counter() - start_time
+
+
+def record_with_buffer(single_data_dict, register_schema):
+    data_manager = DataManager(env=None)
+    if register_schema:
+        for key, data in single_data_dict.items():
+            data = np.asarray(data)
+            data_manager.register_data_key(key, data.shape, data.dtype)
+    start_time = time.perf_counter()
+    for time_idx in range(args.num_steps):
+        for key, data in make_step_data(single_data_dict).items():
+            data_manager.append_single_data(key, data)
+    record_duration = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    for key in single_data_dict.keys():
+        data_manager.get_data(key)
+    return record_duration, time.perf_counter() - start_time
+
+
+def record_with_interval(single_data_dict):
+    """
+    Record the images at an interval, and check that the latest recorded image is read back in each step
+    during recording.
+    """
+    data_manager = DataManager(env=None)
+    data_manager.set_recording_policies(
+        [("*_image", RecordingPolicy(interval=args.record_interval))]
+    )
+    image_key = DataKey.get_rgb_image_key(args.camera_names[0])
+    start_time = time.perf_counter()
+    for time_idx in range(args.num_steps):
+        step_data = make_step_data(single_data_dict)
+        step_data[image_key][0, 0, 0] = time_idx % 256
+        for key, data in step_data.items():
+            data_manager.append_single_data(key, data)
+        recorded_time_idx = time_idx - time_idx % args.record_interval
+        if (
+            data_manager.get_single_data(image_key, time_idx)[0, 0, 0]
+            != recorded_time_idx % 256
+        ):
+            raise RuntimeError(
+                f"[benchmark_data_manager] Wrong image is read back at time index {time_idx}."
+            )
+    record_duration = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    for key in single_data_dict.keys():
+        data_manager.get_data(key)
+    return record_duration, time.perf_counter() - start_time
+
+
+single_data_dict = make_single_data_dict()
+print(
+    f"[benchmark_data_manager] {args.num_steps} steps with {len(args.camera_names)} cameras "
+    f"of {args.width}x{args.height} images"
+)
+print("  method               | record [us/step] | get_data [ms]")
+for method_name, record_func in (
+    ("list", lambda: record_with_list(single_data_dict)),
+    ("buffer", lambda: record_with_buffer(single_data_dict, False)),
+    ("buffer with schema", lambda: record_with_buffer(single_data_dict, True)),
+    ("buffer with interval", lambda: record_with_interval(single_data_dict)),
+):
+    record_duration, get_duration = record_func()
+    print(
+        f"  {method_name:<20} | {1e6 * record_duration / args.num_steps:>16.1f} | "
+        f"{1e3 * get_duration:>13.1f}"
+    )
@@ -0,0 +1,73 @@
+import time
+import argparse
+import numpy as np
+import cv2
+from robo_manip_baselines.common import ImageCodec
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--num_frames", type=int, default=300)
+parser.add_argument("--num_workers_list", type=int, nargs="*", default=[1, 2, 4, 8])
+parser.add_argument("--jpg_quality", type=int, default=95)
+parser.add_argument("--width", type=int, default=640)
+parser.add_argument("--height", type=int, default=480)
+args = parser.parse_args()
+
+
+def make_images():
+    """Make smooth images with noise to emulate camera images."""
+    rng = np.random.default_rng(0)
+    x, y = np.meshgrid(
+        np.linspace(0.0, 1.0, args.width), np.linspace(0.0, 1.0, args.height)
+    )
+    rgb_images = []
+    depth_images = []
+    for frame_idx in range(args.num_frames):
+        phase = 2.0 * np.pi * frame_idx / args.num_frames
+        base_image = 0.5 + 0.5 * np.sin(4.0 * np.pi * x + phase) * np.cos(
+            2.0 * np.pi * y
+        )
+        rgb_image = np.stack([base_image, x, y], axis=-1)
+        rgb_image = rgb_image + 0.02 * rng.standard_normal(rgb_image.shape)
+        rgb_images.append((255 * np.clip(rgb_image, 0.0, 1.0)).astype(np.uint8))
+        depth_image = 0.5 + base_image + 0.001 * rng.standard_normal(base_image.shape)
+        depth_images.append(depth_image.astype(np.float32))
+    return rgb_images, depth_images
+
+
+def measure(func):
+    start_time = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start_time
+
+
+rgb_images, depth_images = make_images()
+print(
+    f"[benchmark_image_codec] {args.num_frames} frames of {args.width}x{args.height} images "
+    f"on {cv2.getNumberOfCPUs()} cores"
+)
+print(
+    "  image | flag | workers | encode [frames/s] | decode [frames/s] | size [KB/frame]"
+)
+for images, compress_flag, is_depth in (
+    (rgb_images, "jpg", False),
+    (depth_images, "exr", True),
+    (depth_images, "png", True),
+):
+    image_type = "depth" if is_depth else "rgb"
+    for num_workers in args.num_workers_list:
+        image_codec = ImageCodec(num_workers=num_workers, jpg_quality=args.jpg_quality)
+        # Warm up the thread pool
+        image_codec.encode_batch(images[: 2 * num_workers], compress_flag)
+        data_seq, encode_duration = measure(
+            lambda: image_codec.encode_batch(images, compress_flag)
+        )
+        _, decode_duration = measure(
+            lambda: image_codec.decode_batch(data_seq, is_depth)
+        )
+        image_codec.close()
+        data_size = np.mean([len(data) for data in data_seq]) / 1024
+        print(
+            f"  {image_type:>5} | {compress_flag:>4} | {num_workers:>7} | "
+            f"{args.num_frames / encode_duration:>17.1f} | "
+            f"{args.num_frames / decode_duration:>17.1f} | {data_size:>15.1f}"
+        )
@@ -0,0 +1,85 @@
+import time
+import argparse
+import numpy as np
+import gymnasium as gym
+import pinocchio as pin
+from robo_manip_baselines.common import MotionManager
+
+parser = argparse.ArgumentParser(
+    description="Compare the single-step and iterative inverse kinematics for reaching random targets."
+)
+parser.add_argument("--env", type=str, default="MujocoUR5eCableEnv")
+parser.add_argument("--num_targets", type=int, default=100)
+parser.add_argument("--max_ticks", type=int, default=200)
+parser.add_argument("--max_pos_offset", type=float, default=0.1, help="[m]")
+parser.add_argument("--max_rpy_offset", type=float, default=0.3, help="[rad]")
+parser.add_argument("--seed", type=int, default=0)
+args = parser.parse_args()
+
+env = gym.make(f"robo_manip_baselines/{args.env}-v0")
+motion_manager = MotionManager(env)
+rng = np.random.default_rng(args.seed)
+
+# Reach targets are random offsets from the initial end-effector pose, like PRE_REACH and REACH
+target_se3_list = []
+for target_idx in range(args.num_targets):
+    motion_manager.reset()
+    motion_manager.forward_kinematics()
+    current_se3 = motion_manager.current_se3
+    target_se3_list.append(
+        pin.SE3(
+            pin.rpy.rpyToMatrix(
+                *rng.uniform(-args.max_rpy_offset, args.max_rpy_offset, 3)
+            )
+            @ current_se3.rotation,
+            current_se3.translation
+            + rng.uniform(-args.max_pos_offset, args.max_pos_offset, 3),
+        )
+    )
+
+
+def reach_targets(solve_ik):
+    """Solve IK once per control tick until each target is reached and return the statistics."""
+    tick_num_list = []
+    tick_duration_list = []
+    residual_list = []
+    for target_se3 in target_se3_list:
+        motion_manager.reset()
+        motion_manager.forward_kinematics()
+        motion_manager.target_se3 = target_se3.copy()
+        for tick_idx in range(args.max_ticks):
+            start_time = time.perf_counter()
+            solve_ik()
+            tick_duration_list.append(time.perf_counter() - start_time)
+            residual = np.linalg.norm(
+                pin.log(
+                    motion_manager.current_se3.actInv(motion_manager.target_se3)
+                ).vector
+            )
+            if residual < motion_manager.ik_tol:
+                break
+        tick_num_list.append(tick_idx + 1)
+        residual_list.append(residual)
+    return (
+        np.array(tick_num_list),
+        np.array(tick_duration_list),
+        np.array(residual_list),
+    )
+
+
+print(
+    f"[benchmark_inverse_kinematics] env: {args.env}, num_targets: {args.num_targets}, "
+    f"tol: {motion_manager.ik_tol}, max_iter: {motion_manager.ik_max_iter}, "
+    f"max_time: {motion_manager.ik_max_time * 1e3:.1f} ms, "
+    f"max_joint_delta: {motion_manager.ik_max_joint_delta} rad"
+)
+for name, solve_ik in (
+    ("single-step", motion_manager.inverse_kinematics),
+    ("iterative", motion_manager.inverse_kinematics_until_converged),
+):
+    tick_num, tick_duration, residual = reach_targets(solve_ik)
+    print(
+        f"  {name:>11}: ticks to reach mean {tick_num.mean():.1f} / max {tick_num.max()}, "
+        f"duration per tick mean {tick_duration.mean() * 1e3:.3f} ms / max {tick_duration.max() * 1e3:.3f} ms, "
+        f"reached {np.mean(residual < motion_manager.ik_tol) * 100:.0f}%"
+    )
@@ -0,0 +1,116 @@
+import time
+import argparse
+import numpy as np
+import cv2
+from robo_manip_baselines.common import (
+    convertDepthImageToColorImage,
+    convertDepthImageToPointCloud,
+)
+
+parser = argparse.ArgumentParser(
+    description="Measure the cost of converting depth images to point clouds and color images."
+)
+parser.add_argument("--num_trials", type=int, default=20)
+parser.add_argument("--width", type=int, default=640)
+parser.add_argument("--height", type=int, default=480)
+parser.add_argument("--fovy", type=float, default=45.0)
+parser.add_argument("--dist_thre", type=float, default=3.0)
+parser.add_argument(
+    "--depth_range", type=float, nargs=2, default=[0.0, 2.0], help="[m]"
+)
+args = parser.parse_args()
+
+
+def convert_depth_image_to_point_cloud_with_loop(
+    depth_image, fovy, rgb_image, dist_thre
+):
+    """Convert depth image to point cloud in the same way as VisionUtils did before it had cached ray grids."""
+    focal_scaling = (1.0 / np.tan(np.deg2rad(fovy) / 2.0)) * depth_image.shape[0] / 2.0
+    xyz_array = np.array(
+        [
+            (i, j)
+            for i in range(depth_image.shape[0])
+            for j in range(depth_image.shape[1])
+        ],
+        dtype=np.float32,
+    )
+    xyz_array = (
+        xyz_array - 0.5 * np.array(depth_image.shape[:2], dtype=np.float32)
+    ) / focal_scaling
+    xyz_array *= depth_image.flatten()[:, np.newaxis]
+    xyz_array = np.hstack((xyz_array[:, [1, 0]], depth_image.flatten()[:, np.newaxis]))
+    dist_thre_indices = np.argwhere(depth_image.flatten() < dist_thre)[:, 0]
+    xyz_array = xyz_array[dist_thre_indices]
+    rgb_array = rgb_image.reshape(-1, 3)[dist_thre_indices]
+    return xyz_array, rgb_array.astype(np.float32) / 255.0
+
+
+def convert_depth_image_to_color_image_with_min_max(image):
+    """Convert depth image to color image in the same way as VisionUtils did before it had lookup tables."""
+    eps = 1e-6
+    image_copied = image.copy()
+    image_copied[np.logical_not(np.isfinite(image_copied))] = image_copied[
+        np.isfinite(image_copied)
+    ].max()
+    image_copied = (
+        255
+        * (
+            (image_copied - image_copied.min())
+            / (image_copied.max() - image_copied.min() + eps)
+        )
+    ).astype(np.uint8)
+    return cv2.merge((image_copied,) * 3)
+
+
+def measure_duration(func):
+    """Return the mean duration [ms] of the function over the trials."""
+    start_time = time.perf_counter()
+    for trial_idx in range(args.num_trials):
+        func()
+    return (time.perf_counter() - start_time) / args.num_trials * 1e3
+
+
+rng = np.random.default_rng(0)
+depth_image = rng.uniform(0.2, 5.0, (args.height, args.width)).astype(np.float32)
+rgb_image = rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+xyz_buffer = np.empty((args.height * args.width, 3), dtype=np.float32)
+
+print(f"[benchmark_vision_utils] image size: {args.width}x{args.height}")
+print("  Point cloud:")
+duration_dict = {
+    "loop": lambda: convert_depth_image_to_point_cloud_with_loop(
+        depth_image, args.fovy, rgb_image, args.dist_thre
+    ),
+    "ray grid": lambda: convertDepthImageToPointCloud(
+        depth_image, args.fovy, rgb_image, args.dist_thre
+    ),
+    "ray grid without threshold and with output buffer": lambda: (
+        convertDepthImageToPointCloud(depth_image, args.fovy, out=xyz_buffer)
+    ),
+}
+for name, func in duration_dict.items():
+    print(f"    {name:>50}: {measure_duration(func):.3f} ms")
+
+color_buffer = np.empty((args.height, args.width, 3), dtype=np.uint8)
+print("  Color image:")
+duration_dict = {
+    "min and max": lambda: convert_depth_image_to_color_image_with_min_max(depth_image),
+    "lookup table with range of image": lambda: convertDepthImageToColorImage(
+        depth_image
+    ),
+    "lookup table with fixed range and output buffer": lambda: (
+        convertDepthImageToColorImage(
+            depth_image, depth_range=args.depth_range, out=color_buffer
+        )
+    ),
+    "lookup table with fixed range and jet colormap": lambda: (
+        convertDepthImageToColorImage(
+            depth_image,
+            depth_range=args.depth_range,
+            colormap=cv2.COLORMAP_JET,
+            out=color_buffer,
+        )
+    ),
+}
+for name, func in duration_dict.items():
+    print(f"    {name:>50}: {measure_duration(func):.3f} ms")
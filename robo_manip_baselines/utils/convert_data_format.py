@@ -0,0 +1,24 @@
+import os
+import argparse
+from robo_manip_baselines.common import DataManager
+
+parser = argparse.ArgumentParser(
+    description="Convert data between the npz file format and the episode directory format (.rmb)."
+)
+parser.add_argument("in_filename", type=str)
+parser.add_argument("--out_filename", type=str, default=None)
+args = parser.parse_args()
+
+if args.out_filename is None:
+    in_basename, in_ext = os.path.splitext(args.in_filename.rstrip("/"))
+    args.out_filename = in_basename + (".rmb" if in_ext == ".npz" else ".npz")
+
+data_manager = DataManager(env=None)
+data_manager.load_data(args.in_filename)
+# Keep the data (including general_info) as is, unlike renew_data.py
+# The data shared with another episode is included so that the converted file does not depend on it
+data_manager.write_data_file(args.out_filename, data_manager.all_data_seq)
+
+print("[convert_data_format] Convert data format:")
+print(f"  in: {args.in_filename}")
+print(f"  out: {args.out_filename}")
@@ -1,12 +1,10 @@
 from tqdm import tqdm
 import numpy as np
-import glob
 import zarr
 import argparse
-import os
 import cv2
 from multiprocessing import Pool
-from robo_manip_baselines.common import DataKey, DataManager
+from robo_manip_baselines.common import DataKey, DataManager, find_episode_files
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--in_dir", type=str, required=True)
@@ -16,14 +14,7 @@ parser.add_argument("--train_keywords", nargs="*", required=False)
 parser.add_argument("-j", "--nproc", type=int, default=1)
 args = parser.parse_args()
 
-in_file_names = glob.glob(os.path.join(args.in_dir, "**/*.npz"), recursive=True)
-if args.train_keywords is not None:
-    in_file_names = [
-        name
-        for name in in_file_names
-        if any([(word in name) for word in args.train_keywords])
-    ]
-in_file_names.sort()
+in_file_names = find_episode_files(args.in_dir, keywords=args.train_keywords)
 
 actions = None
 joints = None
@@ -34,10 +25,19 @@ ep_ends = np.zeros(len(in_file_names), dtype=np.int64)
 def get_data(in_file_name):
     print(" " * 4 + f"{in_file_name}")
     data_manager = DataManager(env=None)
-    data_manager.load_data(in_file_name)
-    _actions = data_manager.get_data(DataKey.COMMAND_JOINT_POS)[:: args.skip]
-    _joints = data_manager.get_data(DataKey.MEASURED_JOINT_POS)[:: args.skip]
-    _images = data_manager.get_data(DataKey.get_rgb_image_key("front"))[:: args.skip]
+    data_manager.load_data(
+        in_file_name,
+        keys=[
+            DataKey.COMMAND_JOINT_POS,
+            DataKey.MEASURED_JOINT_POS,
+            DataKey.get_rgb_image_key("front"),
+        ],
+    )
+    _actions = data_manager.get_synced_data(DataKey.COMMAND_JOINT_POS, args.skip)
+    _joints = data_manager.get_synced_data(DataKey.MEASURED_JOINT_POS, args.skip)
+    _images = data_manager.get_synced_data(
+        DataKey.get_rgb_image_key("front"), args.skip
+    )
     return (_actions, _joints, _images)
 
 
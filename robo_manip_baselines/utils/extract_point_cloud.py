@@ -0,0 +1,167 @@
+import os
+import argparse
+import multiprocessing
+import numpy as np
+from robo_manip_baselines.common import (
+    DataKey,
+    DataManager,
+    find_episode_files,
+    convertDepthImageToPointCloud,
+)
+from robo_manip_baselines.common.EpisodeDir import is_episode_dir
+from robo_manip_baselines.common.VisionUtils import (
+    transformPointCloud,
+    downsamplePointCloud,
+)
+
+parser = argparse.ArgumentParser(
+    description="Extract point clouds from the depth and rgb images of episodes."
+)
+parser.add_argument(
+    "in_path_list",
+    type=str,
+    nargs="+",
+    help="episode files or directories that contain episode files",
+)
+parser.add_argument(
+    "--camera_names",
+    type=str,
+    nargs="+",
+    default=None,
+    help="cameras whose point clouds are merged (all cameras of the episode if not specified)",
+)
+parser.add_argument("--num_points", type=int, default=4096)
+parser.add_argument("--voxel_size", type=float, default=0.005, help="[m]")
+parser.add_argument("--max_depth", type=float, default=3.0, help="[m]")
+parser.add_argument(
+    "--bbox",
+    type=float,
+    nargs=6,
+    default=None,
+    help="bounding box (x_min, y_min, z_min, x_max, y_max, z_max) [m] to crop the merged point cloud",
+)
+parser.add_argument(
+    "--pixel_skip", type=int, default=1, help="skip of pixels of depth images"
+)
+parser.add_argument("--skip", type=int, default=1, help="skip of time steps")
+parser.add_argument("--num_workers", type=int, default=None)
+parser.add_argument("--seed", type=int, default=0)
+args = parser.parse_args()
+
+
+def get_point_cloud_filename(filename):
+    """Get the name of the point cloud file written alongside the episode file."""
+    return os.path.splitext(filename.rstrip("/"))[0] + "_point_cloud.npy"
+
+
+def extract_point_cloud(filename):
+    """
+    Extract the point cloud sequence of an episode and write it as a npy file of [T, num_points, 6].
+
+    Each point consists of the position (x, y, z) [m] and the color (r, g, b) in [0, 1]. If the poses of all
+    cameras are recorded, the positions are in the world frame. Otherwise, only a single camera can be used and
+    the positions are in its frame.
+    """
+    data_manager = DataManager(env=None)
+    data_manager.load_data(filename)
+    all_data_seq = data_manager.all_data_seq
+
+    if args.camera_names is None:
+        camera_name_list = [
+            key[: -len("_depth_image")]
+            for key in all_data_seq.keys()
+            if DataKey.is_depth_image_key(key)
+        ]
+    else:
+        camera_name_list = args.camera_names
+    camera_pose_list = []
+    for camera_name in camera_name_list:
+        pose_key = DataKey.get_depth_image_key(camera_name) + "_pose"
+        camera_pose_list.append(
+            np.asarray(all_data_seq[pose_key]) if pose_key in all_data_seq else None
+        )
+    if len(camera_name_list) > 1 and any(pose is None for pose in camera_pose_list):
+        raise ValueError(
+            "[extract_point_cloud] The point clouds of cameras cannot be merged because the poses of some "
+            f"cameras are not recorded in {filename}: {camera_name_list}"
+        )
+
+    rng = np.random.default_rng(args.seed)
+    seq_len = len(data_manager.get_data(DataKey.TIME))
+    time_idx_list = list(range(0, seq_len, args.skip))
+    point_cloud_filename = get_point_cloud_filename(filename)
+    tmp_point_cloud_filename = point_cloud_filename + ".tmp"
+    point_cloud_seq = np.lib.format.open_memmap(
+        tmp_point_cloud_filename,
+        mode="w+",
+        dtype=np.float32,
+        shape=(len(time_idx_list), args.num_points, 6),
+    )
+    for seq_idx, time_idx in enumerate(time_idx_list):
+        xyz_array_list = []
+        rgb_array_list = []
+        for camera_name, camera_pose in zip(camera_name_list, camera_pose_list):
+            depth_key = DataKey.get_depth_image_key(camera_name)
+            depth_image = data_manager.get_single_data(depth_key, time_idx)[
+                :: args.pixel_skip, :: args.pixel_skip
+            ]
+            rgb_image = data_manager.get_single_data(
+                DataKey.get_rgb_image_key(camera_name), time_idx
+            )[:: args.pixel_skip, :: args.pixel_skip]
+            # Invalid depth (e.g., infinite) is also excluded by the threshold
+            xyz_array, rgb_array = convertDepthImageToPointCloud(
+                np.where(depth_image > 0.0, depth_image, np.inf),
+                fovy=float(np.asarray(all_data_seq[depth_key + "_fovy"])),
+                rgb_image=rgb_image,
+                dist_thre=args.max_depth,
+            )
+            if camera_pose is not None:
+                xyz_array = transformPointCloud(xyz_array, camera_pose)
+            xyz_array_list.append(xyz_array)
+            rgb_array_list.append(rgb_array)
+        xyz_array = np.concatenate(xyz_array_list)
+        rgb_array = np.concatenate(rgb_array_list)
+
+        if args.bbox is not None:
+            bbox_mask = np.all(
+                (xyz_array >= args.bbox[0:3]) & (xyz_array <= args.bbox[3:6]), axis=1
+            )
+            xyz_array = xyz_array[bbox_mask]
+            rgb_array = rgb_array[bbox_mask]
+
+        xyz_array, rgb_array = downsamplePointCloud(
+            xyz_array, rgb_array, args.voxel_size, args.num_points, rng
+        )
+        if len(xyz_array) == 0:
+            point_cloud_seq[seq_idx] = 0.0
+        else:
+            point_cloud_seq[seq_idx, :, 0:3] = xyz_array
+            point_cloud_seq[seq_idx, :, 3:6] = rgb_array
+
+    point_cloud_seq.flush()
+    del point_cloud_seq
+    os.replace(tmp_point_cloud_filename, point_cloud_filename)
+    return filename, point_cloud_filename, len(time_idx_list)
+
+
+if __name__ == "__main__":
+    filename_list = []
+    for in_path in args.in_path_list:
+        if os.path.isdir(in_path) and not is_episode_dir(in_path):
+            filename_list += find_episode_files(in_path)
+        else:
+            filename_list.append(in_path)
+
+    num_workers = min(args.num_workers or os.cpu_count(), len(filename_list))
+    if num_workers <= 1:
+        result_iter = map(extract_point_cloud, filename_list)
+    else:
+        pool = multiprocessing.Pool(num_workers)
+        result_iter = pool.imap_unordered(extract_point_cloud, filename_list)
+    for filename, point_cloud_filename, seq_len in result_iter:
+        print(f"[extract_point_cloud] Extract point clouds of {seq_len} steps:")
+        print(f"  in: {filename}")
+        print(f"  out: {point_cloud_filename}")
+    if num_workers > 1:
+        pool.close()
+        pool.join()
@@ -1,6 +1,4 @@
 import sys
-import os
-import glob
 import argparse
 import numpy as np
 from multiprocessing import Pool
@@ -8,7 +6,7 @@ from pathlib import Path
 import random
 import cv2
 from array_utils import calc_minmax, stack_arrays_with_padding
-from robo_manip_baselines.common import DataKey, DataManager
+from robo_manip_baselines.common import DataKey, DataManager, find_episode_files
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--in_dir", type=str, required=True)
@@ -33,12 +31,23 @@ def load_skip_resize_data(file_info):
     skip, resized_img_size, filename = file_info
     print(" " * 4 + filename)
     data_manager = DataManager(env=None)
-    data_manager.load_data(filename)
+    data_manager.load_data(
+        filename,
+        keys=[
+            DataKey.get_rgb_image_key("front"),
+            DataKey.get_rgb_image_key("side"),
+            DataKey.MEASURED_EEF_WRENCH,
+            DataKey.MEASURED_JOINT_POS,
+            DataKey.COMMAND_JOINT_POS,
+        ],
+    )
     try:
-        _front_images = data_manager.get_data(DataKey.get_rgb_image_key("front"))[
-            ::skip
-        ]
-        _side_images = data_manager.get_data(DataKey.get_rgb_image_key("side"))[::skip]
+        _front_images = data_manager.get_synced_data(
+            DataKey.get_rgb_image_key("front"), skip
+        )
+        _side_images = data_manager.get_synced_data(
+            DataKey.get_rgb_image_key("side"), skip
+        )
         if args.cropped_img_size is not None:
             [fro_lef, fro_top, sid_lef, sid_top] = [
                 (images_shape[ax] - args.cropped_img_size) // 2
@@ -64,9 +73,9 @@ def load_skip_resize_data(file_info):
                     for image in _side_images
                 ]
             )
-        _wrenches = data_manager.get_data(DataKey.MEASURED_EEF_WRENCH)[::skip]
-        _joints = data_manager.get_data(DataKey.MEASURED_JOINT_POS)[::skip]
-        _actions = data_manager.get_data(DataKey.COMMAND_JOINT_POS)[::skip]
+        _wrenches = data_manager.get_synced_data(DataKey.MEASURED_EEF_WRENCH, skip)
+        _joints = data_manager.get_synced_data(DataKey.MEASURED_JOINT_POS, skip)
+        _actions = data_manager.get_synced_data(DataKey.COMMAND_JOINT_POS, skip)
     except KeyError as e:
         print(f"{e.__class__.__name__}: filename={filename}")
         raise
@@ -94,8 +103,7 @@ def load_data(in_dir, skip, resized_img_size, nproc):
     actions = []
     masks = []
 
-    in_file_names = glob.glob(os.path.join(in_dir, "**/*.npz"), recursive=True)
-    in_file_names.sort()
+    in_file_names = find_episode_files(in_dir)
     try:
         assert len(in_file_names) >= 1, f"{len(in_file_names)=}"
     except AssertionError:
@@ -0,0 +1,81 @@
+import os
+import argparse
+import numpy as np
+import gymnasium as gym
+from robo_manip_baselines.common import (
+    DataKey,
+    DataManager,
+    MotionManager,
+    find_episode_files,
+)
+from robo_manip_baselines.common.EpisodeDir import is_episode_dir
+
+parser = argparse.ArgumentParser(
+    description="Recompute the measured end-effector pose of episodes from the measured joint position."
+)
+parser.add_argument(
+    "in_path_list",
+    type=str,
+    nargs="+",
+    help="episode files or directories that contain episode files",
+)
+parser.add_argument(
+    "--env",
+    type=str,
+    default=None,
+    help="environment name (e.g., MujocoUR5eCableEnv) used instead of the one recorded in the episodes",
+)
+args = parser.parse_args()
+
+filename_list = []
+for in_path in args.in_path_list:
+    if os.path.isdir(in_path) and not is_episode_dir(in_path):
+        filename_list += find_episode_files(in_path)
+    else:
+        filename_list.append(in_path)
+
+# Environments and motion managers are created once for each environment name
+motion_manager_dict = {}
+data_manager = DataManager(env=None)
+for filename in filename_list:
+    all_data_seq = data_manager.open_data(filename)
+    env_name = args.env or str(all_data_seq["env"])
+    if env_name not in motion_manager_dict:
+        env = gym.make(f"robo_manip_baselines/{env_name}-v0")
+        motion_manager_dict[env_name] = MotionManager(env)
+    motion_manager = motion_manager_dict[env_name]
+
+    measured_joint_pos_seq = np.asarray(all_data_seq[DataKey.MEASURED_JOINT_POS])
+    measured_eef_seq = motion_manager.get_eef_pose_batch(
+        measured_joint_pos_seq[:, motion_manager.env.unwrapped.arm_action_idxes]
+    )
+    if DataKey.MEASURED_EEF_POSE in all_data_seq:
+        max_diff = np.abs(
+            measured_eef_seq - all_data_seq[DataKey.MEASURED_EEF_POSE]
+        ).max()
+    else:
+        max_diff = None
+
+    # Keep the reference to the data shared with another episode
+    saved_data_seq = {key: all_data_seq[key] for key in all_data_seq.key_dict}
+    for key in DataManager.SHARED_DATA_REFERENCE_KEYS:
+        if key in all_data_seq.source.keys():
+            saved_data_seq[key] = all_data_seq.source[key]
+    saved_data_seq[DataKey.MEASURED_EEF_POSE] = measured_eef_seq
+
+    if is_episode_dir(filename):
+        # The episode directory is written to a temporary directory and replaced when completed
+        data_manager.write_data_file(filename, saved_data_seq)
+    else:
+        # Write to a temporary file first because the original file is still being read
+        # The suffix must not be .npz so that the temporary file is not found as an episode file, and the file
+        # is written via a file object because np.savez appends .npz to such a filename
+        tmp_filename = filename + ".tmp"
+        with open(tmp_filename, "wb") as f:
+            np.savez(f, **saved_data_seq)
+        all_data_seq.close()
+        os.replace(tmp_filename, filename)
+
+    print(f"[recompute_eef_pose] Recompute {DataKey.MEASURED_EEF_POSE}: {filename}")
+    if max_diff is not None:
+        print(f"  max difference from the recorded pose: {max_diff:.3e}")
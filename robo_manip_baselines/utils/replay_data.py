@@ -0,0 +1,274 @@
+import os
+import argparse
+import multiprocessing
+import numpy as np
+import cv2
+import gymnasium as gym
+from robo_manip_baselines.common import (
+    MotionManager,
+    MotionStatus,
+    DataKey,
+    DataManager,
+    RecordingPolicy,
+    EpisodeCatalog,
+    find_episode_files,
+)
+from robo_manip_baselines.common.EpisodeDir import is_episode_dir
+
+parser = argparse.ArgumentParser(
+    description="Replay the commands of episodes in simulation without windows and re-record the data."
+)
+parser.add_argument(
+    "in_path_list",
+    type=str,
+    nargs="+",
+    help="episode files or directories that contain episode files",
+)
+parser.add_argument(
+    "--out_dir", type=str, required=True, help="directory to write the episodes"
+)
+parser.add_argument(
+    "--env",
+    type=str,
+    default=None,
+    help="environment name (e.g., MujocoUR5eCableEnv) used instead of the one recorded in the episodes",
+)
+parser.add_argument(
+    "--keys",
+    type=str,
+    nargs="+",
+    default=None,
+    help="keys to re-record (if not given, the measured data and the images of the cameras are re-recorded), and the other keys are copied",
+)
+parser.add_argument(
+    "--camera_names",
+    type=str,
+    nargs="+",
+    default=None,
+    help="cameras whose images are re-recorded (all cameras of the environment if not specified)",
+)
+parser.add_argument(
+    "--image_size",
+    type=int,
+    nargs=2,
+    default=None,
+    help="size (width, height) of the re-recorded images (the size of the cameras if not given)",
+)
+parser.add_argument(
+    "--record_policy",
+    type=str,
+    nargs="+",
+    default=[],
+    help='policies to re-record data given as "<key_pattern>:<option>[,<option>...]" (see --record_policy of teleoperation)',
+)
+parser.add_argument(
+    "--warmup_duration",
+    type=float,
+    default=1.0,
+    help="duration [s] to move the arm to the first command with the gripper kept open",
+)
+parser.add_argument(
+    "--grasp_duration",
+    type=float,
+    default=0.5,
+    help="duration [s] to close the gripper to the first command before replaying",
+)
+parser.add_argument(
+    "--compress_rgb", type=int, default=1, help="whether to compress rgb image"
+)
+parser.add_argument(
+    "--compress_depth", type=int, default=0, help="whether to compress depth image"
+)
+parser.add_argument(
+    "--depth_compress_flag",
+    type=str,
+    default="exr",
+    choices=["exr", "png"],
+    help="compression format of depth image",
+)
+parser.add_argument(
+    "--data_format",
+    type=str,
+    default=None,
+    choices=["npz", "rmb"],
+    help="format of data file (the format of the original episode if not given)",
+)
+parser.add_argument("--num_workers", type=int, default=None)
+args = parser.parse_args()
+
+# Keys that are obtained from the observation of each step
+MEASURED_KEY_LIST = [
+    DataKey.MEASURED_JOINT_POS,
+    DataKey.MEASURED_JOINT_VEL,
+    DataKey.MEASURED_EEF_POSE,
+    DataKey.MEASURED_EEF_WRENCH,
+]
+# Keys that are written by DataManager.save_data
+INFO_KEY_LIST = ["format", "demo", "version", "env", "world_idx"]
+
+# Environments and motion managers of the worker process, which are created once for each environment name
+_env_dict = {}
+
+
+def get_motion_manager(env_name):
+    if env_name not in _env_dict:
+        env = gym.make(f"robo_manip_baselines/{env_name}-v0")
+        _env_dict[env_name] = MotionManager(env)
+    return _env_dict[env_name]
+
+
+def resize_image(image, is_depth):
+    if args.image_size is None:
+        return image
+    return cv2.resize(
+        image,
+        tuple(args.image_size),
+        interpolation=cv2.INTER_NEAREST if is_depth else cv2.INTER_AREA,
+    )
+
+
+def get_step_data(motion_manager, key_list, obs, info):
+    """Get the data of the re-recorded keys in the current step."""
+    step_data = {}
+    for key in key_list:
+        if key == DataKey.MEASURED_JOINT_POS:
+            step_data[key] = motion_manager.get_joint_pos(obs)
+        elif key == DataKey.MEASURED_JOINT_VEL:
+            step_data[key] = motion_manager.get_joint_vel(obs)
+        elif key == DataKey.MEASURED_EEF_POSE:
+            step_data[key] = motion_manager.get_measured_eef(obs)
+        elif key == DataKey.MEASURED_EEF_WRENCH:
+            step_data[key] = motion_manager.get_eef_wrench(obs)
+        elif DataKey.is_rgb_image_key(key):
+            step_data[key] = resize_image(
+                info["rgb_images"][key[: -len("_rgb_image")]], is_depth=False
+            )
+        elif DataKey.is_depth_image_key(key):
+            step_data[key] = resize_image(
+                info["depth_images"][key[: -len("_depth_image")]], is_depth=True
+            )
+    return step_data
+
+
+def replay_data(filename_pair):
+    """Replay the commands of the episode and write the episode with the re-recorded keys."""
+    in_filename, out_filename = filename_pair
+    data_manager = DataManager(env=None)
+    orig_data_seq = data_manager.open_data(in_filename)
+    env_name = args.env or str(orig_data_seq["env"])
+    motion_manager = get_motion_manager(env_name)
+    env = motion_manager.env
+
+    if args.keys is None:
+        key_list = [key for key in MEASURED_KEY_LIST if key in orig_data_seq]
+        for camera_name in args.camera_names or env.unwrapped.camera_names:
+            key_list += [
+                DataKey.get_rgb_image_key(camera_name),
+                DataKey.get_depth_image_key(camera_name),
+            ]
+    else:
+        key_list = [DataKey.replace_deprecated_key(key) for key in args.keys]
+
+    data_manager = DataManager(env, demo_name=str(orig_data_seq.get("demo", "")))
+    data_manager.set_recording_policies(
+        [RecordingPolicy.from_str(policy_str) for policy_str in args.record_policy]
+    )
+    data_manager.setup_camera_info()
+    data_manager.setup_sim_world(int(np.asarray(orig_data_seq["world_idx"])))
+    motion_manager.reset()
+    obs, info = env.reset()
+
+    # Reproduce the automatic grasping before the recorded teleoperation approximately: the arm moves to the
+    # first command in joint space with the gripper kept open, and then the gripper is closed
+    command_joint_pos_seq = np.asarray(orig_data_seq[DataKey.COMMAND_JOINT_POS])
+    arm_action_idxes = env.unwrapped.arm_action_idxes
+    gripper_action_idx = env.unwrapped.gripper_action_idx
+    init_action = motion_manager.get_action()
+    warmup_step_num = int(round(args.warmup_duration / env.unwrapped.dt))
+    for step_idx in range(warmup_step_num):
+        ratio = (step_idx + 1) / warmup_step_num
+        action = init_action.copy()
+        action[arm_action_idxes] = (1.0 - ratio) * init_action[
+            arm_action_idxes
+        ] + ratio * command_joint_pos_seq[0][arm_action_idxes]
+        obs, _, _, _, info = env.step(action)
+    for step_idx in range(int(round(args.grasp_duration / env.unwrapped.dt))):
+        action = init_action.copy()
+        action[arm_action_idxes] = command_joint_pos_seq[0][arm_action_idxes]
+        action[gripper_action_idx] = command_joint_pos_seq[0][gripper_action_idx]
+        obs, _, _, _, info = env.step(action)
+
+    # The data of each step is recorded before the command of the step is applied as in teleoperation
+    data_manager.status = MotionStatus.TELEOP
+    for command_joint_pos in command_joint_pos_seq:
+        for key, data in get_step_data(motion_manager, key_list, obs, info).items():
+            data_manager.append_single_data(key, data)
+        obs, _, _, _, info = env.step(command_joint_pos)
+
+    # The keys that are not re-recorded are copied from the original episode
+    for key in orig_data_seq:
+        if (
+            key in key_list
+            or (key.endswith("_scale") and key[: -len("_scale")] in key_list)
+            or (
+                key.endswith("_record_interval")
+                and key[: -len("_record_interval")] in key_list
+            )
+            or key in INFO_KEY_LIST
+            or key in data_manager.camera_info
+        ):
+            continue
+        data_manager.all_data_seq[key] = np.asarray(orig_data_seq[key])
+    for key in key_list:
+        if key not in data_manager.all_data_seq:
+            continue
+        if DataKey.is_rgb_image_key(key) and args.compress_rgb:
+            data_manager.compress_data(key, "jpg")
+        elif DataKey.is_depth_image_key(key) and args.compress_depth:
+            data_manager.compress_data(key, args.depth_compress_flag)
+    data_manager.save_data(out_filename)
+    orig_data_seq.close()
+
+    return in_filename, out_filename, len(command_joint_pos_seq)
+
+
+def get_out_filename(in_filename, in_dir=None):
+    """Get the output filename, which keeps the path relative to the input directory."""
+    in_filename = in_filename.rstrip("/")
+    if in_dir is None:
+        rel_filename = os.path.basename(in_filename)
+    else:
+        rel_filename = os.path.relpath(in_filename, in_dir)
+    if args.data_format is not None:
+        rel_filename = os.path.splitext(rel_filename)[0] + "." + args.data_format
+    return os.path.join(args.out_dir, rel_filename)
+
+
+if __name__ == "__main__":
+    filename_pair_list = []
+    for in_path in args.in_path_list:
+        if os.path.isdir(in_path) and not is_episode_dir(in_path):
+            for in_filename in find_episode_files(in_path):
+                filename_pair_list.append(
+                    (in_filename, get_out_filename(in_filename, in_path))
+                )
+        else:
+            filename_pair_list.append((in_path, get_out_filename(in_path)))
+
+    num_workers = min(args.num_workers or os.cpu_count(), len(filename_pair_list))
+    if num_workers <= 1:
+        result_iter = map(replay_data, filename_pair_list)
+    else:
+        # Each worker process creates its own environments
+        pool = multiprocessing.Pool(num_workers)
+        result_iter = pool.imap_unordered(replay_data, filename_pair_list)
+    catalog = EpisodeCatalog(args.out_dir)
+    for in_filename, out_filename, seq_len in result_iter:
+        catalog.add_episode(out_filename)
+        print(f"[replay_data] Replay {seq_len} steps:")
+        print(f"  in: {in_filename}")
+        print(f"  out: {out_filename}")
+    catalog.close()
+    if num_workers > 1:
+        pool.close()
+        pool.join()
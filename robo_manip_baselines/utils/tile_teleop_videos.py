@@ -3,7 +3,7 @@ import glob
 import cv2
 import argparse
 import os
-from robo_manip_baselines.common import DataKey, DataManager
+from robo_manip_baselines.common import DataKey, DataManager, find_episode_files
 from PIL import Image, ImageOps
 
 parser = argparse.ArgumentParser()
@@ -25,13 +25,13 @@ if args.column_num is None:
     args.column_num = len(args.envs)
 row_num = int(np.ceil(len(args.envs) / args.column_num))
 
+all_files = find_episode_files(args.in_npz_dir)
 for e in args.envs:
-    files = glob.glob(os.path.join(args.in_npz_dir, f"{e}/*.npz"))
-    files.sort()
+    files = [f for f in all_files if os.path.basename(os.path.dirname(f)) == e]
 
     data_manager = DataManager(env=None)
     print(f"[tile_teleop_videos] Load a npz file: {files[0]}")
-    data_manager.load_data(files[0])
+    data_manager.load_data(files[0], keys=[DataKey.get_rgb_image_key("front")])
 
     front_images.append(
         data_manager.get_data(DataKey.get_rgb_image_key("front"))[:, ::2, ::2, :]
@@ -1,15 +1,30 @@
 import numpy as np
-import glob
 import matplotlib
 import matplotlib.pylab as plt
 from matplotlib.backends.backend_agg import FigureCanvasAgg
 import cv2
 import argparse
 import os
+from robo_manip_baselines.common import (
+    DataKey,
+    DataManager,
+    EpisodeCatalog,
+    find_episode_files,
+    find_shared_data_files,
+)
 
 parser = argparse.ArgumentParser()
 parser.add_argument("in_dir", type=str)
 parser.add_argument("--out_dir", type=str)
+parser.add_argument(
+    "--cache_size",
+    type=int,
+    default=512,
+    help="maximum size of the cache of decoded images [MB]",
+)
+parser.add_argument(
+    "--prefetch_num", type=int, default=8, help="number of images to prefetch"
+)
 args = parser.parse_args()
 
 matplotlib.use("agg")
@@ -17,8 +32,12 @@ fig, ax = plt.subplots(1, 2, figsize=(14, 6), dpi=60)
 ax = ax.reshape(-1, 2)
 canvas = FigureCanvasAgg(fig)
 
-in_npz_path_list = glob.glob(os.path.join(args.in_dir, "**/*.npz"), recursive=True)
-in_npz_path_list.sort()
+in_npz_path_list = find_episode_files(args.in_dir)
+# Episodes whose data is shared with other episodes must not be trimmed in place, which breaks the other episodes
+if args.out_dir is None:
+    shared_npz_path_set = find_shared_data_files(args.in_dir)
+else:
+    shared_npz_path_set = set()
 
 print("[trim_npz] Usage:")
 print("    <right arrow> : Advance time one step")
@@ -31,10 +50,19 @@ print("    'e' : Set end index")
 print("    'r' : Reset start/end indexes")
 
 for in_npz_path in in_npz_path_list:
+    if os.path.abspath(in_npz_path.rstrip("/")) in shared_npz_path_set:
+        print(
+            f"[trim_npz] Skip a npz file whose data is shared with other episodes: {in_npz_path} "
+            "(specify --out_dir to save the trimmed file to another directory)"
+        )
+        continue
     print(f"[trim_npz] Load a npz file: {in_npz_path}")
-    npz_data = np.load(in_npz_path)
-    joints = npz_data["joint_pos"]
-    images = npz_data["front_rgb_image"]
+    data_manager = DataManager(env=None)
+    data_manager.enable_frame_cache(
+        max_bytes=args.cache_size * 1024**2, prefetch_num=args.prefetch_num
+    )
+    data_manager.load_data(in_npz_path)
+    joints = data_manager.get_data(DataKey.MEASURED_JOINT_POS)
     seq_len = len(joints)
 
     start_idx, end_idx = None, None
@@ -47,7 +75,9 @@ for in_npz_path in in_npz_path_list:
                 ax[j, k].cla()
 
         # Draw image
-        ax[0, 0].imshow(images[time_idx])
+        ax[0, 0].imshow(
+            data_manager.get_single_data(DataKey.get_rgb_image_key("front"), time_idx)
+        )
         ax[0, 0].axis("off")
         ax[0, 0].set_title("image", fontsize=20)
 
@@ -108,20 +138,33 @@ for in_npz_path in in_npz_path_list:
         if end_idx is None:
             end_idx = seq_len
 
-        npz_data = dict(npz_data)
-        for key in npz_data:
-            npz_data[key] = npz_data[key][start_idx:end_idx]
+        # The start index is aligned to the steps at which the keys recorded at intervals are recorded
+        interval_list = [
+            data_manager.get_record_interval(key, data_manager.all_data_seq)
+            for key in data_manager.all_data_seq.keys()
+        ]
+        interval_lcm = int(np.lcm.reduce(interval_list))
+        if start_idx % interval_lcm != 0:
+            start_idx -= start_idx % interval_lcm
+            print(
+                f"[trim_npz] Align start index to {start_idx} for the data recorded every {interval_lcm} steps."
+            )
+
+        # Trim the data sequences and keep the information such as general_info as is
+        trimmed_data = {}
+        for key, value in data_manager.all_data_seq.items():
+            interval = data_manager.get_record_interval(key, data_manager.all_data_seq)
+            if np.ndim(value) > 0 and len(value) == -(-seq_len // interval):
+                value = value[start_idx // interval : -(-end_idx // interval)]
+            trimmed_data[key] = value
 
         if args.out_dir is None:
             out_npz_path = in_npz_path
         else:
             out_npz_path = os.path.join(args.out_dir, os.path.basename(in_npz_path))
         print(f"[trim_npz] Save a npz file: {out_npz_path}")
-        np.savez(
-            out_npz_path,
-            time=npz_data["time"],
-            joint=npz_data["joint_pos"],
-            wrench=npz_data["wrench"],
-            front_image=npz_data["front_rgb_image"],
-            side_image=npz_data["side_rgb_image"],
-        )
+        data_manager.write_data_file(out_npz_path, trimmed_data)
+        if (args.out_dir is None) and EpisodeCatalog.exists(args.in_dir):
+            catalog = EpisodeCatalog(args.in_dir)
+            catalog.add_episode(out_npz_path)
+            catalog.close()
@@ -0,0 +1,22 @@
+import argparse
+from robo_manip_baselines.common import EpisodeCatalog
+
+parser = argparse.ArgumentParser(
+    description="Create or update the episode catalog of a data directory."
+)
+parser.add_argument("data_dir", type=str)
+parser.add_argument(
+    "--skip_hash",
+    action="store_true",
+    help="whether to skip computing the content hash of each episode",
+)
+args = parser.parse_args()
+
+catalog = EpisodeCatalog(args.data_dir)
+updated_num = catalog.sync(compute_hash=not args.skip_hash)
+episode_num = len(catalog.query())
+catalog.close()
+
+print("[update_episode_catalog] Update the episode catalog:")
+print(f"  catalog: {EpisodeCatalog.get_catalog_path(args.data_dir)}")
+print(f"  episodes: {episode_num} ({updated_num} added or updated)")
@@ -1,15 +1,27 @@
 import argparse
 import matplotlib.pylab as plt
 import numpy as np
+import cv2
 from robo_manip_baselines.common import (
     DataKey,
     DataManager,
+    PointCloudViewer,
     convertDepthImageToPointCloud,
+    transformPointCloud,
 )
 
 parser = argparse.ArgumentParser()
 parser.add_argument("teleop_filename", type=str)
 parser.add_argument("--skip", default=10, type=int, help="skip", required=False)
+parser.add_argument(
+    "--cache_size",
+    type=int,
+    default=512,
+    help="maximum size of the cache of decoded images [MB]",
+)
+parser.add_argument(
+    "--prefetch_num", type=int, default=8, help="number of images to prefetch"
+)
 args = parser.parse_args()
 
 plt.rcParams["keymap.quit"] = ["q", "escape"]
@@ -17,10 +29,13 @@ fig, ax = plt.subplots(4, 4)
 for ax_idx in range(1, 4):
     ax[ax_idx, 2].remove()
     ax[ax_idx, 3].remove()
-    ax[ax_idx, 2] = fig.add_subplot(4, 4, 4 * (ax_idx + 1) - 1, projection="3d")
 fig.tight_layout(pad=0.1)
+point_cloud_viewer = PointCloudViewer()
 
 data_manager = DataManager(env=None)
+data_manager.enable_frame_cache(
+    max_bytes=args.cache_size * 1024**2, prefetch_num=args.prefetch_num
+)
 data_manager.load_data(args.teleop_filename)
 
 time_range = (
@@ -47,7 +62,6 @@ ax[0, 3].set_ylim(eef_data[:, 0:3].min(), eef_data[:, 0:3].max())
 ax03_twin = ax[0, 3].twinx()
 ax03_twin.set_ylim(-1.0, 1.0)
 
-scatter_list = [None] * 3
 time_list = []
 action_list = []
 joint_pos_list = []
@@ -142,31 +156,25 @@ for time_idx in range(0, len(data_manager.get_data(DataKey.TIME)), args.skip):
             rgb_image=small_rgb_image,
             dist_thre=dist_thre_list[ax_idx - 1],
         )
-        if scatter_list[ax_idx - 1] is None:
-
-            def get_min_max(v_min, v_max):
-                return (
-                    0.75 * v_min + 0.25 * v_max,
-                    0.25 * v_min + 0.75 * v_max,
-                )
-
-            ax[ax_idx, 2].view_init(elev=-90, azim=-90)
-            ax[ax_idx, 2].set_xlim(
-                *get_min_max(xyz_array[:, 0].min(), xyz_array[:, 0].max())
-            )
-            ax[ax_idx, 2].set_ylim(
-                *get_min_max(xyz_array[:, 1].min(), xyz_array[:, 1].max())
-            )
-            ax[ax_idx, 2].set_zlim(
-                *get_min_max(xyz_array[:, 2].min(), xyz_array[:, 2].max())
+        # The point clouds of the static cameras are merged in the world frame
+        pose_key = f"{depth_key}_pose"
+        if pose_key in data_manager.all_data_seq:
+            point_cloud_viewer.set_point_cloud(
+                "world",
+                camera_name,
+                transformPointCloud(xyz_array, data_manager.get_data(pose_key)),
+                rgb_array,
+                frame="world",
             )
         else:
-            scatter_list[ax_idx - 1].remove()
-        ax[ax_idx, 2].axis("off")
-        ax[ax_idx, 2].set_box_aspect(xyz_array.ptp(axis=0))
-        scatter_list[ax_idx - 1] = ax[ax_idx, 2].scatter(
-            xyz_array[:, 0], xyz_array[:, 1], xyz_array[:, 2], c=rgb_array
-        )
+            point_cloud_viewer.set_point_cloud(
+                camera_name, camera_name, xyz_array, rgb_array
+            )
+    point_cloud_viewer.show()
+    key = cv2.waitKey(1)
+    point_cloud_viewer.handle_key(key)
+    if key in (ord("q"), 27):  # q or escape key
+        break
 
     plt.draw()
     plt.pause(0.001)